@@ -1,20 +1,181 @@
+import asyncio
+import logging
+import sys
+import time
 import discord
+from collections import OrderedDict, deque
 from discord.ext import commands
 from datetime import timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set, Tuple
 
-from db.DBHelper import (
-    get_anti_nuke_setting,
-    get_safe_users,
-    get_safe_roles,
-    get_anti_nuke_log_channel,
-)
+from db.async_db import db
+from snapshots import snapshot_loop
 
 OWNER_ID = 756537363509018736
 
 ACTION_WINDOW = 15  # seconds
+PUNISH_WORKERS = 16
+LOCKDOWN_CONCURRENCY = 5  # parallel role edits; discord.py waits out 429s
+LOCKDOWN_COOLDOWN = 300  # seconds between automatic lockdowns of a guild
+MENTION_STORM_WINDOW = 10  # seconds
+MENTION_STORM_SLOTS = 10  # time slices per window; counts expire a slice at a time
+
+DANGEROUS_PERMISSIONS = discord.Permissions(
+    administrator=True,
+    manage_guild=True,
+    manage_roles=True,
+    manage_channels=True,
+    manage_webhooks=True,
+    ban_members=True,
+    kick_members=True,
+    mention_everyone=True,
+)
+
+WindowKey = Tuple[int, str, int]  # (guild_id, category, actor_id)
+
+
+class SlidingWindows:
+    """Per-key sliding-window counters with bounded memory.
+
+    Each key keeps at most ``threshold`` timestamps, oldest first, which is
+    all that is needed to tell whether ``threshold`` actions fell within
+    ``window`` seconds. (A plain list is used rather than a ``deque``: with
+    thresholds this small it is several times smaller.) Keys whose newest
+    action is older than the window are dropped by a sweep that runs at most
+    once per window.
+    """
+
+    def __init__(self, window: float):
+        self.window = window
+        self._windows: Dict[WindowKey, List[float]] = {}
+        self._last_sweep = time.monotonic()
+
+    def hit(self, key: WindowKey, threshold: int, now: Optional[float] = None) -> bool:
+        """Record an action; True (and reset) when it reaches *threshold*."""
+
+        now = time.monotonic() if now is None else now
+        if now - self._last_sweep > self.window:
+            self.sweep(now)
+        times = self._windows.setdefault(key, [])
+        times.append(now)
+        cutoff = now - self.window
+        drop = max(len(times) - max(threshold, 1), 0)
+        while drop < len(times) and times[drop] < cutoff:
+            drop += 1
+        if drop:
+            del times[:drop]
+        if len(times) < threshold:
+            return False
+        del self._windows[key]
+        return True
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Drop idle keys; returns how many were removed."""
+
+        now = time.monotonic() if now is None else now
+        cutoff = now - self.window
+        idle = [k for k, times in self._windows.items() if times[-1] < cutoff]
+        for key in idle:
+            del self._windows[key]
+        self._last_sweep = now
+        return len(idle)
+
+    def clear(self) -> None:
+        self._windows.clear()
+
+    def __len__(self) -> int:
+        return len(self._windows)
 
-action_history: Dict[str, Dict[int, List[float]]] = {}
+    def stats(self) -> Dict[str, int]:
+        """Tracked keys, stored timestamps and an estimate of their bytes."""
+
+        timestamps = sum(len(t) for t in self._windows.values())
+        size = sys.getsizeof(self._windows) + sum(
+            sys.getsizeof(k) + sys.getsizeof(t) + 24 * len(t)  # 24: one float
+            for k, t in self._windows.items()
+        )
+        return {"keys": len(self._windows), "timestamps": timestamps, "bytes": size}
+
+
+action_windows = SlidingWindows(ACTION_WINDOW)
+
+
+class MentionStorms:
+    """Guild-wide mention counters for spotting coordinated ping raids.
+
+    The window is cut into ``slots`` time slices. Each guild keeps a queue of
+    ``(slice, {author_id: mentions})`` and a running total of the mentions in
+    it, so memory grows with the accounts taking part, not the messages they
+    send, and no mention inside the window is ever dropped. Slices leave the
+    window whole, so it is accurate to one slice. Idle guilds are swept as in
+    :class:`SlidingWindows`.
+
+    The message that takes the total over the threshold reports every account
+    that mentioned anyone in the window; while it stays over, every further
+    mentioning account is reported straight away.
+    """
+
+    def __init__(self, window: float, slots: int):
+        self.window = window
+        self.slots = slots
+        self._slice = window / slots
+        self._guilds: Dict[int, Tuple[deque, List[int]]] = {}
+        self._last_sweep = time.monotonic()
+
+    def hit(
+        self,
+        guild_id: int,
+        author_id: int,
+        mentions: int,
+        threshold: int,
+        now: Optional[float] = None,
+    ) -> Set[int]:
+        """Record a message; the participants once *threshold* is reached."""
+
+        now = time.monotonic() if now is None else now
+        if now - self._last_sweep > self.window:
+            self.sweep(now)
+        slices, total = self._guilds.setdefault(guild_id, (deque(), [0]))
+        current = int(now // self._slice)
+        while slices and slices[0][0] <= current - self.slots:
+            total[0] -= sum(slices.popleft()[1].values())
+        storming = total[0] >= threshold
+        if not slices or slices[-1][0] != current:
+            slices.append((current, {}))
+        authors = slices[-1][1]
+        authors[author_id] = authors.get(author_id, 0) + mentions
+        total[0] += mentions
+        if storming:
+            return {author_id}
+        if total[0] >= threshold:
+            return {author for _, authors in slices for author in authors}
+        return set()
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        now = time.monotonic() if now is None else now
+        oldest = int(now // self._slice) - self.slots
+        idle = [g for g, (slices, _) in self._guilds.items() if slices[-1][0] <= oldest]
+        for guild_id in idle:
+            del self._guilds[guild_id]
+        self._last_sweep = now
+        return len(idle)
+
+    def clear(self) -> None:
+        self._guilds.clear()
+
+    def stats(self) -> Dict[str, int]:
+        counters = sum(
+            len(authors) for slices, _ in self._guilds.values() for _, authors in slices
+        )
+        size = sys.getsizeof(self._guilds) + sum(
+            sys.getsizeof(slices)
+            + sum(sys.getsizeof(authors) for _, authors in slices)
+            for slices, _ in self._guilds.values()
+        ) + 90 * counters  # 90: one dict slot with its author id and count
+        return {"guilds": len(self._guilds), "counters": counters, "bytes": size}
+
+
+mention_storms = MentionStorms(MENTION_STORM_WINDOW, MENTION_STORM_SLOTS)
 
 
 CATEGORIES = {
@@ -25,6 +186,7 @@ CATEGORIES = {
     "delete_channels": discord.AuditLogAction.channel_delete,
     "webhook": discord.AuditLogAction.webhook_create,
     "anti_mention": None,
+    "mention_storm": None,
 }
 
 
@@ -39,165 +201,415 @@ async def punish(
             until = discord.utils.utcnow() + timedelta(seconds=duration)
             await member.timeout(until, reason="Anti-nuke")
         elif punishment == "strip":
-            roles = [r for r in member.roles if not r.is_default()]
+            # only roles below the bot's top role can be removed; asking for
+            # any other makes Discord reject the whole edit
+            roles = [r for r in member.roles if r.is_assignable()]
             if roles:
                 await member.remove_roles(*roles, reason="Anti-nuke")
         elif punishment == "kick":
             await member.kick(reason="Anti-nuke")
         elif punishment == "ban":
             await member.ban(reason="Anti-nuke")
-    except Exception:
-        pass
-
+    except discord.HTTPException:
+        logging.warning(
+            "Anti-nuke %s of %s in %s failed", punishment, member.id, member.guild.id
+        )
 
-async def log_action(
-    member: discord.Member, category: str, punishment: str, duration: Optional[int]
-) -> None:
 
-    cid = get_anti_nuke_log_channel(member.guild.id)
+async def send_log(guild: discord.Guild, text: str) -> None:
+    cid = (await db.anti_nuke_policy(guild.id)).log_channel_id
     if not cid:
         return
-    channel = member.guild.get_channel(cid)
+    channel = guild.get_channel(cid)
     if channel:
-        info = f"{punishment}"
-        if punishment == "timeout" and duration:
-            info += f" {duration}s"
-        await channel.send(
-            f"<@{OWNER_ID}> {member.mention} triggered **{category}** - {info}"
-        )
+        await channel.send(text)
+
+
+def action_message(
+    member: discord.Member, category: str, punishment: str, duration: Optional[int]
+) -> str:
+    info = f"{punishment}"
+    if punishment == "timeout" and duration:
+        info += f" {duration}s"
+    return f"{member.mention} triggered **{category}** - {info}"
+
+
+async def lockdown(guild: discord.Guild, safe_roles=frozenset()) -> Tuple[int, int]:
+    """Revoke DANGEROUS_PERMISSIONS from every role the bot may edit.
+
+    Roles in *safe_roles* and integration roles are left alone. Edits run
+    in parallel, at most LOCKDOWN_CONCURRENCY at a time so a large guild
+    does not run into the role-edit rate limit all at once. Returns the
+    number of roles edited and the number of edits that failed.
+    """
+
+    top = guild.me.top_role
+    roles = [
+        r
+        for r in guild.roles
+        if r < top
+        and not r.managed
+        and r.id not in safe_roles
+        and r.permissions.value & DANGEROUS_PERMISSIONS.value
+    ]
+    limit = asyncio.Semaphore(LOCKDOWN_CONCURRENCY)
+
+    async def revoke(role: discord.Role):
+        async with limit:
+            value = role.permissions.value & ~DANGEROUS_PERMISSIONS.value
+            await role.edit(
+                permissions=discord.Permissions(value), reason="Anti-nuke lockdown"
+            )
+
+    results = await asyncio.gather(*map(revoke, roles), return_exceptions=True)
+    failed = sum(isinstance(r, Exception) for r in results)
+    return len(roles) - failed, failed
+
+
+class PunishmentExecutor:
+    """Worker pool that applies punishments off the event handlers.
+
+    :meth:`submit` only queues the job. While a punishment for an actor is
+    queued or running, further triggers by the same actor are dropped. A
+    worker starts the punishment and hands its log line to a per-guild
+    sender, which goes on concurrently. The sender packs every line that
+    piled up during one send into the next message, so a burst of
+    punishments costs a few log messages rather than one each, and the
+    log does not compete with the punishments for the rate limit. If the
+    guild has lockdown enabled, a lockdown is also started in the
+    background, at most once per LOCKDOWN_COOLDOWN seconds per guild.
+    """
+
+    def __init__(self, workers: int = PUNISH_WORKERS):
+        self.workers = workers
+        self.dropped = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._background: Set[asyncio.Task] = set()
+        self._inflight: Set[Tuple[int, int]] = set()
+        self._lockdowns: Dict[int, float] = {}
+        self._log_lines: Dict[int, List[str]] = {}
+        self._log_senders: Dict[int, asyncio.Task] = {}
+
+    def submit(
+        self,
+        member: discord.Member,
+        category: str,
+        punishment: str,
+        duration: Optional[int],
+    ) -> bool:
+        """Queue a punishment; False if one for this actor is pending."""
+
+        self._start()
+        key = (member.guild.id, member.id)
+        if key in self._inflight:
+            self.dropped += 1
+            return False
+        self._inflight.add(key)
+        self._queue.put_nowait((key, member, category, punishment, duration))
+        return True
+
+    async def join(self) -> None:
+        """Wait until every queued punishment and log line has been sent."""
+
+        if self._queue is not None:
+            await self._queue.join()
+        while self._log_senders:
+            await asyncio.gather(*self._log_senders.values())
+
+    @property
+    def pending(self) -> int:
+        return len(self._inflight)
+
+    def _start(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._inflight.clear()
+        self._log_lines.clear()
+        self._log_senders.clear()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def _work(self) -> None:
+        while True:
+            key, member, category, punishment, duration = await self._queue.get()
+            try:
+                self._log(
+                    member.guild, action_message(member, category, punishment, duration)
+                )
+                await punish(member, punishment, duration)
+                await self._maybe_lockdown(member.guild)
+            except Exception:
+                logging.exception("Anti-nuke punishment failed")
+            finally:
+                self._inflight.discard(key)
+                self._queue.task_done()
+
+    def _log(self, guild: discord.Guild, line: str) -> None:
+        self._log_lines.setdefault(guild.id, []).append(line)
+        if guild.id not in self._log_senders:
+            self._log_senders[guild.id] = asyncio.create_task(self._send_logs(guild))
+
+    async def _send_logs(self, guild: discord.Guild) -> None:
+        try:
+            while self._log_lines.get(guild.id):
+                lines = self._log_lines.pop(guild.id)
+                message = f"<@{OWNER_ID}>"
+                for line in lines:
+                    if len(message) + len(line) >= 2000:  # Discord's limit
+                        await send_log(guild, message)
+                        message = f"<@{OWNER_ID}>"
+                    message += f"\n{line}" if len(lines) > 1 else f" {line}"
+                await send_log(guild, message)
+        except Exception:
+            logging.exception("Anti-nuke log failed")
+        finally:
+            del self._log_senders[guild.id]
+
+    async def _maybe_lockdown(self, guild: discord.Guild) -> None:
+        policy = await db.anti_nuke_policy(guild.id)
+        if not policy.lockdown:
+            return
+        now = time.monotonic()
+        if now - self._lockdowns.get(guild.id, -LOCKDOWN_COOLDOWN) < LOCKDOWN_COOLDOWN:
+            return
+        self._lockdowns[guild.id] = now
+        task = asyncio.create_task(self._lockdown(guild, policy.safe_roles))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _lockdown(self, guild: discord.Guild, safe_roles) -> None:
+        edited, failed = await lockdown(guild, safe_roles)
+        line = f"Lockdown: revoked dangerous permissions from {edited} roles"
+        if failed:
+            line += f" ({failed} failed)"
+        self._log(guild, line)
+
+
+punishments = PunishmentExecutor()
 
 
 async def handle_event(
     guild: discord.Guild, user: Optional[discord.Member], category: str
 ):
 
-    setting = get_anti_nuke_setting(category, guild.id)
-    if not setting:
+    if user is None:
         return
-    enabled, threshold, punishment, duration = setting
-    if not enabled:
+    policy = await db.anti_nuke_policy(guild.id)
+    setting = policy.active(category)
+    if not setting or policy.is_safe(user):
         return
-    uid = user.id if user else None
-    if uid is None:
+    _, threshold, punishment, duration = setting
+    # hit() resets the window synchronously, so concurrent events for the
+    # same actor cannot punish twice
+    if action_windows.hit((guild.id, category, user.id), threshold):
+        punishments.submit(user, category, punishment, duration)
+
+
+async def on_message(message: discord.Message):
+    if message.author.bot or message.webhook_id or not message.guild:
         return
-    if uid in get_safe_users(guild.id):
+    mentions = len(message.raw_mentions) + message.mention_everyone
+    if not mentions:
         return
-    safe_roles = set(get_safe_roles(guild.id))
-    if any(r.id in safe_roles for r in user.roles):
+    policy = await db.anti_nuke_policy(message.guild.id)
+    single = policy.active("anti_mention")
+    storm = policy.active("mention_storm")
+    if not (single or storm) or policy.is_safe(message.author):
         return
-    hist = action_history.setdefault(category, {}).setdefault(uid, [])
-    now = discord.utils.utcnow().timestamp()
-    hist = [t for t in hist if now - t <= ACTION_WINDOW]
-    hist.append(now)
-    action_history[category][uid] = hist
-    if len(hist) >= threshold:
-        await punish(user, punishment, duration)
-        await log_action(user, category, punishment, duration)
-        action_history[category][uid] = []
+    if single and mentions >= single.threshold:
+        punishments.submit(
+            message.author, "anti_mention", single.punishment, single.duration
+        )
+    if storm:
+        raiders = mention_storms.hit(
+            message.guild.id, message.author.id, mentions, storm.threshold
+        )
+        for uid in raiders:
+            member = message.guild.get_member(uid)
+            if member and not policy.is_safe(member):
+                punishments.submit(
+                    member, "mention_storm", storm.punishment, storm.duration
+                )
 
 
-async def on_message(message: discord.Message):
-    if message.author.bot or message.webhook_id or not message.guild:
+# Audit log entries arrive over the gateway (``on_audit_log_entry_create``)
+# and are the primary source: one event per action, already attributed to
+# the moderator who did it. The plain gateway events below only fall back to
+# a REST ``audit_logs`` lookup when the guild protects that category and no
+# matching entry arrived within AUDIT_GRACE seconds (missing
+# intent/permission, dropped event, ...).
+AUDIT_GRACE = 5  # seconds
+AUDIT_STREAM_FRESH = 3600  # seconds since the last gateway entry a stream counts as live
+AUDIT_FALLBACK_LIMIT = 100  # one page
+RECENT_ENTRIES = 2048
+
+AUDIT_CATEGORIES = {
+    action: category for category, action in CATEGORIES.items() if action
+}
+
+EntryKey = Tuple[int, discord.AuditLogAction, Optional[int]]
+
+# (guild_id, action, target_id) -> entry id, oldest first
+recent_entries: "OrderedDict[EntryKey, int]" = OrderedDict()
+handled_entries: "OrderedDict[int, None]" = OrderedDict()
+streaming_guilds: Dict[int, float] = {}  # guild_id -> last gateway entry
+snapshot_task: Optional[asyncio.Task] = None
+fallback_fetches: Dict[Tuple[int, discord.AuditLogAction], asyncio.Task] = {}
+
+
+def _entry_key(entry: discord.AuditLogEntry) -> EntryKey:
+    if entry.action is discord.AuditLogAction.webhook_create:
+        # webhooks_update only tells us the channel the webhook was made in
+        channel = getattr(entry.after, "channel", None)
+        return entry.guild.id, entry.action, getattr(channel, "id", None)
+    return entry.guild.id, entry.action, getattr(entry.target, "id", None)
+
+
+def _remember(entry: discord.AuditLogEntry) -> bool:
+    """Mark *entry* as seen; returns False if it was handled already."""
+
+    if entry.id in handled_entries:
+        return False
+    handled_entries[entry.id] = None
+    key = _entry_key(entry)
+    recent_entries[key] = entry.id
+    recent_entries.move_to_end(key)
+    while len(handled_entries) > RECENT_ENTRIES:
+        handled_entries.popitem(last=False)
+    while len(recent_entries) > RECENT_ENTRIES:
+        recent_entries.popitem(last=False)
+    return True
+
+
+async def on_audit_log_entry_create(entry: discord.AuditLogEntry):
+    streaming_guilds[entry.guild.id] = time.monotonic()
+    await handle_entry(entry)
+
+
+async def handle_entry(entry: discord.AuditLogEntry):
+    category = AUDIT_CATEGORIES.get(entry.action)
+    if category is None or not _remember(entry):
+        return
+    if entry.user_id is None:
+        return
+    member = entry.guild.get_member(entry.user_id)
+    if member:
+        await handle_event(entry.guild, member, category)
+
+
+async def expect_entry(
+    guild: discord.Guild,
+    action: discord.AuditLogAction,
+    target_id: Optional[int],
+    always: bool = True,
+):
+    """Fall back to REST if the audit entry for a gateway event never came.
+
+    The fallback handles every recent entry of *action* that was missed,
+    not just the one for *target_id*. Nothing happens unless the guild has
+    the action's category enabled. ``always=False`` is for events that do
+    not imply an audit entry (a member leaving vs. being kicked): those only
+    fall back while the guild has not delivered an audit log event over the
+    gateway for AUDIT_STREAM_FRESH seconds.
+    """
+
+    key = (guild.id, action, target_id)
+    if key in recent_entries:
+        return
+    policy = await db.anti_nuke_policy(guild.id)
+    if not policy.active(AUDIT_CATEGORIES[action]):
+        return
+    if not always and _streaming(guild.id):
         return
-    setting = get_anti_nuke_setting("anti_mention", message.guild.id)
-    if not setting:
+    await asyncio.sleep(AUDIT_GRACE)
+    if key in recent_entries:
         return
-    enabled, threshold, punishment, duration = setting
-    if not enabled:
+    if not always and _streaming(guild.id):
         return
-    mention_count = len(message.mentions)
-    mention_count += message.content.count("@here")
-    mention_count += message.content.count("@everyone")
-    if mention_count >= threshold:
-        await punish(message.author, punishment, duration)
-        await log_action(message.author, "anti_mention", punishment, duration)
+    # concurrent misses (a burst with the event stream down) share one fetch
+    fetch = fallback_fetches.get((guild.id, action))
+    if fetch is None:
+        fetch = asyncio.create_task(_fetch_missing(guild, action))
+        fallback_fetches[(guild.id, action)] = fetch
+        fetch.add_done_callback(
+            lambda _: fallback_fetches.pop((guild.id, action), None)
+        )
+    await fetch
+
+
+def _streaming(guild_id: int) -> bool:
+    seen = streaming_guilds.get(guild_id)
+    return seen is not None and time.monotonic() - seen < AUDIT_STREAM_FRESH
+
+
+async def _fetch_missing(guild: discord.Guild, action: discord.AuditLogAction):
+    try:
+        async for e in guild.audit_logs(limit=AUDIT_FALLBACK_LIMIT, action=action):
+            if (discord.utils.utcnow() - e.created_at).total_seconds() > ACTION_WINDOW:
+                break
+            await handle_entry(e)  # no-op for entries already handled
+    except discord.HTTPException:
+        pass
 
 
 async def on_channel_delete(channel: discord.abc.GuildChannel):
-    guild = channel.guild
-    entry = None
-    async for e in guild.audit_logs(
-        limit=1, action=discord.AuditLogAction.channel_delete
-    ):
-        entry = e
-        break
-    if (
-        entry
-        and (discord.utils.utcnow() - entry.created_at).total_seconds() < ACTION_WINDOW
-    ):
-        member = guild.get_member(entry.user.id)
-        if member:
-            await handle_event(guild, member, "delete_channels")
+    await expect_entry(channel.guild, discord.AuditLogAction.channel_delete, channel.id)
 
 
 async def on_role_delete(role: discord.Role):
-    guild = role.guild
-    entry = None
-    async for e in guild.audit_logs(limit=1, action=discord.AuditLogAction.role_delete):
-        entry = e
-        break
-    if (
-        entry
-        and (discord.utils.utcnow() - entry.created_at).total_seconds() < ACTION_WINDOW
-    ):
-        member = guild.get_member(entry.user.id)
-        if member:
-            await handle_event(guild, member, "delete_roles")
+    await expect_entry(role.guild, discord.AuditLogAction.role_delete, role.id)
 
 
 async def on_role_create(role: discord.Role):
-    guild = role.guild
-    entry = None
-    async for e in guild.audit_logs(limit=1, action=discord.AuditLogAction.role_create):
-        entry = e
-        break
-    if (
-        entry
-        and (discord.utils.utcnow() - entry.created_at).total_seconds() < ACTION_WINDOW
-    ):
-        member = guild.get_member(entry.user.id)
-        if member:
-            await handle_event(guild, member, "add_roles")
+    await expect_entry(role.guild, discord.AuditLogAction.role_create, role.id)
 
 
 async def on_member_remove(member: discord.Member):
-    guild = member.guild
-    async for e in guild.audit_logs(limit=1, action=discord.AuditLogAction.kick):
-        if (
-            e.target.id == member.id
-            and (discord.utils.utcnow() - e.created_at).total_seconds() < ACTION_WINDOW
-        ):
-            actor = guild.get_member(e.user.id)
-            if actor:
-                await handle_event(guild, actor, "kick")
-            return
+    await expect_entry(
+        member.guild, discord.AuditLogAction.kick, member.id, always=False
+    )
 
 
 async def on_member_ban(guild: discord.Guild, user: discord.User):
-    async for e in guild.audit_logs(limit=1, action=discord.AuditLogAction.ban):
-        if (
-            e.target.id == user.id
-            and (discord.utils.utcnow() - e.created_at).total_seconds() < ACTION_WINDOW
-        ):
-            actor = guild.get_member(e.user.id)
-            if actor:
-                await handle_event(guild, actor, "ban")
-            return
+    await expect_entry(guild, discord.AuditLogAction.ban, user.id)
 
 
 async def on_webhooks_update(channel: discord.abc.GuildChannel):
-    guild = channel.guild
-    async for e in guild.audit_logs(
-        limit=1, action=discord.AuditLogAction.webhook_create
-    ):
-        if (discord.utils.utcnow() - e.created_at).total_seconds() < ACTION_WINDOW:
-            member = guild.get_member(e.user.id)
-            if member:
-                await handle_event(guild, member, "webhook")
-            break
+    await expect_entry(
+        channel.guild, discord.AuditLogAction.webhook_create, channel.id, always=False
+    )
+
+
+def stats() -> Dict[str, Dict[str, int]]:
+    """Memory footprint of anti_nuke's in-process state."""
+
+    return {
+        "action_windows": action_windows.stats(),
+        "mention_storms": mention_storms.stats(),
+        "punishments": {
+            "pending": punishments.pending,
+            "dropped": punishments.dropped,
+        },
+        "audit_entries": {
+            "handled": len(handled_entries),
+            "recent": len(recent_entries),
+            "fallback_fetches": len(fallback_fetches),
+        },
+    }
 
 
 def setup(bot: commands.Bot):
+    async def start_snapshots():
+        global snapshot_task
+        if snapshot_task is None or snapshot_task.done():
+            snapshot_task = asyncio.create_task(snapshot_loop(bot))
+
+    bot.add_listener(start_snapshots, name="on_ready")
+    bot.add_listener(on_audit_log_entry_create, name="on_audit_log_entry_create")
     bot.add_listener(on_channel_delete, name="on_guild_channel_delete")
     bot.add_listener(on_role_delete, name="on_guild_role_delete")
     bot.add_listener(on_role_create, name="on_guild_role_create")
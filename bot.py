@@ -19,6 +19,7 @@ intents = discord.Intents.default()
 intents.message_content = True
 intents.guilds = True
 intents.members = True
+intents.moderation = True  # audit log events for anti_nuke
 
 bot = commands.Bot(
     command_prefix=["!", "<@1253388384911491264>", "@Cyber-chan"], intents=intents
@@ -36,7 +37,9 @@ setup_explain(bot)
 events.setup(bot, lowercase_locked)
 anti_nuke.setup(bot)
 
-with open("code.txt", "r") as file:
-    TOKEN = file.read().strip()
+# /pokerodds worker processes import this module too; they must not connect
+if __name__ == "__main__":
+    with open("code.txt", "r") as file:
+        TOKEN = file.read().strip()
 
-bot.run(TOKEN)
+    bot.run(TOKEN)
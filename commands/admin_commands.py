@@ -1,4 +1,3 @@
-import asyncio
 import inspect
 import io
 import tempfile
@@ -13,64 +12,43 @@ from typing import Optional
 
 import db.DBHelper as DBHelperModule
 import db.initializeDB as initdb
-from db.DBHelper import (
-    register_user,
-    _fetchone,
-    add_shop_role,
-    get_shop_roles,
-    get_money,
-    set_money,
-    safe_add_coins,
-    get_last_weekly,
-    set_last_weekly,
-    get_last_claim,
-    set_last_claim,
-    get_custom_role,
-    set_custom_role,
-    delete_custom_role,
-    create_giveaway,
-    set_welcome_channel,
-    set_leave_channel,
-    get_welcome_channel,
-    get_leave_channel,
-    set_welcome_message,
-    set_leave_message,
-    get_welcome_message,
-    get_leave_message,
-    set_booster_channel,
-    set_booster_message,
-    get_booster_channel,
-    get_booster_message,
-    set_log_channel,
-    get_log_channel,
-    get_role,
-    get_roles,
-    get_filtered_words,
-    get_trigger_responses,
-    get_anti_nuke_setting,
-    get_safe_users,
-    get_safe_roles,
-    get_anti_nuke_log_channel,
+from db.connection import connections
+from db.async_db import db
+from utils import (
+    has_role,
+    has_command_permission,
+    get_channel_webhook,
+    parse_duration,
+    user_lock,
 )
-from utils import has_role, has_command_permission, get_channel_webhook, parse_duration
 from permissions import COMMAND_PERMISSION_RULES, describe_permission
+from scheduler import scheduler
 from .hybrid_helpers import add_prefix_command
 
 
 async def run_command_tests(bot: commands.Bot) -> dict[str, str]:
     results: dict[str, str] = {}
+    await db.flush_buffers()
     with tempfile.NamedTemporaryFile() as tmp:
         original_db = DBHelperModule.DB_PATH
         original_init_db = initdb.DB_PATH
         DBHelperModule.DB_PATH = tmp.name
         initdb.DB_PATH = tmp.name
         initdb.init_db()
+        DBHelperModule.reset_caches()
         try:
 
             class DummyRole:
                 def __init__(self, name: str = "role", role_id: int = 0):
                     self.id = role_id
                     self.name = name
+                    self.permissions = discord.Permissions.none()
+                    self.colour = discord.Colour.default()
+                    self.hoist = self.mentionable = self.managed = False
+                    self.position = 0
+
+                def is_default(self) -> bool:
+                    return False
 
                 @property
                 def mention(self) -> str:  # pragma: no cover - simple placeholder
@@ -93,6 +71,7 @@ async def run_command_tests(bot: commands.Bot) -> dict[str, str]:
                     self.owner_id = owner_id
                     self.roles: list[DummyRole] = []
                     self.members: list[DummyUser] = []  # type: ignore[name-defined]
+                    self.channels: list = []
 
                 def get_role(self, role_id: int):
                     for role in self.roles:
@@ -263,15 +242,35 @@ async def run_command_tests(bot: commands.Bot) -> dict[str, str]:
                 except Exception as e:
                     results[cmd.name] = f"Error: {e}"
         finally:
+            connections.close(tmp.name)
             DBHelperModule.DB_PATH = original_db
             initdb.DB_PATH = original_init_db
+            DBHelperModule.reset_caches()
     return results
 
 
-active_prison_timers: dict[tuple[int, int], asyncio.Task] = {}
+def prison_job_key(guild_id: int, user_id: int) -> str:
+    return f"prison:{guild_id}:{user_id}"
 
 
 def setup(bot: commands.Bot):
+    async def prison_release_job(job: dict):
+        guild = bot.get_guild(job["guild_id"])
+        if guild is None:
+            return
+        role = guild.get_role(job["role_id"])
+        member = guild.get_member(job["user_id"])
+        if role is None or member is None:
+            return
+        await member.add_roles(role)
+        channel = bot.get_channel(job["channel_id"])
+        if channel is not None:
+            await channel.send(
+                f"\U0001f54a\ufe0f {member.mention} has served their time and is now free."
+            )
+
+    scheduler.register("prison_release", prison_release_job)
+
     @bot.tree.command(name="test", description="Test all commands")
     async def test_commands(inter: discord.Interaction):
         if not has_command_permission(inter.user, "test", "admin"):
@@ -305,9 +304,8 @@ def setup(bot: commands.Bot):
             )
             return
         uid = str(user.id)
-        register_user(uid, user.display_name)
-        _execute = __import__("db.DBHelper", fromlist=["_execute"])._execute
-        _execute("UPDATE users SET stat_points = ? WHERE user_id = ?", (amount, uid))
+        await db.register_user(uid, user.display_name)
+        await db.set_stat_points(uid, amount)
         await interaction.response.send_message(
             f"\u2705 Set {user.display_name}'s stat points to {amount}.", ephemeral=True
         )
@@ -323,9 +321,8 @@ def setup(bot: commands.Bot):
                 "You don't have permission to use this command.", ephemeral=True
             )
             return
-        from db.DBHelper import get_lastdate
-
-        await interaction.response.send_message(get_lastdate(user.id), ephemeral=True)
+        last = await db.get_lastdate(user.id)
+        await interaction.response.send_message(last, ephemeral=True)
 
     @bot.tree.command(name="setstat", description="Set a user's stat (Admin only)")
     @app_commands.describe(
@@ -355,9 +352,8 @@ def setup(bot: commands.Bot):
             )
             return
         uid = str(user.id)
-        register_user(uid, user.display_name)
-        _execute = __import__("db.DBHelper", fromlist=["_execute"])._execute
-        _execute(f"UPDATE users SET {stat} = ? WHERE user_id = ?", (amount, uid))
+        await db.register_user(uid, user.display_name)
+        await db.set_stat(uid, stat, amount)
         await interaction.response.send_message(
             f"\u2705 Set {user.display_name}'s **{stat}** to **{amount}**.",
             ephemeral=True,
@@ -408,7 +404,7 @@ def setup(bot: commands.Bot):
                     ephemeral=True,
                 )
                 return
-        add_shop_role(role.id, price)
+        await db.add_shop_role(role.id, price)
         await inter.response.send_message(
             f"\u2705 Rolle **{role.name}** registriert (Preis {price} Coins).",
             ephemeral=True,
@@ -416,7 +412,7 @@ def setup(bot: commands.Bot):
 
     @bot.tree.command(name="shop", description="Show all purchasable roles")
     async def shop(inter: discord.Interaction):
-        entries = get_shop_roles()
+        entries = await db.get_shop_roles()
         if not entries:
             await inter.response.send_message("The shop is empty.", ephemeral=True)
             return
@@ -432,26 +428,24 @@ def setup(bot: commands.Bot):
 
     @bot.tree.command(name="buyrole", description="Buy a role from the shop")
     async def buyrole(inter: discord.Interaction, role: discord.Role):
-        row = _fetchone("SELECT price FROM shop_roles WHERE role_id = ?", (role.id,))
-        if not row:
+        price = await db.get_shop_role_price(role.id)
+        if price is None:
             await inter.response.send_message(
                 "This role does not exist in the shop.", ephemeral=True
             )
             return
-        price = row[0]
         uid = str(inter.user.id)
-        register_user(uid, inter.user.display_name)
-        balance = get_money(uid)
-        if balance < price:
+        await db.register_user(uid, inter.user.display_name)
+        async with user_lock(uid):
+            if await db.add_coins(uid, -price) is None:
+                await inter.response.send_message(
+                    "\u274c Not enough coins.", ephemeral=True
+                )
+                return
+            await inter.user.add_roles(role, reason="Shop purchase")
             await inter.response.send_message(
-                "\u274c Not enough coins.", ephemeral=True
+                f"\U0001f389 Congratulation! You bought **{role.name}** for {price} clubhall coins."
             )
-            return
-        set_money(uid, balance - price)
-        await inter.user.add_roles(role, reason="Shop purchase")
-        await inter.response.send_message(
-            f"\U0001f389 Congratulation! You bought **{role.name}** for {price} clubhall coins."
-        )
 
     @bot.tree.command(name="chatrevive", description="blush (bcs of another user)")
     async def chatrevive(interaction: discord.Interaction, question: str = None):
@@ -531,18 +525,16 @@ def setup(bot: commands.Bot):
             await interaction.response.send_message("No permission.", ephemeral=True)
             return
         gooyb = interaction.user.name == "goodyb"
-        role_id = get_role(interaction.guild.id, "prisoner")
+        role_id = await db.get_role(interaction.guild.id, "prisoner")
         role = interaction.guild.get_role(role_id) if role_id else None
         if role is None:
             await interaction.response.send_message(
                 "\u274c Prisoner role not configured.", ephemeral=True
             )
             return
-        key = (interaction.guild.id, user.id)
+        key = prison_job_key(interaction.guild.id, user.id)
         if time == "cancel":
-            task = active_prison_timers.pop(key, None)
-            if task and not task.done():
-                task.cancel()
+            if await scheduler.cancel(key):
                 if role not in user.roles:
                     await user.add_roles(role)
                 await interaction.response.send_message(
@@ -555,9 +547,7 @@ def setup(bot: commands.Bot):
                 )
             return
         if role not in user.roles:
-            task = active_prison_timers.pop(key, None)
-            if task and not task.done():
-                task.cancel()
+            await scheduler.cancel(key)
             await user.add_roles(role)
             await interaction.response.send_message(
                 f"\U0001f513 {user.mention} has been freed from prison.",
@@ -574,20 +564,17 @@ def setup(bot: commands.Bot):
                     ephemeral=True,
                 )
                 return
-
-            async def release_later():
-                try:
-                    await asyncio.sleep(seconds)
-                    await user.add_roles(role)
-                    await interaction.followup.send(
-                        f"\U0001f54a\ufe0f {user.mention} has served their time and is now free.",
-                        ephemeral=False,
-                    )
-                except asyncio.CancelledError:
-                    pass
-
-            task = asyncio.create_task(release_later())
-            active_prison_timers[key] = task
+            await scheduler.schedule(
+                key,
+                "prison_release",
+                datetime.now(timezone.utc) + timedelta(seconds=seconds),
+                {
+                    "guild_id": interaction.guild.id,
+                    "user_id": user.id,
+                    "role_id": role.id,
+                    "channel_id": interaction.channel_id,
+                },
+            )
             msg += f" They will be freed in {time}."
         await interaction.response.send_message(msg, ephemeral=False)
 
@@ -602,7 +589,7 @@ def setup(bot: commands.Bot):
                 "You dont have permission to use this command.", ephemeral=True
             )
             return
-        role_id = get_role(interaction.guild.id, "viltrumite")
+        role_id = await db.get_role(interaction.guild.id, "viltrumite")
         role = (
             interaction.guild.get_role(role_id)
             if role_id
@@ -647,11 +634,7 @@ def setup(bot: commands.Bot):
         try:
             message = await channel.fetch_message(target_message_id)
             await message.add_reaction(emoji)
-            _execute = __import__("db.DBHelper", fromlist=["_execute"])._execute
-            _execute(
-                "INSERT OR REPLACE INTO reaction_roles (message_id, emoji, role_id) VALUES (?, ?, ?)",
-                (str(target_message_id), emoji, str(role.id)),
-            )
+            await db.add_reaction_role(target_message_id, emoji, role.id)
             await interaction.response.send_message(
                 f"\u2705 Added emoji {emoji} for role {role.name}.", ephemeral=True
             )
@@ -719,29 +702,55 @@ def setup(bot: commands.Bot):
         giveaway_msg = await interaction.original_response()
         await giveaway_msg.add_reaction("\U0001f389")
         end_time = datetime.now(timezone.utc) + timedelta(minutes=duration)
-        create_giveaway(
+        await db.create_giveaway(
             str(giveaway_msg.id), str(giveaway_msg.channel.id), end_time, prize, winners
         )
-        from events import end_giveaway, active_giveaway_tasks
+        from events import schedule_giveaway
 
-        async def end_later():
-            try:
-                await asyncio.sleep(duration * 60)
-                await end_giveaway(
-                    bot, giveaway_msg.channel.id, giveaway_msg.id, prize, winners
-                )
-            except asyncio.CancelledError:
-                pass
+        await schedule_giveaway(
+            giveaway_msg.channel.id, giveaway_msg.id, end_time, prize, winners
+        )
+
+    @bot.tree.command(
+        name="reroll", description="Draw new winners for a giveaway (Moderators only)"
+    )
+    @app_commands.describe(
+        message_id="ID of the giveaway message", winners="Number of winners"
+    )
+    async def reroll(interaction: discord.Interaction, message_id: str, winners: int = 1):
+        if not has_command_permission(interaction.user, "reroll", "mod"):
+            await interaction.response.send_message(
+                "Only the moderation role can use this command", ephemeral=True
+            )
+            return
+        row = await db.get_giveaway(message_id) if message_id.isdigit() else None
+        if row is None:
+            await interaction.response.send_message(
+                "\u274c No giveaway with that message ID.", ephemeral=True
+            )
+            return
+        channel_id, prize, _, finished = row
+        if not finished:
+            await interaction.response.send_message(
+                "\u274c That giveaway is still running.", ephemeral=True
+            )
+            return
+        from events import announce_giveaway_winners
 
-        task = asyncio.create_task(end_later())
-        active_giveaway_tasks[giveaway_msg.id] = task
+        announced = await announce_giveaway_winners(
+            bot, int(channel_id), int(message_id), prize, max(1, winners)
+        )
+        await interaction.response.send_message(
+            "\U0001f3b2 Rerolled." if announced else "\u274c Giveaway message not found.",
+            ephemeral=True,
+        )
 
     @bot.tree.command(name="lock", description="Lock this channel (Admin only)")
     async def lock_channel(interaction: discord.Interaction):
         if not has_command_permission(interaction.user, "lock", "admin"):
             await interaction.response.send_message("No permission.", ephemeral=True)
             return
-        lock_id = get_role(interaction.guild.id, "channel_lock")
+        lock_id = await db.get_role(interaction.guild.id, "channel_lock")
         role = interaction.guild.get_role(lock_id) if lock_id else None
         if role is None:
             await interaction.response.send_message("Role not found.", ephemeral=True)
@@ -756,7 +765,7 @@ def setup(bot: commands.Bot):
         if not has_command_permission(interaction.user, "unlock", "admin"):
             await interaction.response.send_message("No permission.", ephemeral=True)
             return
-        lock_id = get_role(interaction.guild.id, "channel_lock")
+        lock_id = await db.get_role(interaction.guild.id, "channel_lock")
         role = interaction.guild.get_role(lock_id) if lock_id else None
         if role is None:
             await interaction.response.send_message("Role not found.", ephemeral=True)
@@ -772,9 +781,7 @@ def setup(bot: commands.Bot):
         if not has_command_permission(interaction.user, "addfilterword", "mod"):
             await interaction.response.send_message("No permission.", ephemeral=True)
             return
-        from db.DBHelper import add_filtered_word
-
-        add_filtered_word(interaction.guild.id, word)
+        await db.add_filtered_word(interaction.guild.id, word)
         await interaction.response.send_message(
             f"\u2705 Added `{word}` to the filter.", ephemeral=True
         )
@@ -787,36 +794,41 @@ def setup(bot: commands.Bot):
         if not has_command_permission(interaction.user, "removefilterword", "mod"):
             await interaction.response.send_message("No permission.", ephemeral=True)
             return
-        from db.DBHelper import remove_filtered_word
-
-        remove_filtered_word(interaction.guild.id, word)
+        await db.remove_filtered_word(interaction.guild.id, word)
         await interaction.response.send_message(
             f"\u2705 Removed `{word}` from the filter.", ephemeral=True
         )
 
     @bot.tree.command(name="filterwords", description="Show all filtered words")
     async def filterwords(interaction: discord.Interaction):
-        from db.DBHelper import get_filtered_words
-
-        words = get_filtered_words(interaction.guild.id)
+        words = await db.get_filtered_words(interaction.guild.id)
         if not words:
             await interaction.response.send_message("No filtered words.")
             return
         await interaction.response.send_message(", ".join(sorted(words)))
 
     @bot.tree.command(name="addtrigger", description="Add a trigger response")
-    @app_commands.describe(trigger="Trigger word", response="Response message")
-    async def addtrigger(interaction: discord.Interaction, trigger: str, response: str):
+    @app_commands.describe(
+        trigger="Trigger word",
+        response="Response message",
+        mode="substring (default), word (whole words only) or regex",
+    )
+    async def addtrigger(
+        interaction: discord.Interaction,
+        trigger: str,
+        response: str,
+        mode: str = "substring",
+    ):
         if not has_command_permission(interaction.user, "addtrigger", "mod"):
             await interaction.response.send_message("No permission.", ephemeral=True)
             return
-        from db.DBHelper import add_trigger_response
-        from events import trigger_responses
-
-        add_trigger_response(trigger, response, interaction.guild.id)
-        trigger_responses.setdefault(interaction.guild.id, {})[
-            trigger.lower()
-        ] = response
+        try:
+            await db.add_trigger_response(
+                trigger, response, interaction.guild.id, mode
+            )
+        except ValueError as e:
+            await interaction.response.send_message(f"\u274c {e}", ephemeral=True)
+            return
         await interaction.response.send_message(
             f"\u2705 Added trigger `{trigger}`.", ephemeral=True
         )
@@ -827,12 +839,8 @@ def setup(bot: commands.Bot):
         if not has_command_permission(interaction.user, "removetrigger", "mod"):
             await interaction.response.send_message("No permission.", ephemeral=True)
             return
-        from db.DBHelper import remove_trigger_response
-        from events import trigger_responses
-
-        removed = remove_trigger_response(trigger, interaction.guild.id)
+        removed = await db.remove_trigger_response(trigger, interaction.guild.id)
         if removed:
-            trigger_responses.get(interaction.guild.id, {}).pop(trigger.lower(), None)
             await interaction.response.send_message(
                 f"\u2705 Removed trigger `{trigger}`.", ephemeral=True
             )
@@ -843,9 +851,7 @@ def setup(bot: commands.Bot):
 
     @bot.tree.command(name="triggers", description="Show all trigger responses")
     async def triggers(interaction: discord.Interaction):
-        from db.DBHelper import get_trigger_responses
-
-        data = get_trigger_responses(interaction.guild.id)
+        data = await db.get_trigger_responses(interaction.guild.id)
         if not data:
             await interaction.response.send_message("No trigger responses.")
             return
@@ -861,7 +867,7 @@ def setup(bot: commands.Bot):
         ):
             await interaction.response.send_message("No permission.", ephemeral=True)
             return
-        set_welcome_channel(interaction.guild.id, channel.id)
+        await db.set_welcome_channel(interaction.guild.id, channel.id)
         await interaction.response.send_message(
             f"\u2705 Welcome channel set to {channel.mention}.", ephemeral=True
         )
@@ -876,7 +882,7 @@ def setup(bot: commands.Bot):
         ):
             await interaction.response.send_message("No permission.", ephemeral=True)
             return
-        set_leave_channel(interaction.guild.id, channel.id)
+        await db.set_leave_channel(interaction.guild.id, channel.id)
         await interaction.response.send_message(
             f"\u2705 Leave channel set to {channel.mention}.", ephemeral=True
         )
@@ -889,7 +895,7 @@ def setup(bot: commands.Bot):
         if not has_command_permission(interaction.user, "setwelcomemsg", "admin"):
             await interaction.response.send_message("No permission.", ephemeral=True)
             return
-        set_welcome_message(interaction.guild.id, message)
+        await db.set_welcome_message(interaction.guild.id, message)
         await interaction.response.send_message(
             "\u2705 Welcome message updated.", ephemeral=True
         )
@@ -902,7 +908,7 @@ def setup(bot: commands.Bot):
         if not has_command_permission(interaction.user, "setleavemsg", "admin"):
             await interaction.response.send_message("No permission.", ephemeral=True)
             return
-        set_leave_message(interaction.guild.id, message)
+        await db.set_leave_message(interaction.guild.id, message)
         await interaction.response.send_message(
             "\u2705 Leave message updated.", ephemeral=True
         )
@@ -915,7 +921,7 @@ def setup(bot: commands.Bot):
         if not has_command_permission(interaction.user, "setboostchannel", "admin"):
             await interaction.response.send_message("No permission.", ephemeral=True)
             return
-        set_booster_channel(interaction.guild.id, channel.id)
+        await db.set_booster_channel(interaction.guild.id, channel.id)
         await interaction.response.send_message(
             f"\u2705 Booster channel set to {channel.mention}.", ephemeral=True
         )
@@ -928,7 +934,7 @@ def setup(bot: commands.Bot):
         if not has_command_permission(interaction.user, "setboostmsg", "admin"):
             await interaction.response.send_message("No permission.", ephemeral=True)
             return
-        set_booster_message(interaction.guild.id, message)
+        await db.set_booster_message(interaction.guild.id, message)
         await interaction.response.send_message(
             "\u2705 Booster message updated.", ephemeral=True
         )
@@ -941,7 +947,7 @@ def setup(bot: commands.Bot):
         if not has_command_permission(interaction.user, "setlogchannel", "admin"):
             await interaction.response.send_message("No permission.", ephemeral=True)
             return
-        set_log_channel(interaction.guild.id, channel.id)
+        await db.set_log_channel(interaction.guild.id, channel.id)
         await interaction.response.send_message(
             f"\u2705 Log channel set to {channel.mention}.", ephemeral=True
         )
@@ -957,15 +963,16 @@ def setup(bot: commands.Bot):
         def fmt_channel(cid: Optional[int]) -> str:
             return f"<#{cid}>" if cid else "Not set"
 
-        lines.append(f"Welcome channel: {fmt_channel(get_welcome_channel(gid))}")
-        lines.append(f"Leave channel: {fmt_channel(get_leave_channel(gid))}")
-        lines.append(f"Booster channel: {fmt_channel(get_booster_channel(gid))}")
-        lines.append(f"Log channel: {fmt_channel(get_log_channel(gid))}")
-        lines.append(f"Welcome message: {get_welcome_message(gid) or 'Not set'}")
-        lines.append(f"Leave message: {get_leave_message(gid) or 'Not set'}")
-        lines.append(f"Booster message: {get_booster_message(gid) or 'Not set'}")
+        cfg = await db.guild_config(gid)
+        lines.append(f"Welcome channel: {fmt_channel(cfg.welcome_channel_id)}")
+        lines.append(f"Leave channel: {fmt_channel(cfg.leave_channel_id)}")
+        lines.append(f"Booster channel: {fmt_channel(cfg.booster_channel_id)}")
+        lines.append(f"Log channel: {fmt_channel(cfg.log_channel_id)}")
+        lines.append(f"Welcome message: {cfg.welcome_message or 'Not set'}")
+        lines.append(f"Leave message: {cfg.leave_message or 'Not set'}")
+        lines.append(f"Booster message: {cfg.booster_message or 'Not set'}")
 
-        role_map = get_roles(gid)
+        role_map = await db.get_roles(gid)
         if role_map:
             for name, rid in role_map.items():
                 lines.append(f"Role {name}: <@&{rid}>")
@@ -978,9 +985,9 @@ def setup(bot: commands.Bot):
                 f"Command {cmd}: {describe_permission(interaction.guild, cmd)}"
             )
 
-        filters = get_filtered_words(gid)
+        filters = await db.get_filtered_words(gid)
         lines.append("Filtered words: " + (", ".join(filters) if filters else "None"))
-        triggers = get_trigger_responses(gid)
+        triggers = await db.get_trigger_responses(gid)
         lines.append(
             "Triggers: " + (", ".join(triggers.keys()) if triggers else "None")
         )
@@ -992,10 +999,12 @@ def setup(bot: commands.Bot):
             "ban",
             "delete_channels",
             "anti_mention",
+            "mention_storm",
             "webhook",
         ]
+        policy = await db.anti_nuke_policy(gid)
         for cat in categories:
-            setting = get_anti_nuke_setting(cat, gid)
+            setting = policy.settings.get(cat)
             if setting:
                 en, th, p, dur = setting
                 desc = "on" if en else "off"
@@ -1005,12 +1014,13 @@ def setup(bot: commands.Bot):
             else:
                 desc = "not set"
             lines.append(f"Anti-nuke {cat}: {desc}")
-        users = [f"<@{u}>" for u in get_safe_users(gid)] or ["None"]
-        safe_roles = [f"<@&{r}>" for r in get_safe_roles(gid)] or ["None"]
-        cid = get_anti_nuke_log_channel(gid)
+        users = [f"<@{u}>" for u in sorted(policy.safe_users)] or ["None"]
+        safe_roles = [f"<@&{r}>" for r in sorted(policy.safe_roles)] or ["None"]
+        cid = policy.log_channel_id
         lines.append(f"Anti-nuke safe users: {', '.join(users)}")
         lines.append(f"Anti-nuke safe roles: {', '.join(safe_roles)}")
         lines.append(f"Anti-nuke log channel: {fmt_channel(cid)}")
+        lines.append(f"Anti-nuke lockdown: {'on' if policy.lockdown else 'off'}")
 
         await interaction.response.send_message("\n".join(lines), ephemeral=True)
 
@@ -1084,6 +1094,7 @@ def setup(bot: commands.Bot):
         (addcolorreactionrole, "addcolorreactionrole"),
         (imitate, "imitate"),
         (giveaway, "giveaway"),
+        (reroll, "reroll"),
         (lock_channel, "lock"),
         (unlock_channel, "unlock"),
         (addfilterword, "addfilterword"),
@@ -1116,6 +1127,7 @@ def setup(bot: commands.Bot):
         addcolorreactionrole,
         imitate,
         giveaway,
+        reroll,
         lock_channel,
         unlock_channel,
         addfilterword,
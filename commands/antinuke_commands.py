@@ -1,3 +1,5 @@
+import time
+
 import discord
 from discord import app_commands
 from discord.ext import commands
@@ -5,18 +7,8 @@ from typing import Optional
 
 from utils import parse_duration, has_command_permission
 from .hybrid_helpers import add_prefix_command
-from db.DBHelper import (
-    set_anti_nuke_setting,
-    get_anti_nuke_setting,
-    add_safe_user,
-    remove_safe_user,
-    get_safe_users,
-    add_safe_role,
-    remove_safe_role,
-    get_safe_roles,
-    set_anti_nuke_log_channel,
-    get_anti_nuke_log_channel,
-)
+from db.async_db import db
+from snapshots import restore
 
 CATEGORIES = [
     "delete_roles",
@@ -25,6 +17,7 @@ CATEGORIES = [
     "ban",
     "delete_channels",
     "anti_mention",
+    "mention_storm",
     "webhook",
 ]
 
@@ -53,7 +46,7 @@ def setup(bot: commands.Bot):
             await interaction.response.send_message("Invalid category.", ephemeral=True)
             return
         dur_s = parse_duration(duration) if duration else None
-        set_anti_nuke_setting(
+        await db.set_anti_nuke_setting(
             category, int(enabled), threshold, punishment, dur_s, interaction.guild.id
         )
         await interaction.response.send_message("Saved.", ephemeral=True)
@@ -66,11 +59,11 @@ def setup(bot: commands.Bot):
             await interaction.response.send_message("No permission.", ephemeral=True)
             return
         guild_id = interaction.guild.id
-        if user.id in get_safe_users(guild_id):
-            remove_safe_user(guild_id, user.id)
+        if user.id in (await db.anti_nuke_policy(guild_id)).safe_users:
+            await db.remove_safe_user(guild_id, user.id)
             await interaction.response.send_message("User removed from safe list.", ephemeral=True)
         else:
-            add_safe_user(guild_id, user.id)
+            await db.add_safe_user(guild_id, user.id)
             await interaction.response.send_message("User added to safe list.", ephemeral=True)
 
     @bot.tree.command(name="antinukeignorerole", description="Toggle safe role")
@@ -81,11 +74,11 @@ def setup(bot: commands.Bot):
             await interaction.response.send_message("No permission.", ephemeral=True)
             return
         guild_id = interaction.guild.id
-        if role.id in get_safe_roles(guild_id):
-            remove_safe_role(guild_id, role.id)
+        if role.id in (await db.anti_nuke_policy(guild_id)).safe_roles:
+            await db.remove_safe_role(guild_id, role.id)
             await interaction.response.send_message("Role removed from safe list.", ephemeral=True)
         else:
-            add_safe_role(guild_id, role.id)
+            await db.add_safe_role(guild_id, role.id)
             await interaction.response.send_message("Role added to safe list.", ephemeral=True)
 
     @bot.tree.command(name="antinukelog", description="Set anti nuke log channel")
@@ -93,11 +86,40 @@ def setup(bot: commands.Bot):
         if not has_command_permission(interaction.user, "antinukelog", "admin"):
             await interaction.response.send_message("No permission.", ephemeral=True)
             return
-        set_anti_nuke_log_channel(interaction.guild.id, channel.id)
+        await db.set_anti_nuke_log_channel(interaction.guild.id, channel.id)
         await interaction.response.send_message(
             f"Log channel set to {channel.mention}", ephemeral=True
         )
 
+    @bot.tree.command(
+        name="antinukelockdown",
+        description="Toggle revoking dangerous permissions when anti nuke triggers",
+    )
+    async def antinukelockdown(interaction: discord.Interaction, enabled: bool):
+        if not has_command_permission(interaction.user, "antinukelockdown", "admin"):
+            await interaction.response.send_message("No permission.", ephemeral=True)
+            return
+        await db.set_anti_nuke_lockdown(interaction.guild.id, enabled)
+        await interaction.response.send_message(
+            f"Lockdown {'enabled' if enabled else 'disabled'}.", ephemeral=True
+        )
+
+    @bot.tree.command(
+        name="antinukerestore",
+        description="Recreate roles and channels deleted in the last minutes",
+    )
+    @app_commands.describe(minutes="Restore what was deleted in this many minutes")
+    async def antinukerestore(interaction: discord.Interaction, minutes: int = 60):
+        if not has_command_permission(interaction.user, "antinukerestore", "admin"):
+            await interaction.response.send_message("No permission.", ephemeral=True)
+            return
+        await interaction.response.defer(thinking=True, ephemeral=True)
+        report = await restore(interaction.guild, time.time() - minutes * 60)
+        text = f"Restored {report.roles} roles and {report.channels} channels."
+        if report.failed:
+            text += f" {report.failed} could not be restored."
+        await interaction.followup.send(text, ephemeral=True)
+
     @bot.tree.command(name="antinukesettings", description="Show anti nuke configuration")
     async def antinukesettings(interaction: discord.Interaction):
         if not has_command_permission(
@@ -107,8 +129,9 @@ def setup(bot: commands.Bot):
             return
         lines = []
         gid = interaction.guild.id
+        policy = await db.anti_nuke_policy(gid)
         for cat in CATEGORIES:
-            setting = get_anti_nuke_setting(cat, gid)
+            setting = policy.settings.get(cat)
             if setting:
                 en, th, p, dur = setting
                 desc = f"on" if en else "off"
@@ -119,18 +142,21 @@ def setup(bot: commands.Bot):
                 desc = "not set"
             lines.append(f"**{cat}**: {desc}")
 
-        users = [f"<@{u}>" for u in get_safe_users(gid)] or ["None"]
-        roles = [f"<@&{r}>" for r in get_safe_roles(gid)] or ["None"]
-        cid = get_anti_nuke_log_channel(gid)
+        users = [f"<@{u}>" for u in sorted(policy.safe_users)] or ["None"]
+        roles = [f"<@&{r}>" for r in sorted(policy.safe_roles)] or ["None"]
+        cid = policy.log_channel_id
         log_line = f"<#{cid}>" if cid else "None"
         lines.append(f"Safe users: {', '.join(users)}")
         lines.append(f"Safe roles: {', '.join(roles)}")
         lines.append(f"Log channel: {log_line}")
+        lines.append(f"Lockdown: {'on' if policy.lockdown else 'off'}")
         await interaction.response.send_message("\n".join(lines), ephemeral=True)
 
     add_prefix_command(bot, antinukeconfig)
     add_prefix_command(bot, antinukeignoreuser)
     add_prefix_command(bot, antinukeignorerole)
     add_prefix_command(bot, antinukelog)
+    add_prefix_command(bot, antinukelockdown)
+    add_prefix_command(bot, antinukerestore)
     add_prefix_command(bot, antinukesettings)
 
@@ -3,142 +3,33 @@ import asyncio
 import discord
 from discord import app_commands, ui
 from discord.ext import commands
-from datetime import datetime, timedelta
 from random import random, choice, shuffle
-from collections import Counter
-
-CARD_DECK: list[tuple[str, int]] = []
-_rank_codes = [
-    ("1", 11),  # Ace
-    ("2", 2),
-    ("3", 3),
-    ("4", 4),
-    ("5", 5),
-    ("6", 6),
-    ("7", 7),
-    ("8", 8),
-    ("9", 9),
-    ("A", 10),  # Ten
-    ("B", 10),  # Jack
-    ("D", 10),  # Queen
-    ("E", 10),  # King
-]
-for suit in "ABCD":  # spades, hearts, diamonds, clubs
-    for code, value in _rank_codes:
-        CARD_DECK.append((chr(int(f"1F0{suit}{code}", 16)), value))
-
-_rank_map = {
-    "1": 14,
-    "2": 2,
-    "3": 3,
-    "4": 4,
-    "5": 5,
-    "6": 6,
-    "7": 7,
-    "8": 8,
-    "9": 9,
-    "A": 10,
-    "B": 11,
-    "D": 12,
-    "E": 13,
-}
-_suit_map = {"A": "S", "B": "H", "C": "D", "D": "C"}
-
-
-def _parse_card(emoji: str) -> tuple[int, str]:
-    code = f"{ord(emoji):05X}"
-    return _rank_map[code[4]], _suit_map[code[3]]
-
-
-def _hand_name(rank_type: int) -> str:
-    names = [
-        "High Card",
-        "One Pair",
-        "Two Pair",
-        "Three of a Kind",
-        "Straight",
-        "Flush",
-        "Full House",
-        "Four of a Kind",
-        "Straight Flush",
-    ]
-    return names[rank_type]
-
-
-def _evaluate_hand(cards: list[tuple[int, str]]) -> tuple:
-    ranks = sorted((r for r, _ in cards), reverse=True)
-    counts = Counter(ranks)
-    suits = Counter(s for _, s in cards)
-    flush = next((s for s, c in suits.items() if c >= 5), None)
-    unique = sorted(set(ranks), reverse=True)
-    if 14 in unique:
-        unique.append(1)
-    straight_high = None
-    for i in range(len(unique) - 4):
-        seq = unique[i : i + 5]
-        if seq[0] - seq[4] == 4:
-            straight_high = seq[0]
-            break
-    if flush:
-        flush_cards = [r for r, s in cards if s == flush]
-        flush_cards.sort(reverse=True)
-        fu = sorted(set(flush_cards), reverse=True)
-        if 14 in fu:
-            fu.append(1)
-        for i in range(len(fu) - 4):
-            seq = fu[i : i + 5]
-            if seq[0] - seq[4] == 4:
-                return (8, seq[0])
-        return (5, flush_cards[:5])
-    if 4 in counts.values():
-        quad = max(r for r, c in counts.items() if c == 4)
-        kicker = max(r for r in ranks if r != quad)
-        return (7, quad, kicker)
-    if 3 in counts.values() and 2 in counts.values():
-        tri = max(r for r, c in counts.items() if c == 3)
-        pair = max(r for r, c in counts.items() if c == 2)
-        return (6, tri, pair)
-    if straight_high:
-        return (4, straight_high)
-    if 3 in counts.values():
-        tri = max(r for r, c in counts.items() if c == 3)
-        kick = [r for r in ranks if r != tri][:2]
-        return (3, tri, kick[0], kick[1])
-    pairs = sorted([r for r, c in counts.items() if c == 2], reverse=True)
-    if len(pairs) >= 2:
-        kicker = max(r for r in ranks if r not in pairs)
-        return (2, pairs[0], pairs[1], kicker)
-    if len(pairs) == 1:
-        pair = pairs[0]
-        kick = [r for r in ranks if r != pair][:3]
-        return (1, pair, kick[0], kick[1], kick[2])
-    return (0, ranks[:5])
-
 
 from config import (
     WEEKLY_REWARD,
+    WEEKLY_COOLDOWN_DAYS,
     DAILY_REWARD,
+    DAILY_COOLDOWN_HOURS,
     SUPERPOWER_COST,
     SUPERPOWER_COOLDOWN_HOURS,
+    GAMBLE_BANDS,
+    CASINO_WIN_CHANCE,
 )
-from db.DBHelper import (
-    register_user,
-    safe_add_coins,
-    get_money,
-    set_money,
-    get_top_users,
-    get_last_weekly,
-    set_last_weekly,
-    get_last_claim,
-    set_last_claim,
-    get_timestamp,
-    set_timestamp,
-    get_anime_title,
-    set_anime_title,
-)
-from utils import has_command_permission
+import poker
+import poker_odds
+from db.async_db import db
+from utils import has_command_permission, user_lock
 from .hybrid_helpers import add_prefix_command
 
+CARD_DECK: list[int] = list(poker.DECK)
+
+GAMBLE_MESSAGES = {
+    3: "💎 JACKPOT! 3x WIN!",
+    2: "🔥 Double win!",
+    1: "😐 You broke even.",
+    0: "💀 You lost everything...",
+}
+
 
 class RequestView(ui.View):
     def __init__(self, sender_id: int, receiver_id: int, amount: int):
@@ -154,16 +45,20 @@ class RequestView(ui.View):
                 "This request isn't for you.", ephemeral=True
             )
             return
-        sender_balance = get_money(str(self.sender_id))
-        receiver_balance = get_money(str(self.receiver_id))
-        if receiver_balance < self.amount:
-            await interaction.response.send_message(
-                "You don't have enough clubhall coins to accept this request.",
-                ephemeral=True,
-            )
-            return
-        set_money(str(self.receiver_id), receiver_balance - self.amount)
-        set_money(str(self.sender_id), sender_balance + self.amount)
+        async with user_lock(self.receiver_id):
+            if self.is_finished():
+                await interaction.response.send_message(
+                    "This request was already answered.", ephemeral=True
+                )
+                return
+            moved = await db.transfer(self.receiver_id, self.sender_id, self.amount)
+            if not moved:
+                await interaction.response.send_message(
+                    "You don't have enough clubhall coins to accept this request.",
+                    ephemeral=True,
+                )
+                return
+            self.stop()
         await interaction.response.edit_message(
             content=f"✅ Request accepted. {self.amount} clubhall coins sent!",
             view=None,
@@ -176,17 +71,20 @@ class RequestView(ui.View):
                 "This request isn't for you.", ephemeral=True
             )
             return
+        self.stop()
         await interaction.response.edit_message(
             content="❌ Request declined.", view=None
         )
 
 
 class DuelRequestView(ui.View):
-    def __init__(self, challenger_id: int, opponent_id: int, amount: int):
+    def __init__(self, challenger_id: int, opponent_id: int, amount: int, hold: int):
         super().__init__(timeout=60)
         self.challenger_id = challenger_id
         self.opponent_id = opponent_id
         self.amount = amount
+        self.hold = hold  # the challenger's stake
+        self.message: discord.Message | None = None
 
     @ui.button(label="Accept", style=discord.ButtonStyle.success)
     async def accept(self, interaction: discord.Interaction, button: ui.Button):
@@ -195,14 +93,25 @@ class DuelRequestView(ui.View):
                 "This duel request isn't for you.", ephemeral=True
             )
             return
-        opponent_balance = get_money(str(self.opponent_id))
-        if opponent_balance < self.amount:
-            await interaction.response.send_message(
-                "You don't have enough clubhall coins to accept this duel.",
-                ephemeral=True,
-            )
-            return
-        view = RPSView(self.challenger_id, self.opponent_id, self.amount)
+        async with user_lock(self.opponent_id):
+            hold = await db.reserve_hold(str(self.opponent_id), self.amount, "duel")
+            if hold is None:
+                await interaction.response.send_message(
+                    "You don't have enough clubhall coins to accept this duel.",
+                    ephemeral=True,
+                )
+                return
+            if self.is_finished():
+                # expired or accepted twice while the stake was being reserved
+                await db.release_holds([hold])
+                await interaction.response.send_message(
+                    "This duel request is no longer open.", ephemeral=True
+                )
+                return
+            self.stop()
+        view = RPSView(
+            self.challenger_id, self.opponent_id, self.amount, (self.hold, hold)
+        )
         view.message = interaction.message
         await interaction.response.edit_message(
             content=f"<@{self.challenger_id}> vs <@{self.opponent_id}> — choose your move!",
@@ -216,15 +125,23 @@ class DuelRequestView(ui.View):
                 "This duel request isn't for you.", ephemeral=True
             )
             return
+        self.stop()
+        await db.release_holds([self.hold])
         await interaction.response.edit_message(content="❌ Duel declined.", view=None)
 
+    async def on_timeout(self) -> None:
+        await db.release_holds([self.hold])
+        if self.message:
+            await self.message.edit(content="⌛ Duel request expired.", view=None)
+
 
 class RPSView(ui.View):
-    def __init__(self, p1_id: int, p2_id: int, bet: int):
+    def __init__(self, p1_id: int, p2_id: int, bet: int, holds: tuple[int, int]):
         super().__init__(timeout=120)
         self.p1_id = p1_id
         self.p2_id = p2_id
         self.bet = bet
+        self.holds = holds
         self.choices: dict[int, str | None] = {p1_id: None, p2_id: None}
         self.message: discord.Message | None = None
 
@@ -256,14 +173,11 @@ class RPSView(ui.View):
                 winner = self.p2_id
         text = f"<@{self.p1_id}> chose **{c1}**, <@{self.p2_id}> chose **{c2}**."
         if winner is None:
+            await db.release_holds(self.holds)
             text += "\nIt's a draw!"
         else:
-            loser = self.p2_id if winner == self.p1_id else self.p1_id
-            loser_balance = get_money(str(loser))
-            transfer = min(self.bet, loser_balance)
-            set_money(str(loser), loser_balance - transfer)
-            safe_add_coins(str(winner), transfer)
-            text += f"\n<@{winner}> wins {transfer} coins!"
+            await db.settle_holds(self.holds, {winner: 2 * self.bet})
+            text += f"\n<@{winner}> wins {self.bet} coins!"
         self.clear_items()
         if self.message:
             await self.message.edit(content=text, view=None)
@@ -282,16 +196,18 @@ class RPSView(ui.View):
         await self._choose(interaction, "scissors")
 
     async def on_timeout(self) -> None:
+        await db.release_holds(self.holds)
         if self.message and any(v is None for v in self.choices.values()):
             await self.message.edit(content="⌛ Duel timed out.", view=None)
         self.stop()
 
 
 class BlackjackView(ui.View):
-    def __init__(self, user_id: int, bet: int):
+    def __init__(self, user_id: int, bet: int, hold: int):
         super().__init__(timeout=120)
         self.user_id = user_id
         self.bet = bet
+        self.hold = hold
         self.player = [self._draw(), self._draw()]
         self.dealer = [self._draw(), self._draw()]
         self.message: discord.Message | None = None
@@ -358,14 +274,13 @@ class BlackjackView(ui.View):
         else:
             outcome = "lose"
 
-        balance = get_money(str(self.user_id))
+        payout = {"win": 2 * self.bet, "push": self.bet}.get(outcome, 0)
+        await db.settle_holds([self.hold], {self.user_id: payout})
         if outcome == "win":
-            safe_add_coins(str(self.user_id), self.bet)
             result_text = f"🎉 You won {self.bet} coins!"
         elif outcome == "push":
             result_text = "It's a draw."
         else:
-            set_money(str(self.user_id), balance - self.bet)
             result_text = f"💀 You lost {self.bet} coins."
 
         self.clear_items()
@@ -396,14 +311,27 @@ class BlackjackView(ui.View):
             return
         await self._finish(interaction)
 
+    async def on_timeout(self) -> None:
+        if self.finished:
+            return
+        self.finished = True
+        await db.release_holds([self.hold])
+        if self.message:
+            await self.message.edit(
+                content=self._render() + "\n⌛ Game timed out, your bet was returned.",
+                view=None,
+            )
+
 
 class PokerJoinView(ui.View):
-    def __init__(self, bot: commands.Bot, host_id: int, bet: int):
+    def __init__(self, bot: commands.Bot, host_id: int, bet: int, hold: int):
         super().__init__(timeout=30)
         self.bot = bot
         self.bet = bet
         self.players: dict[int, str] = {host_id: ""}
+        self.holds: dict[int, int] = {host_id: hold}
         self.message: discord.Message | None = None
+        self.dealing = False
 
     def render(self) -> str:
         joined = " ".join(f"<@{pid}>" for pid in self.players)
@@ -415,85 +343,116 @@ class PokerJoinView(ui.View):
     @ui.button(label="Join", style=discord.ButtonStyle.primary)
     async def join(self, interaction: discord.Interaction, button: ui.Button):
         uid = str(interaction.user.id)
-        register_user(uid, interaction.user.display_name)
-        if interaction.user.id in self.players:
-            await interaction.response.send_message(
-                "You're already in the game.", ephemeral=True
-            )
-            return
-        if get_money(uid) < self.bet:
-            await interaction.response.send_message(
-                "Not enough coins to join.", ephemeral=True
-            )
-            return
-        self.players[interaction.user.id] = interaction.user.display_name
+        await db.register_user(uid, interaction.user.display_name)
+        async with user_lock(uid):
+            if interaction.user.id in self.players:
+                await interaction.response.send_message(
+                    "You're already in the game.", ephemeral=True
+                )
+                return
+            hold = await db.reserve_hold(uid, self.bet, "poker")
+            if hold is None:
+                await interaction.response.send_message(
+                    "Not enough coins to join.", ephemeral=True
+                )
+                return
+            if self.dealing:
+                await db.release_holds([hold])
+                await interaction.response.send_message(
+                    "The cards are already being dealt.", ephemeral=True
+                )
+                return
+            self.players[interaction.user.id] = interaction.user.display_name
+            self.holds[interaction.user.id] = hold
         await interaction.response.send_message("Joined!", ephemeral=True)
         if self.message:
             await self.message.edit(content=self.render(), view=self)
 
     async def on_timeout(self) -> None:
+        self.dealing = True
+        players, holds = dict(self.players), dict(self.holds)
         if not self.message:
+            await db.release_holds(holds.values())
             return
         await self.message.edit(content="Dealing cards...", view=None)
-        await start_poker_game(self.message.channel, self.players, self.bet)
+        await start_poker_game(self.message.channel, players, self.bet, holds)
 
 
 async def start_poker_game(
-    channel: discord.abc.Messageable, players: dict[int, str], bet: int
+    channel: discord.abc.Messageable,
+    players: dict[int, str],
+    bet: int,
+    holds: dict[int, int],
 ) -> None:
+    """Deal one hand to *players*, whose stakes are already in *holds*."""
+
     deck = CARD_DECK.copy()
     shuffle(deck)
-    hands: dict[int, list[str]] = {}
-    community = [deck.pop()[0] for _ in range(5)]
-    active: dict[int, str] = {}
-    pot = 0
-    for pid, name in list(players.items()):
-        uid = str(pid)
-        balance = get_money(uid)
-        if balance < bet:
-            continue
-        set_money(uid, balance - bet)
-        pot += bet
-        active[pid] = name
-        hands[pid] = [deck.pop()[0], deck.pop()[0]]
-    if not active:
-        await channel.send("No players had enough coins for the game.")
-        return
-
-    ranks: dict[int, tuple] = {}
-    for pid in active:
-        cards = [_parse_card(c) for c in hands[pid] + community]
-        ranks[pid] = _evaluate_hand(cards)
+    community = [deck.pop() for _ in range(5)]
+    hands = {pid: [deck.pop(), deck.pop()] for pid in players}
+    pot = bet * len(players)
+
+    ranks = {pid: poker.evaluate(hands[pid] + community) for pid in players}
 
     best = max(ranks.values())
     winners = [pid for pid, r in ranks.items() if r == best]
     prize = pot // len(winners)
-    for pid in winners:
-        safe_add_coins(str(pid), prize)
+    await db.settle_holds(list(holds.values()), {pid: prize for pid in winners})
 
-    text = f"Community: {' '.join(community)}\n"
-    for pid, name in active.items():
-        text += f"<@{pid}>: {' '.join(hands[pid])}\n"
+    text = f"Community: {poker.render(community)}\n"
+    for pid, name in players.items():
+        text += f"<@{pid}>: {poker.render(hands[pid])}\n"
     win_names = ", ".join(f"<@{pid}>" for pid in winners)
-    text += f"Winner: {win_names} with {_hand_name(best[0])}! (+{prize} coins)"
+    text += f"Winner: {win_names} with {poker.hand_name(best)}! (+{prize} coins)"
     await channel.send(text)
 
 
+def read_poker_situation(
+    hole: str, board: str, opponents: int
+) -> tuple[list[int], list[int]]:
+    """Hole and board cards for /pokerodds; ValueError with a readable message."""
+
+    mine = poker.parse_cards(hole)
+    shared = poker.parse_cards(board)
+    if len(mine) != 2:
+        raise ValueError("Give exactly two hole cards, e.g. `As Kd`.")
+    if len(shared) not in (0, 3, 4, 5):
+        raise ValueError("The board has 0, 3, 4 or 5 cards.")
+    if len(set(mine + shared)) != len(mine + shared):
+        raise ValueError("A card can only appear once.")
+    if not 1 <= opponents <= 9:
+        raise ValueError("Opponents must be between 1 and 9.")
+    return mine, shared
+
+
+async def poker_odds_text(mine: list[int], shared: list[int], opponents: int) -> str:
+    odds = await poker_odds.estimate(mine, shared, opponents)
+    board_text = poker.render(shared) if shared else "none yet"
+    return (
+        f"Hand: {poker.render(mine)} | Board: {board_text} | "
+        f"{opponents} opponent{'s' if opponents > 1 else ''}\n"
+        f"Win {odds.win:.1%} · Tie {odds.tie:.1%} · Equity {odds.equity:.1%} "
+        f"({odds.trials:,} simulated deals)"
+    )
+
+
 def setup(bot: commands.Bot):
+    bot.add_listener(poker_odds.warm_up, "on_ready")
+
     @bot.tree.command(name="money", description="Check your clubhall coin balance")
     async def money(interaction: discord.Interaction):
         user_id = str(interaction.user.id)
-        register_user(user_id, interaction.user.display_name)
+        await db.register_user(user_id, interaction.user.display_name)
         await interaction.response.send_message(
-            f"You have {get_money(user_id)} clubhall coins.", ephemeral=True
+            f"You have {await db.get_money(user_id)} clubhall coins.", ephemeral=True
         )
 
     @bot.tree.command(
         name="balance", description="Check someone else's clubhall coin balance"
     )
     async def balance(interaction: discord.Interaction, user: discord.Member):
-        register_user(str(user.id), user.display_name)
-        money_amt = get_money(str(user.id))
+        await db.register_user(str(user.id), user.display_name)
+        money_amt = await db.get_money(str(user.id))
         await interaction.response.send_message(
             f"{user.display_name} has {money_amt} clubhall coins.", ephemeral=False
         )
@@ -508,8 +467,8 @@ def setup(bot: commands.Bot):
                 ephemeral=True,
             )
             return
-        register_user(str(user.id), user.display_name)
-        added = safe_add_coins(str(user.id), amount)
+        await db.register_user(str(user.id), user.display_name)
+        added = await db.safe_add_coins(str(user.id), amount)
         if added == 0:
             await interaction.response.send_message(
                 "Clubhall coin limit reached. No coins added.", ephemeral=True
@@ -537,8 +496,7 @@ def setup(bot: commands.Bot):
                 ephemeral=True,
             )
             return
-        current = get_money(str(user.id))
-        set_money(str(user.id), max(0, current - amount))
+        await db.add_coins(str(user.id), -amount, clamp=True)
         await interaction.response.send_message(
             f"{amount} clubhall coins removed from {user.display_name}."
         )
@@ -554,32 +512,30 @@ def setup(bot: commands.Bot):
                 "You can't donate coins on yourself.", ephemeral=True
             )
             return
-        register_user(sender_id, interaction.user.display_name)
-        register_user(receiver_id, user.display_name)
-        sender_balance = get_money(sender_id)
+        await db.register_user(sender_id, interaction.user.display_name)
+        await db.register_user(receiver_id, user.display_name)
+        async with user_lock(sender_id):
 
-        try:
-            amount_int = int(amount)
-        except Exception:
-            await interaction.response.send_message("Invalid amount.", ephemeral=True)
-            return
+            try:
+                amount_int = int(amount)
+            except Exception:
+                await interaction.response.send_message("Invalid amount.", ephemeral=True)
+                return
 
-        if amount_int <= 0:
-            await interaction.response.send_message(
-                "Amount must be greater than 0.", ephemeral=True
-            )
-            return
-        if amount_int > sender_balance:
+            if amount_int <= 0:
+                await interaction.response.send_message(
+                    "Amount must be greater than 0.", ephemeral=True
+                )
+                return
+            if not await db.transfer(sender_id, receiver_id, amount_int):
+                await interaction.response.send_message(
+                    "You don't have enough clubhall coins.", ephemeral=True
+                )
+                return
             await interaction.response.send_message(
-                "You don't have enough clubhall coins.", ephemeral=True
+                f"💸 You donated **{amount_int}** clubhall coins on {user.display_name}!",
+                ephemeral=False,
             )
-            return
-        set_money(sender_id, sender_balance - amount_int)
-        safe_add_coins(receiver_id, amount_int)
-        await interaction.response.send_message(
-            f"💸 You donated **{amount_int}** clubhall coins on {user.display_name}!",
-            ephemeral=False,
-        )
 
     @bot.tree.command(
         name="request", description="Request clubhall coins from another user"
@@ -594,8 +550,8 @@ def setup(bot: commands.Bot):
                 "You can't request clubhall coins from yourself.", ephemeral=True
             )
             return
-        register_user(str(sender_id), interaction.user.display_name)
-        register_user(str(receiver_id), user.display_name)
+        await db.register_user(str(sender_id), interaction.user.display_name)
+        await db.register_user(str(receiver_id), user.display_name)
         view = RequestView(sender_id, receiver_id, amount)
         await interaction.response.send_message(
             f"{user.mention}, {interaction.user.display_name} requests **{amount}** clubhall coins for: _{reason}_",
@@ -606,7 +562,7 @@ def setup(bot: commands.Bot):
     @app_commands.describe(count="How many spots to display (1–25)?")
     async def topcoins(interaction: discord.Interaction, count: int = 10):
         count = max(1, min(count, 25))
-        top = get_top_users(count)
+        top = await db.get_top_users(count)
         if not top:
             await interaction.response.send_message("No data yet 🤷‍♂️")
             return
@@ -626,61 +582,61 @@ def setup(bot: commands.Bot):
     )
     async def weekly(interaction: discord.Interaction):
         user_id = str(interaction.user.id)
-        register_user(user_id, interaction.user.display_name)
-        now = datetime.utcnow()
-        last = get_last_weekly(user_id)
-        if last and now - last < timedelta(days=7):
-            remaining = timedelta(days=7) - (now - last)
-            days, seconds = divmod(int(remaining.total_seconds()), 86400)
-            hours, seconds = divmod(seconds, 3600)
-            minutes = seconds // 60
-            await interaction.response.send_message(
-                f"⏳ You can claim again in **{days} days {hours} hours {minutes} minutes**.",
-                ephemeral=True,
-            )
-            return
-        added = safe_add_coins(user_id, WEEKLY_REWARD)
-        set_last_weekly(user_id, now)
-        if added > 0:
-            await interaction.response.send_message(
-                f"✅ {added} Coins added! You now have **{get_money(user_id)}** 💰.",
-                ephemeral=True,
-            )
-        else:
-            await interaction.response.send_message(
-                "⚠️ Server coin limit reached. No weekly coins could be added.",
-                ephemeral=True,
-            )
+        await db.register_user(user_id, interaction.user.display_name)
+        async with user_lock(user_id):
+            remaining = await db.check_and_set(
+                user_id, "weekly", WEEKLY_COOLDOWN_DAYS * 86400
+            )
+            if remaining:
+                days, seconds = divmod(remaining, 86400)
+                hours, seconds = divmod(seconds, 3600)
+                minutes = seconds // 60
+                await interaction.response.send_message(
+                    f"⏳ You can claim again in **{days} days {hours} hours {minutes} minutes**.",
+                    ephemeral=True,
+                )
+                return
+            balance = await db.add_coins(user_id, WEEKLY_REWARD)
+            if balance is not None:
+                await interaction.response.send_message(
+                    f"✅ {WEEKLY_REWARD} Coins added! You now have **{balance}** 💰.",
+                    ephemeral=True,
+                )
+            else:
+                await interaction.response.send_message(
+                    "⚠️ Server coin limit reached. No weekly coins could be added.",
+                    ephemeral=True,
+                )
 
     @bot.tree.command(
         name="daily", description="Claim your daily coins (24 h cooldown)"
     )
     async def daily(interaction: discord.Interaction):
         user_id = str(interaction.user.id)
-        register_user(user_id, interaction.user.display_name)
-        now = datetime.utcnow()
-        last = get_last_claim(user_id)
-        if last and now - last < timedelta(hours=24):
-            remaining = timedelta(hours=24) - (now - last)
-            hours, seconds = divmod(int(remaining.total_seconds()), 3600)
-            minutes = seconds // 60
-            await interaction.response.send_message(
-                f"⏳ You can claim again in **{hours} hours {minutes} minutes**.",
-                ephemeral=True,
-            )
-            return
-        added = safe_add_coins(user_id, DAILY_REWARD)
-        set_last_claim(user_id, now)
-        if added > 0:
-            await interaction.response.send_message(
-                f"✅ {added} Coins added! You now have **{get_money(user_id)}** 💰.",
-                ephemeral=True,
-            )
-        else:
-            await interaction.response.send_message(
-                "⚠️ Server coin limit reached. No daily coins could be added.",
-                ephemeral=True,
-            )
+        await db.register_user(user_id, interaction.user.display_name)
+        async with user_lock(user_id):
+            remaining = await db.check_and_set(
+                user_id, "daily", DAILY_COOLDOWN_HOURS * 3600
+            )
+            if remaining:
+                hours, seconds = divmod(remaining, 3600)
+                minutes = seconds // 60
+                await interaction.response.send_message(
+                    f"⏳ You can claim again in **{hours} hours {minutes} minutes**.",
+                    ephemeral=True,
+                )
+                return
+            balance = await db.add_coins(user_id, DAILY_REWARD)
+            if balance is not None:
+                await interaction.response.send_message(
+                    f"✅ {DAILY_REWARD} Coins added! You now have **{balance}** 💰.",
+                    ephemeral=True,
+                )
+            else:
+                await interaction.response.send_message(
+                    "⚠️ Server coin limit reached. No daily coins could be added.",
+                    ephemeral=True,
+                )
 
 #    @bot.tree.command(
 #        name="superpower",
@@ -791,18 +747,19 @@ def setup(bot: commands.Bot):
     )
     async def gamble(interaction: discord.Interaction, amount: str):
         user_id = str(interaction.user.id)
-        register_user(user_id, interaction.user.display_name)
-        if amount == "all":
-            amountasInt = get_money(user_id)
-        else:
-            amountasInt = int(amount)
-        if amountasInt < 2:
-            await interaction.response.send_message(
-                "🎲 Minimum bet is 2 clubhall coins.", ephemeral=True
-            )
-            return
-        balance = get_money(user_id)
-        if amountasInt > balance:
+        await db.register_user(user_id, interaction.user.display_name)
+        async with user_lock(user_id):
+            if amount == "all":
+                amountasInt = await db.get_money(user_id)
+            else:
+                amountasInt = int(amount)
+            if amountasInt < 2:
+                await interaction.response.send_message(
+                    "🎲 Minimum bet is 2 clubhall coins.", ephemeral=True
+                )
+                return
+            hold = await db.reserve_hold(user_id, amountasInt, "gamble")
+        if hold is None:
             await interaction.response.send_message(
                 "❌ You don't have enough clubhall coins!", ephemeral=True
             )
@@ -815,26 +772,17 @@ def setup(bot: commands.Bot):
         if roll == 0.01:
             multiplier = 10
             message = "💎💎💎 MEGA JACKPOT! 10x WIN!"
-        elif roll < 0.05:
-            multiplier = 3
-            message = "💎 JACKPOT! 3x WIN!"
-        elif roll < 0.30:
-            multiplier = 2
-            message = "🔥 Double win!"
-        elif roll < 0.60:
-            multiplier = 1
-            message = "😐 You broke even."
         else:
-            multiplier = 0
-            message = "💀 You lost everything..."
-        new_amount = amountasInt * multiplier
-        set_money(user_id, balance - amountasInt + new_amount)
-        emoji_result = {3: "💎", 2: "🔥", 1: "😐", 0: "💀"}
+            multiplier = next((m for bound, m in GAMBLE_BANDS if roll < bound), 0)
+            message = GAMBLE_MESSAGES.get(multiplier, f"💎 JACKPOT! {multiplier}x WIN!")
+        balances = await db.settle_holds([hold], {user_id: amountasInt * multiplier})
+        new_balance = balances[user_id]
+        emoji_result = {2: "🔥", 1: "😐", 0: "💀"}
         await interaction.edit_original_response(
             content=(
-                f"{emoji_result[multiplier]} **{interaction.user.display_name}**, you bet **{amountasInt}** coins.\n"
+                f"{emoji_result.get(multiplier, '💎')} **{interaction.user.display_name}**, you bet **{amountasInt}** coins.\n"
                 f"{message}\n"
-                f"You now have **{get_money(user_id)}** clubhall coins."
+                f"You now have **{new_balance}** clubhall coins."
             )
         )
 
@@ -842,26 +790,26 @@ def setup(bot: commands.Bot):
     @app_commands.describe(bet="How much you want to bet")
     async def casino(inter: discord.Interaction, bet: int):
         uid = str(inter.user.id)
-        register_user(uid, inter.user.display_name)
-        balance = get_money(uid)
-        if bet <= 0:
+        await db.register_user(uid, inter.user.display_name)
+        async with user_lock(uid):
+            if bet <= 0:
+                await inter.response.send_message(
+                    "❌ Try number more than 0", ephemeral=True
+                )
+                return
+            won = random() < CASINO_WIN_CHANCE
+            if await db.add_coins(uid, bet if won else -bet) is None:
+                await inter.response.send_message("❌ Not enough coins.", ephemeral=True)
+                return
+            if won:
+                await inter.response.send_message(
+                    f"🎉 Congratulation! You won {bet} clubhall coins."
+                )
+                return
             await inter.response.send_message(
-                "❌ Try number more than 0", ephemeral=True
+                f"❌ Congratulation! You lose {bet} clubhall coins."
             )
-        if bet > balance:
-            await inter.response.send_message("❌ Not enough coins.", ephemeral=True)
             return
-        if random() > 0.5:
-            set_money(uid, balance + bet)
-            await inter.response.send_message(
-                f"🎉 Congratulation! You won {bet} clubhall coins."
-            )
-            return
-        set_money(uid, balance - bet)
-        await inter.response.send_message(
-            f"❌ Congratulation! You lose {bet} clubhall coins."
-        )
-        return
 
     @bot.tree.command(
         name="duel",
@@ -878,62 +826,88 @@ def setup(bot: commands.Bot):
             return
         challenger_id = str(interaction.user.id)
         opponent_id = str(opponent.id)
-        register_user(challenger_id, interaction.user.display_name)
-        register_user(opponent_id, opponent.display_name)
-        challenger_balance = get_money(challenger_id)
-        if bet <= 0:
-            await interaction.response.send_message(
-                "Bet must be greater than 0.", ephemeral=True
-            )
-            return
-        if bet > challenger_balance:
-            await interaction.response.send_message(
-                "You don't have enough coins.", ephemeral=True
-            )
-            return
-        view = DuelRequestView(interaction.user.id, opponent.id, bet)
-        await interaction.response.send_message(
-            f"{opponent.mention}, {interaction.user.display_name} challenges you to a duel for **{bet}** coins!",
-            view=view,
-        )
+        await db.register_user(challenger_id, interaction.user.display_name)
+        await db.register_user(opponent_id, opponent.display_name)
+        async with user_lock(challenger_id):
+            if bet <= 0:
+                await interaction.response.send_message(
+                    "Bet must be greater than 0.", ephemeral=True
+                )
+                return
+            hold = await db.reserve_hold(challenger_id, bet, "duel")
+            if hold is None:
+                await interaction.response.send_message(
+                    "You don't have enough coins.", ephemeral=True
+                )
+                return
+            view = DuelRequestView(interaction.user.id, opponent.id, bet, hold)
+            await interaction.response.send_message(
+                f"{opponent.mention}, {interaction.user.display_name} challenges you to a duel for **{bet}** coins!",
+                view=view,
+            )
+            view.message = await interaction.original_response()
 
     @bot.tree.command(name="blackjack", description="Play blackjack against the bot")
     @app_commands.describe(bet="How much you want to bet")
     async def blackjack(interaction: discord.Interaction, bet: int):
         uid = str(interaction.user.id)
-        register_user(uid, interaction.user.display_name)
-        balance = get_money(uid)
-        if bet <= 0:
-            await interaction.response.send_message(
-                "❌ Bet must be greater than 0.", ephemeral=True
-            )
-            return
-        if bet > balance:
-            await interaction.response.send_message(
-                "❌ Not enough coins.", ephemeral=True
-            )
-            return
-        view = BlackjackView(interaction.user.id, bet)
-        await interaction.response.send_message(view._render(), view=view)
-        view.message = await interaction.original_response()
+        await db.register_user(uid, interaction.user.display_name)
+        async with user_lock(uid):
+            if bet <= 0:
+                await interaction.response.send_message(
+                    "❌ Bet must be greater than 0.", ephemeral=True
+                )
+                return
+            hold = await db.reserve_hold(uid, bet, "blackjack")
+            if hold is None:
+                await interaction.response.send_message(
+                    "❌ Not enough coins.", ephemeral=True
+                )
+                return
+            view = BlackjackView(interaction.user.id, bet, hold)
+            await interaction.response.send_message(view._render(), view=view)
+            view.message = await interaction.original_response()
 
     @bot.tree.command(name="poker", description="Multiplayer Texas Hold'em style poker")
     @app_commands.describe(bet="Coins each player wagers")
     async def poker(interaction: discord.Interaction, bet: int):
         uid = str(interaction.user.id)
-        register_user(uid, interaction.user.display_name)
-        if bet <= 0:
-            await interaction.response.send_message(
-                "Bet must be greater than 0.", ephemeral=True
-            )
-            return
-        if get_money(uid) < bet:
-            await interaction.response.send_message("Not enough coins.", ephemeral=True)
+        await db.register_user(uid, interaction.user.display_name)
+        async with user_lock(uid):
+            if bet <= 0:
+                await interaction.response.send_message(
+                    "Bet must be greater than 0.", ephemeral=True
+                )
+                return
+            hold = await db.reserve_hold(uid, bet, "poker")
+            if hold is None:
+                await interaction.response.send_message("Not enough coins.", ephemeral=True)
+                return
+            view = PokerJoinView(bot, interaction.user.id, bet, hold)
+            view.players[interaction.user.id] = interaction.user.display_name
+            await interaction.response.send_message(view.render(), view=view)
+            view.message = await interaction.original_response()
+
+    @bot.tree.command(
+        name="pokerodds", description="Estimate your chances in a Texas Hold'em hand"
+    )
+    @app_commands.describe(
+        hole="Your two cards, e.g. As Kd",
+        board="Community cards dealt so far, e.g. Qh Jh 2c",
+        opponents="How many opponents are still in the hand",
+    )
+    async def pokerodds(
+        interaction: discord.Interaction, hole: str, board: str = "", opponents: int = 1
+    ):
+        try:
+            mine, shared = read_poker_situation(hole, board, opponents)
+        except ValueError as e:
+            await interaction.response.send_message(f"❌ {e}", ephemeral=True)
             return
-        view = PokerJoinView(bot, interaction.user.id, bet)
-        view.players[interaction.user.id] = interaction.user.display_name
-        await interaction.response.send_message(view.render(), view=view)
-        view.message = await interaction.original_response()
+        await interaction.response.defer(thinking=True)
+        await interaction.followup.send(
+            await poker_odds_text(mine, shared, opponents)
+        )
 
     for command in (
         money,
@@ -951,6 +925,7 @@ def setup(bot: commands.Bot):
         duel,
         blackjack,
         poker,
+        pokerodds,
     ):
         add_prefix_command(bot, command)
 
@@ -970,4 +945,5 @@ def setup(bot: commands.Bot):
         duel,
         blackjack,
         poker,
+        pokerodds,
     )
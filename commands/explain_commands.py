@@ -68,6 +68,8 @@ COMMAND_EXPLANATIONS: dict[str, str] = {
         "Configures anti-nuke settings for your server. You choose a category (like delete_roles, kick, ban), "
         "set a threshold (number of actions before punishment), select a punishment (timeout, strip, kick, ban), "
         "optionally set duration (for timeout), and enable or disable the protection. "
+        "For mention_storm the threshold is the number of mentions across the whole server within a few seconds; "
+        "everyone who took part is punished. "
         "Only members with the admin role (ID 1351479405699928108) can use this command."
     ),
     "antinukeignoreuser": (
@@ -82,6 +84,17 @@ COMMAND_EXPLANATIONS: dict[str, str] = {
         "Sets the channel where anti-nuke actions are logged. "
         "Only the admin role (ID 1351479405699928108) can use this. Important to review automatic punishments."
     ),
+    "antinukelockdown": (
+        "Turns the emergency lockdown on or off. When it is on and anti-nuke punishes someone, "
+        "every role the bot can edit (except safe roles) loses dangerous permissions such as "
+        "administrator, manage roles/channels/webhooks, kick, ban and mention everyone. "
+        "Only the admin role (ID 1351479405699928108) can use this."
+    ),
+    "antinukerestore": (
+        "Recreates the roles and channels that were deleted in the last few minutes (60 by default), "
+        "using the snapshots the bot takes every few minutes. Roles are restored first, then categories, "
+        "then channels with their permission overwrites. Only the admin role (ID 1351479405699928108) can use this."
+    ),
     "antinukesettings": (
         "Displays the current anti-nuke settings and safe users/roles for your server. "
         "Only the admin role (ID 1351479405699928108) can access this. Helps verify what protections are active."
@@ -116,6 +129,11 @@ COMMAND_EXPLANATIONS: dict[str, str] = {
         "Each player bets coins and receives cards. The user with the best hand wins the pot. "
         "You need enough coins to join or start the game."
     ),
+    "pokerodds": (
+        "Estimates how often your two hole cards win against a number of random opponents, "
+        "optionally with the community cards dealt so far (e.g. `As Kd` on `Qh Jh 2c`). "
+        "The bot simulates thousands of deals, so the result is a close estimate."
+    ),
     "daily": (
         "Claims your daily reward in coins. Can only be used once every 24 hours. "
         "Make sure to use it regularly to maximize your earnings."
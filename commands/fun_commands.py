@@ -6,7 +6,7 @@ from typing import Optional
 from collections import defaultdict
 import requests
 
-from db.DBHelper import get_role
+from db.async_db import db
 from utils import has_role, has_command_permission
 
 from .hybrid_helpers import respond
@@ -313,8 +313,8 @@ def setup(bot: commands.Bot):
         try:
             if not ctx.guild:
                 raise RuntimeError
-            sheher_id = get_role(ctx.guild.id, "sheher")
-            hehim_id = get_role(ctx.guild.id, "hehim")
+            sheher_id = await db.get_role(ctx.guild.id, "sheher")
+            hehim_id = await db.get_role(ctx.guild.id, "hehim")
             if sheher_id and has_role(user, sheher_id) and user.name != "goodyb":
                 title = f"{ctx.author.display_name} calls {user.display_name} a good girl"
             elif hehim_id and has_role(user, hehim_id):
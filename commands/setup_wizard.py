@@ -1,26 +1,11 @@
 from dataclasses import dataclass
-from typing import Callable, List, Optional, Union
+from typing import Awaitable, Callable, List, Optional, Union
 
 import discord
 from discord import app_commands
 from discord.ext import commands
 
-from db.DBHelper import (
-    set_welcome_channel,
-    set_welcome_message,
-    set_leave_channel,
-    set_leave_message,
-    set_booster_channel,
-    set_booster_message,
-    set_log_channel,
-    set_anti_nuke_log_channel,
-
-    add_filtered_word,
-    add_trigger_response,
-    set_anti_nuke_setting,
-    add_safe_user,
-    add_safe_role,
-)
+from db.async_db import db
 from utils import parse_duration, has_command_permission
 from .hybrid_helpers import add_prefix_command
 from anti_nuke import CATEGORIES
@@ -53,8 +38,8 @@ class ChannelMessageView(discord.ui.View):
     def __init__(
         self,
         wizard: "SetupWizard",
-        channel_setter: Callable[[int, int], None],
-        message_setter: Callable[[int, str], None],
+        channel_setter: Callable[[int, int], Awaitable[None]],
+        message_setter: Callable[[int, str], Awaitable[None]],
         success: str,
         placeholder: str,
     ):
@@ -77,9 +62,9 @@ class ChannelMessageView(discord.ui.View):
     async def save(self, interaction: discord.Interaction, button: discord.ui.Button):
         channel = self.select.values[0] if self.select.values else None
         if channel:
-            self.channel_setter(interaction.guild.id, channel.id)
+            await self.channel_setter(interaction.guild.id, channel.id)
         if self.message_value:
-            self.message_setter(interaction.guild.id, self.message_value)
+            await self.message_setter(interaction.guild.id, self.message_value)
         await interaction.response.send_message(self.success, ephemeral=True)
         await self.wizard.advance(interaction)
 
@@ -88,7 +73,7 @@ class ChannelSelectView(discord.ui.View):
     def __init__(
         self,
         wizard: "SetupWizard",
-        channel_setter: Callable[[int, int], None],
+        channel_setter: Callable[[int, int], Awaitable[None]],
         success: str,
         placeholder: str,
     ):
@@ -102,7 +87,7 @@ class ChannelSelectView(discord.ui.View):
     @discord.ui.button(label="Save", style=discord.ButtonStyle.green)
     async def save(self, interaction: discord.Interaction, button: discord.ui.Button):
         channel = self.select.values[0]
-        self.channel_setter(interaction.guild.id, channel.id)
+        await self.channel_setter(interaction.guild.id, channel.id)
         await interaction.response.send_message(self.success, ephemeral=True)
         await self.wizard.advance(interaction)
 
@@ -118,7 +103,7 @@ class UserSelectView(discord.ui.View):
     async def save(self, interaction: discord.Interaction, button: discord.ui.Button):
         guild = interaction.guild
         for member in self.select.values:
-            add_safe_user(guild.id, member.id)
+            await db.add_safe_user(guild.id, member.id)
         await interaction.response.send_message("Safe users updated.", ephemeral=True)
         await self.wizard.advance(interaction)
 
@@ -134,7 +119,7 @@ class RoleSelectView(discord.ui.View):
     async def save(self, interaction: discord.Interaction, button: discord.ui.Button):
         guild = interaction.guild
         for role in self.select.values:
-            add_safe_role(guild.id, role.id)
+            await db.add_safe_role(guild.id, role.id)
         await interaction.response.send_message("Safe roles updated.", ephemeral=True)
         await self.wizard.advance(interaction)
 
@@ -143,8 +128,8 @@ class WelcomeView(ChannelMessageView):
     def __init__(self, wizard: "SetupWizard"):
         super().__init__(
             wizard,
-            set_welcome_channel,
-            set_welcome_message,
+            db.set_welcome_channel,
+            db.set_welcome_message,
             "Welcome settings saved.",
             "Select welcome channel",
         )
@@ -154,8 +139,8 @@ class LeaveView(ChannelMessageView):
     def __init__(self, wizard: "SetupWizard"):
         super().__init__(
             wizard,
-            set_leave_channel,
-            set_leave_message,
+            db.set_leave_channel,
+            db.set_leave_message,
             "Leave settings saved.",
             "Select leave channel",
         )
@@ -165,8 +150,8 @@ class BoosterView(ChannelMessageView):
     def __init__(self, wizard: "SetupWizard"):
         super().__init__(
             wizard,
-            set_booster_channel,
-            set_booster_message,
+            db.set_booster_channel,
+            db.set_booster_message,
             "Booster settings saved.",
             "Select booster channel",
         )
@@ -176,7 +161,7 @@ class LogChannelView(ChannelSelectView):
     def __init__(self, wizard: "SetupWizard"):
         super().__init__(
             wizard,
-            set_log_channel,
+            db.set_log_channel,
             "Log channel set.",
             "Select log channel",
         )
@@ -186,7 +171,7 @@ class AntiNukeLogView(ChannelSelectView):
     def __init__(self, wizard: "SetupWizard"):
         super().__init__(
             wizard,
-            set_anti_nuke_log_channel,
+            db.set_anti_nuke_log_channel,
             "Anti-nuke log channel set.",
             "Select anti-nuke log channel",
         )
@@ -225,7 +210,7 @@ class AntiNukeModal(discord.ui.Modal):
             if self.duration.value
             else None
         )
-        set_anti_nuke_setting(
+        await db.set_anti_nuke_setting(
             self.category,
             enabled,
             threshold,
@@ -256,7 +241,7 @@ class FilterWordsModal(discord.ui.Modal, title="Filtered words"):
         for word in self.words.value.replace("\n", ",").split(","):
             w = word.strip()
             if w:
-                add_filtered_word(interaction.guild.id, w)
+                await db.add_filtered_word(interaction.guild.id, w)
         await interaction.response.send_message("Filtered words saved.", ephemeral=True)
         await self.wizard.advance(interaction)
 
@@ -274,8 +259,6 @@ class TriggerResponsesModal(discord.ui.Modal, title="Trigger responses"):
         self.wizard = wizard
 
     async def on_submit(self, interaction: discord.Interaction):
-        from events import trigger_responses
-
         for line in self.mappings.value.splitlines():
             if "|" not in line:
                 continue
@@ -283,8 +266,7 @@ class TriggerResponsesModal(discord.ui.Modal, title="Trigger responses"):
             if trigger and response:
                 trig = trigger.strip()
                 resp = response.strip()
-                add_trigger_response(trig, resp, interaction.guild.id)
-                trigger_responses.setdefault(interaction.guild.id, {})[trig.lower()] = resp
+                await db.add_trigger_response(trig, resp, interaction.guild.id)
         await interaction.response.send_message("Trigger responses saved.", ephemeral=True)
         await self.wizard.advance(interaction)
 
@@ -1,7 +1,6 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
-from datetime import datetime, timedelta
 from random import choice, randint, random
 from events import start_message_log
 
@@ -10,22 +9,13 @@ from config import (
     STAT_NAMES,
     QUEST_COOLDOWN_HOURS,
     FISHING_COOLDOWN_MINUTES,
+    QUEST_STAT_POINTS,
+    REFUND_COINS_PER_POINT,
+    FISHING_REWARDS,
 )
-from db.DBHelper import (
-    register_user,
-    safe_add_coins,
-    get_stats,
-    add_stat_points,
-    increase_stat,
-    get_timestamp,
-    set_timestamp,
-    get_rod_level,
-    get_rod_multiplier,
-    set_rod_level,
-    get_money,
-    set_money,
-)
-from utils import has_role, has_command_permission, parse_duration
+from db.async_db import db
+from db.DBHelper import get_rod_multiplier
+from utils import has_role, has_command_permission, parse_duration, user_lock
 from .hybrid_helpers import add_prefix_command
 
 
@@ -33,7 +23,7 @@ rod_shop: dict[int, tuple[int, float]] = {}
 
 
 async def sync_stat_roles(member: discord.Member):
-    stats = get_stats(str(member.id))
+    stats = await db.get_stats(str(member.id))
     from config import ROLE_THRESHOLDS
 
     for stat, (role_name, threshold) in ROLE_THRESHOLDS.items():
@@ -59,8 +49,8 @@ def setup(bot: commands.Bot, shop: dict[int, tuple[int, float]]):
         interaction: discord.Interaction, user: discord.Member | None = None
     ):
         target = user or interaction.user
-        register_user(str(target.id), target.display_name)
-        stats = get_stats(str(target.id))
+        await db.register_user(str(target.id), target.display_name)
+        stats = await db.get_stats(str(target.id))
         description = "\n".join(f"**{s.title()}**: {stats[s]}" for s in STAT_NAMES)
         embed = discord.Embed(
             title=f"{target.display_name}'s Stats",
@@ -75,31 +65,29 @@ def setup(bot: commands.Bot, shop: dict[int, tuple[int, float]]):
     )
     async def quest(interaction: discord.Interaction):
         uid = str(interaction.user.id)
-        register_user(uid, interaction.user.display_name)
-        last = get_timestamp(uid, "last_quest")
-        now = datetime.utcnow()
-        if last and now - last < timedelta(hours=QUEST_COOLDOWN_HOURS):
-            remain = timedelta(hours=QUEST_COOLDOWN_HOURS) - (now - last)
-            hrs, sec = divmod(int(remain.total_seconds()), 3600)
-            mins = sec // 60
+        await db.register_user(uid, interaction.user.display_name)
+        async with user_lock(uid):
+            remain = await db.check_and_set(uid, "quest", QUEST_COOLDOWN_HOURS * 3600)
+            if remain:
+                hrs, sec = divmod(remain, 3600)
+                mins = sec // 60
+                await interaction.response.send_message(
+                    f"⏳ Next quest in {hrs}h {mins}min.", ephemeral=True
+                )
+                return
+            earned = randint(*QUEST_STAT_POINTS)
+            await db.add_stat_points(uid, earned)
             await interaction.response.send_message(
-                f"⏳ Next quest in {hrs}h {mins}min.", ephemeral=True
+                f"✅ You completed the quest and earned **{earned}** stat-point(s)!",
+                ephemeral=True,
             )
-            return
-        earned = randint(1, 3)
-        add_stat_points(uid, earned)
-        set_timestamp(uid, "last_quest", now)
-        await interaction.response.send_message(
-            f"✅ You completed the quest and earned **{earned}** stat-point(s)!",
-            ephemeral=True,
-        )
 
     @bot.tree.command(name="buypoints", description="Buy stat-points with coins")
     async def buypoints(interaction: discord.Interaction, amount: str = "1"):
         amountasInt = 1
         price_per_point = int(STAT_PRICE)
         if amount == "all":
-            amountasInt = get_money(interaction.user.id) // price_per_point
+            amountasInt = await db.get_money(interaction.user.id) // price_per_point
         else:
             amountasInt = int(amount)
         if int(amountasInt) < 1:
@@ -108,19 +96,19 @@ def setup(bot: commands.Bot, shop: dict[int, tuple[int, float]]):
             )
             return
         uid = str(interaction.user.id)
-        register_user(uid, interaction.user.display_name)
-        cost = price_per_point * amountasInt
-        balance = get_money(uid)
-        if balance < cost:
+        await db.register_user(uid, interaction.user.display_name)
+        async with user_lock(uid):
+            cost = price_per_point * amountasInt
+            if await db.add_coins(uid, -cost) is None:
+                balance = await db.get_money(uid)
+                await interaction.response.send_message(
+                    f"💰 You need {cost} coins but only have {balance}.", ephemeral=True
+                )
+                return
+            await db.add_stat_points(uid, amountasInt)
             await interaction.response.send_message(
-                f"💰 You need {cost} coins but only have {balance}.", ephemeral=True
+                f"Purchased {amountasInt} point(s) for {cost} coins."
             )
-            return
-        set_money(uid, balance - cost)
-        add_stat_points(uid, amountasInt)
-        await interaction.response.send_message(
-            f"Purchased {amountasInt} point(s) for {cost} coins."
-        )
 
     @bot.tree.command(
         name="allocate", description="Spend stat-points to increase a stat"
@@ -137,7 +125,7 @@ def setup(bot: commands.Bot, shop: dict[int, tuple[int, float]]):
             )
             return
         if points == "all":
-            user_stats = get_stats(str(interaction.user.id))
+            user_stats = await db.get_stats(str(interaction.user.id))
             pointsAsInt = user_stats["stat_points"]
         else:
             pointsAsInt = int(points)
@@ -147,18 +135,17 @@ def setup(bot: commands.Bot, shop: dict[int, tuple[int, float]]):
             )
             return
         uid = str(interaction.user.id)
-        register_user(uid, interaction.user.display_name)
-        user_stats = get_stats(uid)
-        if user_stats["stat_points"] < pointsAsInt:
+        await db.register_user(uid, interaction.user.display_name)
+        async with user_lock(uid):
+            if not await db.increase_stat(uid, stat, pointsAsInt):
+                await interaction.response.send_message(
+                    "Not enough unspent points.", ephemeral=True
+                )
+                return
+            await sync_stat_roles(interaction.user)
             await interaction.response.send_message(
-                "Not enough unspent points.", ephemeral=True
+                f"{stat.title()} increased by {pointsAsInt}."
             )
-            return
-        increase_stat(uid, stat, pointsAsInt)
-        await sync_stat_roles(interaction.user)
-        await interaction.response.send_message(
-            f"{stat.title()} increased by {pointsAsInt}."
-        )
 
     @bot.tree.command(name="fishing", description="Phish for stat-points")
     async def fish(interaction: discord.Interaction):
@@ -182,101 +169,70 @@ def setup(bot: commands.Bot, shop: dict[int, tuple[int, float]]):
             "https://giffiles.alphacoders.com/999/99914.gif",
         ]
         uid = str(interaction.user.id)
-        register_user(uid, interaction.user.display_name)
-        last = get_timestamp(uid, "last_fishing")
-        now = datetime.utcnow()
-        if last and now - last < timedelta(minutes=FISHING_COOLDOWN_MINUTES):
-            remain = timedelta(minutes=FISHING_COOLDOWN_MINUTES) - (now - last)
-            minutes, seconds = divmod(int(remain.total_seconds()), 60)
-            await interaction.response.send_message(
-                f"⏳ You can fish again in **{minutes} minutes {seconds} seconds**.",
-                ephemeral=True,
-            )
-            return
-        rod_level = get_rod_level(uid)
-        multiplier = get_rod_multiplier(rod_level)
-        reward = random()
-        if reward < 0.50:
-            earned = int(randint(1, 5) * multiplier)
-            add_stat_points(uid, earned)
-            set_timestamp(uid, "last_fishing", now)
+        await db.register_user(uid, interaction.user.display_name)
+        async with user_lock(uid):
+            remain = await db.check_and_set(uid, "fishing", FISHING_COOLDOWN_MINUTES * 60)
+            if remain:
+                minutes, seconds = divmod(remain, 60)
+                await interaction.response.send_message(
+                    f"⏳ You can fish again in **{minutes} minutes {seconds} seconds**.",
+                    ephemeral=True,
+                )
+                return
+            rod_level = await db.get_rod_level(uid)
+            multiplier = get_rod_multiplier(rod_level)
+            reward = random()
+            _, kind, low, high = next(band for band in FISHING_REWARDS if reward < band[0])
+            earned = int(randint(low, high) * multiplier)
+            if kind == "stat_points":
+                await db.add_stat_points(uid, earned)
+                what = "stat points"
+            else:
+                await db.safe_add_coins(uid, earned)
+                what = "clubhall coins"
             gif_url = choice(fish_gifs)
             if gif_url:
                 embed = discord.Embed(
-                    title=f"{interaction.user.display_name} has fished {earned} stat points",
+                    title=f"{interaction.user.display_name} has fished {earned} {what}",
                     color=discord.Color.red(),
                 )
                 embed.set_image(url=gif_url)
                 await interaction.response.send_message(embed=embed)
-                return
             else:
                 await interaction.response.send_message(
                     "No fishing GIFs found in the database.", ephemeral=False
                 )
-                return
-        if reward < 0.85:
-            earned = int(randint(10, 30) * multiplier)
-            safe_add_coins(uid, earned)
-            set_timestamp(uid, "last_fishing", now)
-            gif_url = choice(fish_gifs)
-            if gif_url:
-                embed = discord.Embed(
-                    title=f"{interaction.user.display_name} has fished {earned} clubhall coins",
-                    color=discord.Color.red(),
+
+    @bot.tree.command(name="buyrod", description="Buy a fishing rod")
+    @app_commands.describe(level="Rod level to buy")
+    async def buyrod(interaction: discord.Interaction, level: int):
+        uid = str(interaction.user.id)
+        await db.register_user(uid, interaction.user.display_name)
+        async with user_lock(uid):
+            if level not in rod_shop:
+                await interaction.response.send_message(
+                    "This rod is not available.", ephemeral=True
                 )
-                embed.set_image(url=gif_url)
-                await interaction.response.send_message(embed=embed)
                 return
-            else:
+            price, _ = rod_shop[level]
+            balance = await db.get_money(uid)
+            if balance < price:
                 await interaction.response.send_message(
-                    "No fishing GIFs found in the database.", ephemeral=False
+                    f"❌ Not enough coins. ({price} required)", ephemeral=True
                 )
                 return
-        else:
-            earned = int(randint(45, 115) * multiplier)
-            safe_add_coins(uid, earned)
-            set_timestamp(uid, "last_fishing", now)
-            gif_url = choice(fish_gifs)
-            if gif_url:
-                embed = discord.Embed(
-                    title=f"{interaction.user.display_name} has fished {earned} clubhall coins",
-                    color=discord.Color.red(),
+            current_level = await db.get_rod_level(uid)
+            if level <= current_level:
+                await interaction.response.send_message(
+                    "You already have this rod or better.", ephemeral=True
                 )
-                embed.set_image(url=gif_url)
-                await interaction.response.send_message(embed=embed)
                 return
-            else:
+            if await db.buy_rod(uid, level, price) is None:
                 await interaction.response.send_message(
-                    "No fishing GIFs found in the database.", ephemeral=False
+                    f"❌ Not enough coins. ({price} required)", ephemeral=True
                 )
                 return
-
-    @bot.tree.command(name="buyrod", description="Buy a fishing rod")
-    @app_commands.describe(level="Rod level to buy")
-    async def buyrod(interaction: discord.Interaction, level: int):
-        uid = str(interaction.user.id)
-        register_user(uid, interaction.user.display_name)
-        if level not in rod_shop:
-            await interaction.response.send_message(
-                "This rod is not available.", ephemeral=True
-            )
-            return
-        price, _ = rod_shop[level]
-        balance = get_money(uid)
-        if balance < price:
-            await interaction.response.send_message(
-                f"❌ Not enough coins. ({price} required)", ephemeral=True
-            )
-            return
-        current_level = get_rod_level(uid)
-        if level <= current_level:
-            await interaction.response.send_message(
-                "You already have this rod or better.", ephemeral=True
-            )
-            return
-        set_money(uid, balance - price)
-        set_rod_level(uid, level)
-        await interaction.response.send_message(f"🎣 You bought Rod {level}!")
+            await interaction.response.send_message(f"🎣 You bought Rod {level}!")
 
     # Dynamic rod additions are disabled; rods are defined in code (config.ROD_SHOP).
 
@@ -303,8 +259,8 @@ def setup(bot: commands.Bot, shop: dict[int, tuple[int, float]]):
         interaction: discord.Interaction, user: discord.Member | None = None
     ):
         target = user or interaction.user
-        register_user(str(target.id), target.display_name)
-        rod_level = get_rod_level(str(target.id))
+        await db.register_user(str(target.id), target.display_name)
+        rod_level = await db.get_rod_level(str(target.id))
         multiplier = get_rod_multiplier(rod_level)
         if rod_level == 0:
             desc = "You don't own a fishing rod."
@@ -339,23 +295,18 @@ def setup(bot: commands.Bot, shop: dict[int, tuple[int, float]]):
             return
 
         uid = str(interaction.user.id)
-        register_user(uid, interaction.user.display_name)
-        userstats = get_stats(uid)
-        if amount > userstats[stat]:
+        await db.register_user(uid, interaction.user.display_name)
+        async with user_lock(uid):
+            endMoney = await db.refund_stat(uid, stat, amount, REFUND_COINS_PER_POINT)
+            if endMoney is None:
+                await interaction.response.send_message(
+                    "You dont have enough stat points on this stat.", ephemeral=True
+                )
+                return
             await interaction.response.send_message(
-                "You dont have enough stat points on this stat.", ephemeral=True
+                f"✅ Removed from {interaction.user.display_name}'s **{stat}** **{amount}** stats points and added **{endMoney}** coins to your balance.",
+                ephemeral=True,
             )
-            return
-        rest = userstats[stat] - amount
-        startMoney = get_money(uid)
-        endMoney = startMoney + (amount * 49)
-        set_money(uid, endMoney)
-        _execute = __import__("db.DBHelper", fromlist=["_execute"])._execute
-        _execute(f"UPDATE users SET {stat} = ? WHERE user_id = ?", (rest, uid))
-        await interaction.response.send_message(
-            f"✅ Removed from {interaction.user.display_name}'s **{stat}** **{amount}** stats points and added **{endMoney}** coins to your balance.",
-            ephemeral=True,
-        )
 
     @bot.tree.command(
         name="logmessages",
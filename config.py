@@ -1,13 +1,58 @@
 DB_PATH = "users.db"
+# SQLite tuning for the long-lived connections in db/connection.py
+DB_SYNCHRONOUS = "NORMAL"  # OFF / NORMAL / FULL / EXTRA
+DB_MMAP_SIZE = 256 * 1024 * 1024  # bytes
+DB_CACHE_SIZE = -64_000  # negative = KiB, positive = pages
+# async facade in db/async_db.py
+DB_READER_THREADS = 4
+DB_QUEUE_SIZE = 256  # max queued + running DB calls
+DB_SLOW_WAIT_SECONDS = 1.0  # log calls that waited longer than this
+KNOWN_USERS_CACHE_SIZE = 50_000  # register_user skips the DB for these
+LEADERBOARD_CACHE_SIZE = 50  # /topcoins entries served from memory
+DB_FLUSH_SECONDS = 10  # how often buffered last-seen/message-log/cooldown writes land
+SCHEDULER_LOOKAHEAD_SECONDS = 3600  # jobs due this soon are kept in memory
+SCHEDULER_RETRY_SECONDS = 30  # first retry of a failed job; doubles each time
+SCHEDULER_MAX_ATTEMPTS = 5  # failed runs before a job is dropped
+GIVEAWAY_REROLL_DAYS = 7  # entries of an ended giveaway are kept this long for /reroll
+SNAPSHOT_INTERVAL_SECONDS = 300  # how often guild roles/channels are snapshotted
+SNAPSHOT_RETENTION_DAYS = 7  # deleted objects stay restorable this long
+POKER_ODDS_WORKERS = 2  # processes running /pokerodds simulations
+POKER_ODDS_BUDGET_SECONDS = 1.0  # /pokerodds simulates for at most this long
+POKER_ODDS_CACHE_SIZE = 1024  # situations whose odds are kept in memory
 DAILY_REWARD = 20
+DAILY_COOLDOWN_HOURS = 24
 STAT_PRICE = 66
 QUEST_COOLDOWN_HOURS = 3
 FISHING_COOLDOWN_MINUTES = 30
 WEEKLY_REWARD = 50
+WEEKLY_COOLDOWN_DAYS = 7
 SUPERPOWER_COST = 80_000
 SUPERPOWER_COOLDOWN_HOURS = 24
 STAT_NAMES = ["intelligence", "strength", "stealth"]
 
+# Payouts. scripts/simulate_economy.py reads these as well, so tune them here.
+QUEST_STAT_POINTS = (1, 3)  # randint range per quest
+REFUND_COINS_PER_POINT = 49  # /refund pays this per stat point
+# /gamble: the first band whose upper roll bound is above the roll decides
+# the payout as a multiple of the bet; rolls past the last band lose the bet
+GAMBLE_BANDS = [(0.05, 3), (0.30, 2), (0.60, 1)]
+CASINO_WIN_CHANCE = 0.5  # /casino pays 1:1
+# /fishing: (upper roll bound, "stat_points" or "coins", low, high); the
+# randint(low, high) amount is multiplied by the rod multiplier
+FISHING_REWARDS = [
+    (0.50, "stat_points", 1, 5),
+    (0.85, "coins", 10, 30),
+    (1.00, "coins", 45, 115),
+]
+ACTION_MIN_STAT = 3  # stealth / intelligence / strength needed for steal, hack, fight
+ACTION_COOLDOWN_MINUTES = 45  # per command, for steal, hack and fight
+STEAL_PCT = (0.05, 0.02, 0.25)  # base, per stealth level above target, cap
+HACK_CHANCE = (0.20, 0.05, 0.80)  # base, per intelligence level above 3, cap
+HACK_REWARD = (5, 12)  # randint(...) * intelligence // 2 on success
+HACK_LOSS = (1, 5)  # randint(...) * intelligence on failure
+FIGHT_PCT = (0.05, 0.03, 0.20)  # base, per strength level above target, cap
+FIGHT_PENALTY_PCT = 0.10  # of the attacker's coins, paid to the target on a loss
+
 ROLE_THRESHOLDS = {
     "intelligence": ("Neuromancer", 50),
     "strength": ("Warriour", 100),
@@ -1,43 +1,107 @@
+import atexit
+import json
+import random
 import sqlite3
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timezone
 from typing import Dict, List, Optional, Tuple
-from config import DB_PATH, STAT_NAMES, ROD_SHOP
+from config import (
+    DB_PATH,
+    STAT_NAMES,
+    ROD_SHOP,
+    KNOWN_USERS_CACHE_SIZE,
+    LEADERBOARD_CACHE_SIZE,
+    SNAPSHOT_RETENTION_DAYS,
+)
+from db.connection import connections
+from db.cooldowns import CooldownStore
+from db.guild_config import COLUMNS as GUILD_COLUMNS, GuildConfig, GuildConfigCache
+from db.leaderboard import TopK
+from db.guild_cache import GuildCache
+from db.anti_nuke_policy import AntiNukePolicy
+from matchers import TriggerIndex, WordMatcher, compile_trigger
+
+
+def _conn() -> sqlite3.Connection:
+    return connections.get(DB_PATH)
 
 
 def _fetchone(query: str, params=()):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute(query, params)
-    row = cursor.fetchone()
-    conn.close()
-    return row
+    return _conn().execute(query, params).fetchone()
 
 
-def _execute(query: str, params=()):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute(query, params)
-    conn.commit()
-    conn.close()
+def _execute(query: str, params=()) -> int:
+    return _conn().execute(query, params).rowcount
+
+
+def _fetchall(query: str, params: tuple = ()) -> list[tuple]:
+    return _conn().execute(query, params).fetchall()
+
+
+def _transaction():
+    return connections.transaction(DB_PATH)
 
 
 # ---------- user registration ----------
 
+# (user_id, username) pairs known to be stored as-is; lets register_user skip
+# the database entirely for repeat callers.
+_known_users: "OrderedDict[str, str]" = OrderedDict()
+_known_users_lock = threading.Lock()
+
 
 def register_user(user_id: str, username: str):
-    user_exists = _fetchone("SELECT 1 FROM users WHERE user_id = ?", (user_id,))
-    if user_exists:
-        _execute("UPDATE users SET username = ? WHERE user_id = ?", (username, user_id))
-    else:
-        _execute(
-            "INSERT INTO users (user_id, username, money) VALUES (?,?,?)",
-            (user_id, username, 5),
-        )
-    if not _fetchone("SELECT 1 FROM dates WHERE user_id = ?", (user_id,)):
-        _execute(
-            "INSERT INTO dates (user_id, registered_date) VALUES (?,?)",
+    user_id = str(user_id)
+    with _known_users_lock:
+        if _known_users.get(user_id) == username:
+            _known_users.move_to_end(user_id)
+            return
+    with _transaction() as conn:
+        row = conn.execute(
+            "INSERT INTO users (user_id, username, money) VALUES (?, ?, 5) "
+            "ON CONFLICT(user_id) DO UPDATE SET username = excluded.username "
+            "WHERE username IS NOT excluded.username RETURNING money",
+            (user_id, username),
+        ).fetchone()
+        conn.execute(
+            "INSERT INTO dates (user_id, registered_date) VALUES (?, ?) "
+            "ON CONFLICT(user_id) DO NOTHING",
             (user_id, str(datetime.now(timezone.utc))),
         )
+    if row:
+        _leaderboard.update(user_id, row[0], username)
+    with _known_users_lock:
+        _known_users[user_id] = username
+        _known_users.move_to_end(user_id)
+        while len(_known_users) > KNOWN_USERS_CACHE_SIZE:
+            _known_users.popitem(last=False)
+
+
+def reset_caches():
+    """Drop every in-process cache, e.g. after switching ``DB_PATH``."""
+
+    global _reaction_roles, _reaction_roles_version
+    with _known_users_lock:
+        _known_users.clear()
+    _leaderboard.invalidate()
+    _guild_configs.clear()
+    _filter_matchers.invalidate()
+    with _last_seen_lock:
+        _last_seen.clear()
+    with _message_counts_lock:
+        _message_counts.clear()
+    with _entries_lock:
+        _entry_changes.clear()
+    with _reaction_roles_lock:
+        _reaction_roles_version += 1
+        _reaction_roles = None
+    _trigger_indexes.invalidate()
+    _anti_nuke_policies.invalidate()
+    with _snapshot_lock:
+        _snapshot_state.clear()
+    _cooldowns.reset()
 
 
 # ---------- coins ----------
@@ -55,15 +119,189 @@ def get_money(user_id: str) -> int:
 
 
 def set_money(user_id: str, amount: int):
-    _execute("UPDATE users SET money = ? WHERE user_id = ?", (amount, user_id))
+    if _fetchall(
+        "UPDATE users SET money = ? WHERE user_id = ? RETURNING 1", (amount, user_id)
+    ):
+        _leaderboard.update(str(user_id), amount, None)
+
+
+def add_coins(
+    user_id: str, delta: int, floor: Optional[int] = 0, clamp: bool = False
+) -> Optional[int]:
+    """Atomically add *delta* (may be negative) and return the new balance.
+
+    A change that would leave the balance below *floor* is refused and
+    ``None`` is returned; with ``clamp=True`` the balance is cut off at the
+    floor instead. ``floor=None`` disables the check. Unknown users give
+    ``None`` as well.
+    """
+
+    if floor is None:
+        rows = _fetchall(
+            "UPDATE users SET money = money + ? WHERE user_id = ? "
+            "RETURNING money, username",
+            (delta, user_id),
+        )
+    elif clamp:
+        rows = _fetchall(
+            "UPDATE users SET money = MAX(money + ?, MIN(money, ?)) "
+            "WHERE user_id = ? RETURNING money, username",
+            (delta, floor, user_id),
+        )
+    else:
+        rows = _fetchall(
+            "UPDATE users SET money = money + ? "
+            "WHERE user_id = ? AND money + ? >= ? RETURNING money, username",
+            (delta, user_id, delta, floor),
+        )
+    if not rows:
+        return None
+    money, username = rows[0]
+    _leaderboard.update(str(user_id), money, username)
+    return money
+
+
+def transfer(from_id: str, to_id: str, amount: int, partial: bool = False) -> int:
+    """Move coins from one user to another in a single transaction.
+
+    Returns the amount moved. The transfer is all-or-nothing (0 if the sender
+    cannot cover *amount*) unless *partial* is set, in which case a smaller
+    balance is moved in full.
+    """
+
+    from_id, to_id = str(from_id), str(to_id)
+    if amount <= 0 or from_id == to_id:
+        return 0
+    with _transaction() as conn:
+        row = conn.execute(
+            "SELECT money FROM users WHERE user_id = ?", (from_id,)
+        ).fetchone()
+        balance = row[0] if row else 0
+        moved = min(amount, balance) if partial else amount
+        if moved <= 0 or balance < moved:
+            return 0
+        if not conn.execute(
+            "SELECT 1 FROM users WHERE user_id = ?", (to_id,)
+        ).fetchone():
+            return 0
+        sender = conn.execute(
+            "UPDATE users SET money = money - ? WHERE user_id = ? "
+            "RETURNING money, username",
+            (moved, from_id),
+        ).fetchone()
+        receiver = conn.execute(
+            "UPDATE users SET money = money + ? WHERE user_id = ? "
+            "RETURNING money, username",
+            (moved, to_id),
+        ).fetchone()
+    _leaderboard.update(from_id, *sender)
+    _leaderboard.update(to_id, *receiver)
+    return moved
 
 
 def safe_add_coins(user_id: str, amount: int) -> int:
     if amount <= 0:
         return 0
-    old_balance = get_money(user_id)
-    set_money(user_id, old_balance + amount)
-    return amount
+    return amount if add_coins(user_id, amount) is not None else 0
+
+
+# ---------- holds ----------
+
+# Games take their stakes out of users.money into a hold when they start and
+# pay out when they end, so nothing that runs in between can spend the same
+# coins twice. Holds older than this process belong to games that died with
+# the previous one; release_stale_holds refunds them.
+_process_started = time.time()
+
+
+def reserve_hold(user_id: str, amount: int, reason: str) -> Optional[int]:
+    """Move *amount* from the balance into a new hold and return its id.
+
+    ``None`` if the balance cannot cover it.
+    """
+
+    user_id = str(user_id)
+    if amount <= 0:
+        return None
+    with _transaction() as conn:
+        row = conn.execute(
+            "UPDATE users SET money = money - ? WHERE user_id = ? AND money >= ? "
+            "RETURNING money, username",
+            (amount, user_id, amount),
+        ).fetchone()
+        if row is None:
+            return None
+        hold_id = conn.execute(
+            "INSERT INTO holds (user_id, amount, reason, created) VALUES (?, ?, ?, ?)",
+            (user_id, amount, reason, time.time()),
+        ).lastrowid
+    _leaderboard.update(user_id, *row)
+    return hold_id
+
+
+def _credit(conn: sqlite3.Connection, payouts: dict[str, int]) -> dict[str, tuple]:
+    return {
+        uid: row
+        for uid, coins in payouts.items()
+        if (
+            row := conn.execute(
+                "UPDATE users SET money = money + ? WHERE user_id = ? "
+                "RETURNING money, username",
+                (coins, uid),
+            ).fetchone()
+        )
+    }
+
+
+def settle_holds(hold_ids, payouts: dict[str, int]) -> Optional[dict[str, int]]:
+    """Close *hold_ids* and pay *payouts* (user id -> coins) in one transaction.
+
+    Payouts may be more than was held (the house pays) or less (the house
+    keeps the rest). Returns the new balance of every paid user, or ``None``
+    without paying anything if one of the holds is already closed.
+    """
+
+    hold_ids = set(hold_ids)
+    marks = ", ".join("?" * len(hold_ids))
+    payouts = {str(uid): coins for uid, coins in payouts.items()}
+    with _transaction() as conn:
+        (open_holds,) = conn.execute(
+            f"SELECT COUNT(*) FROM holds WHERE hold_id IN ({marks})", tuple(hold_ids)
+        ).fetchone()
+        if open_holds != len(hold_ids):
+            return None
+        conn.execute(f"DELETE FROM holds WHERE hold_id IN ({marks})", tuple(hold_ids))
+        rows = _credit(conn, payouts)
+    for uid, row in rows.items():
+        _leaderboard.update(uid, *row)
+    return {uid: row[0] for uid, row in rows.items()}
+
+
+def _refund_holds(where: str, params: tuple) -> int:
+    with _transaction() as conn:
+        refunds: dict[str, int] = {}
+        for uid, amount in conn.execute(
+            f"DELETE FROM holds WHERE {where} RETURNING user_id, amount", params
+        ).fetchall():
+            refunds[uid] = refunds.get(uid, 0) + amount
+        rows = _credit(conn, refunds)
+    for uid, row in rows.items():
+        _leaderboard.update(uid, *row)
+    return sum(refunds.values())
+
+
+def release_holds(hold_ids) -> int:
+    """Give the coins of still open *hold_ids* back; returns how many."""
+
+    hold_ids = tuple(set(hold_ids))
+    marks = ", ".join("?" * len(hold_ids))
+    return _refund_holds(f"hold_id IN ({marks})", hold_ids)
+
+
+def release_stale_holds() -> int:
+    """Refund holds left over from before this process started."""
+
+    return _refund_holds("created < ?", (_process_started,))
 
 
 def add_rod_to_shop(level: int, price: int, multiplier: float):
@@ -74,51 +312,29 @@ def add_rod_to_shop(level: int, price: int, multiplier: float):
 
 
 def get_all_rods_from_shop() -> dict:
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT level, price, multiplier FROM rod_shop")
-    rows = cursor.fetchall()
-    conn.close()
+    rows = _fetchall("SELECT level, price, multiplier FROM rod_shop")
     return {level: (price, multiplier) for level, price, multiplier in rows}
 
 
 def get_total_money():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT SUM(money) FROM users")
-    result = cursor.fetchone()
-    conn.close()
-    return result[0] if result[0] else 0
+    result = _fetchone(
+        "SELECT (SELECT TOTAL(money) FROM users) + (SELECT TOTAL(amount) FROM holds)"
+    )
+    return int(result[0])
 
 
-def get_top_users(limit: int = 10):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT username, money FROM users ORDER BY money DESC LIMIT ?", (limit,)
+def _load_top_users(limit: int) -> list[tuple[str, str, int]]:
+    return _fetchall(
+        "SELECT user_id, username, money FROM users ORDER BY money DESC LIMIT ?",
+        (limit,),
     )
-    rows = cursor.fetchall()
-    conn.close()
-    return rows
 
 
-def get_last_claim(user_id: str):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT last_claim FROM users WHERE user_id = ?", (user_id,))
-    row = cursor.fetchone()
-    conn.close()
-    return datetime.fromisoformat(row[0]) if row and row[0] else None
+_leaderboard = TopK(LEADERBOARD_CACHE_SIZE, _load_top_users)
 
 
-def set_last_claim(user_id: str, ts: datetime):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute(
-        "UPDATE users SET last_claim = ? WHERE user_id = ?", (ts.isoformat(), user_id)
-    )
-    conn.commit()
-    conn.close()
+def get_top_users(limit: int = 10):
+    return _leaderboard.top(limit)
 
 
 # ---------- stats & stat‑points ----------
@@ -141,82 +357,189 @@ def add_stat_points(user_id: str, delta: int):
     )
 
 
-def increase_stat(user_id: str, stat: str, amount: int):
+def increase_stat(user_id: str, stat: str, amount: int) -> bool:
+    """Move *amount* unspent points into *stat*; False if there are not enough."""
+
     if stat not in STAT_NAMES:
         raise ValueError("invalid stat")
-    _execute(
-        f"UPDATE users SET {stat} = {stat} + ?, stat_points = stat_points - ? WHERE user_id = ?",
-        (amount, amount, user_id),
+    return bool(
+        _execute(
+            f"UPDATE users SET {stat} = {stat} + ?, stat_points = stat_points - ? "
+            "WHERE user_id = ? AND stat_points >= ?",
+            (amount, amount, user_id, amount),
+        )
     )
 
 
+def refund_stat(user_id: str, stat: str, amount: int, rate: int) -> Optional[int]:
+    """Take *amount* points off *stat* and pay *rate* coins for each.
+
+    Both happen in one transaction; returns the new balance, or ``None`` if
+    the stat has fewer than *amount* points.
+    """
+
+    if stat not in STAT_NAMES:
+        raise ValueError("invalid stat")
+    user_id = str(user_id)
+    with _transaction() as conn:
+        if not conn.execute(
+            f"UPDATE users SET {stat} = {stat} - ? WHERE user_id = ? AND {stat} >= ? "
+            "RETURNING 1",
+            (amount, user_id, amount),
+        ).fetchone():
+            return None
+        row = conn.execute(
+            "UPDATE users SET money = money + ? WHERE user_id = ? "
+            "RETURNING money, username",
+            (amount * rate, user_id),
+        ).fetchone()
+    _leaderboard.update(user_id, *row)
+    return row[0]
+
+
+def set_stat_points(user_id: str, amount: int):
+    _execute("UPDATE users SET stat_points = ? WHERE user_id = ?", (amount, user_id))
+
+
+def set_stat(user_id: str, stat: str, amount: int):
+    if stat not in STAT_NAMES:
+        raise ValueError("invalid stat")
+    _execute(f"UPDATE users SET {stat} = ? WHERE user_id = ?", (amount, user_id))
+
+
 def get_rod_level(user_id: str) -> int:
     row = _fetchone("SELECT rod_level FROM fishing_rods WHERE user_id = ?", (user_id,))
     return row[0] if row else 0
 
 
-def set_rod_level(user_id: str, level: int):
-    if _fetchone("SELECT 1 FROM fishing_rods WHERE user_id = ?", (user_id,)):
-        _execute(
-            "UPDATE fishing_rods SET rod_level = ? WHERE user_id = ?", (level, user_id)
-        )
-    else:
-        _execute(
-            "INSERT INTO fishing_rods (user_id, rod_level) VALUES (?, ?)",
+def buy_rod(user_id: str, level: int, price: int) -> Optional[int]:
+    """Charge *price* and upgrade to rod *level* in one transaction.
+
+    Returns the new balance, or ``None`` (nothing charged) if the user
+    already owns this rod or a better one, or cannot pay.
+    """
+
+    user_id = str(user_id)
+    with _transaction() as conn:
+        row = conn.execute(
+            "SELECT rod_level FROM fishing_rods WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        if row and row[0] >= level:
+            return None
+        paid = conn.execute(
+            "UPDATE users SET money = money - ? WHERE user_id = ? AND money >= ? "
+            "RETURNING money, username",
+            (price, user_id, price),
+        ).fetchone()
+        if paid is None:
+            return None
+        conn.execute(
+            "INSERT INTO fishing_rods (user_id, rod_level) VALUES (?, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET rod_level = excluded.rod_level",
             (user_id, level),
         )
+    _leaderboard.update(user_id, *paid)
+    return paid[0]
 
 
-# ---------- timing helpers ----------
+# ---------- cooldowns ----------
 
 
-def get_timestamp(user_id: str, column: str):
-    row = _fetchone(f"SELECT {column} FROM users WHERE user_id = ?", (user_id,))
-    return datetime.fromisoformat(row[0]) if row and row[0] else None
+def _load_cooldowns(now: int) -> list[tuple[str, str, int]]:
+    return _fetchall(
+        "SELECT user_id, key, expires_at FROM cooldowns WHERE expires_at > ?", (now,)
+    )
 
 
-def set_timestamp(user_id: str, column: str, ts: datetime):
-    _execute(
-        f"UPDATE users SET {column} = ? WHERE user_id = ?", (ts.isoformat(), user_id)
-    )
+_cooldowns = CooldownStore(_load_cooldowns)
 
 
-def get_last_weekly(user_id: str):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT last_weekly FROM users WHERE user_id = ?", (user_id,))
-    row = cursor.fetchone()
-    conn.close()
-    return datetime.fromisoformat(row[0]) if row and row[0] else None
+def load_cooldowns() -> None:
+    _cooldowns.load()
 
 
-def set_last_weekly(user_id: str, ts: datetime):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute(
-        "UPDATE users SET last_weekly = ? WHERE user_id = ?", (ts.isoformat(), user_id)
-    )
-    conn.commit()
-    conn.close()
+def cooldowns_loaded() -> bool:
+    return _cooldowns.loaded
+
+
+def check_and_set_cooldown(user_id: str, key: str, seconds: int) -> int:
+    """Start the user's *key* cooldown unless one is running.
+
+    Returns the seconds left on the running cooldown, or 0 once the new one
+    of *seconds* has started. Memory only after the first call; the new
+    expiry is written by :func:`flush_cooldowns`.
+    """
+
+    return _cooldowns.check_and_set(str(user_id), key, seconds)
+
+
+def cooldown_remaining(user_id: str, key: str) -> int:
+    """Seconds left on the user's *key* cooldown, 0 if none is running.
+
+    For commands that start the cooldown only once an attempt succeeds.
+    """
+
+    return _cooldowns.remaining(str(user_id), key)
+
+
+def flush_cooldowns() -> int:
+    """Write new cooldowns and drop expired rows; returns the number written."""
+
+    pending = _cooldowns.take_dirty()
+    if not pending:
+        return 0
+    try:
+        with _transaction() as conn:
+            conn.executemany(
+                "INSERT INTO cooldowns (user_id, key, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(user_id, key) DO UPDATE SET expires_at = excluded.expires_at",
+                ((uid, key, expires) for (uid, key), expires in pending.items()),
+            )
+            conn.execute(
+                "DELETE FROM cooldowns WHERE expires_at <= ?", (int(time.time()),)
+            )
+    except Exception:
+        _cooldowns.restore_dirty(pending)
+        raise
+    return len(pending)
 
 
 # ---------- server helpers ----------
 
 
+def _load_guild_row(guild_id: str) -> Optional[tuple]:
+    return _fetchone(
+        f"SELECT {', '.join(GUILD_COLUMNS)} FROM server WHERE guild_id = ?",
+        (guild_id,),
+    )
+
+
+_guild_configs = GuildConfigCache(_load_guild_row)
+
+
 def _set_guild_value(guild_id: int, column: str, value: Optional[str]) -> None:
     _execute(
         f"INSERT INTO server (guild_id, {column}) VALUES (?, ?) "
         f"ON CONFLICT(guild_id) DO UPDATE SET {column}=excluded.{column}",
         (str(guild_id), value),
     )
+    _guild_configs.set(guild_id, column, value)
 
 
-def _get_guild_value(guild_id: int, column: str) -> Optional[str]:
-    row = _fetchone(
-        f"SELECT {column} FROM server WHERE guild_id = ?",
-        (str(guild_id),),
-    )
-    return row[0] if row and row[0] else None
+def get_guild_config(guild_id: int) -> GuildConfig:
+    """Return the guild's whole ``server`` row, loaded once and cached."""
+
+    return _guild_configs.get(guild_id)
+
+
+def cached_guild_config(guild_id: int) -> Optional[GuildConfig]:
+    """Return the cached config without touching the database, if present."""
+
+    return _guild_configs.peek(guild_id)
+
+
+def get_guild_config_stats() -> dict[str, int]:
+    return _guild_configs.stats()
 
 
 def set_welcome_channel(guild_id: int, cid: int) -> None:
@@ -224,8 +547,7 @@ def set_welcome_channel(guild_id: int, cid: int) -> None:
 
 
 def get_welcome_channel(guild_id: int) -> Optional[int]:
-    val = _get_guild_value(guild_id, "welcome_channel_id")
-    return int(val) if val else None
+    return get_guild_config(guild_id).welcome_channel_id
 
 
 def set_leave_channel(guild_id: int, cid: int) -> None:
@@ -233,8 +555,7 @@ def set_leave_channel(guild_id: int, cid: int) -> None:
 
 
 def get_leave_channel(guild_id: int) -> Optional[int]:
-    val = _get_guild_value(guild_id, "leave_channel_id")
-    return int(val) if val else None
+    return get_guild_config(guild_id).leave_channel_id
 
 
 def set_welcome_message(guild_id: int, msg: str) -> None:
@@ -242,7 +563,7 @@ def set_welcome_message(guild_id: int, msg: str) -> None:
 
 
 def get_welcome_message(guild_id: int) -> Optional[str]:
-    return _get_guild_value(guild_id, "welcome_message")
+    return get_guild_config(guild_id).welcome_message
 
 
 def set_leave_message(guild_id: int, msg: str) -> None:
@@ -250,7 +571,7 @@ def set_leave_message(guild_id: int, msg: str) -> None:
 
 
 def get_leave_message(guild_id: int) -> Optional[str]:
-    return _get_guild_value(guild_id, "leave_message")
+    return get_guild_config(guild_id).leave_message
 
 
 def set_booster_channel(guild_id: int, cid: int) -> None:
@@ -258,8 +579,7 @@ def set_booster_channel(guild_id: int, cid: int) -> None:
 
 
 def get_booster_channel(guild_id: int) -> Optional[int]:
-    val = _get_guild_value(guild_id, "booster_channel_id")
-    return int(val) if val else None
+    return get_guild_config(guild_id).booster_channel_id
 
 
 def set_booster_message(guild_id: int, msg: str) -> None:
@@ -267,7 +587,7 @@ def set_booster_message(guild_id: int, msg: str) -> None:
 
 
 def get_booster_message(guild_id: int) -> Optional[str]:
-    return _get_guild_value(guild_id, "booster_message")
+    return get_guild_config(guild_id).booster_message
 
 
 def set_log_channel(guild_id: int, cid: int) -> None:
@@ -275,8 +595,7 @@ def set_log_channel(guild_id: int, cid: int) -> None:
 
 
 def get_log_channel(guild_id: int) -> Optional[int]:
-    val = _get_guild_value(guild_id, "log_channel_id")
-    return int(val) if val else None
+    return get_guild_config(guild_id).log_channel_id
 
 
 def set_role(guild_id: int, name: str, role_id: int) -> None:
@@ -314,22 +633,11 @@ def remove_role(guild_id: int, name: str) -> None:
     )
 
 
-def _fetchall(query: str, params: tuple = ()) -> list[tuple]:
-    with sqlite3.connect(DB_PATH) as conn:
-        cursor = conn.cursor()
-        cursor.execute(query, params)
-        return cursor.fetchall()
-
-
 def get_roles(guild_id: int) -> dict[str, int]:
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute(
+    rows = _fetchall(
         "SELECT name, role_id FROM roles WHERE guild_id = ?",
         (str(guild_id),),
     )
-    rows = cursor.fetchall()
-    conn.close()
     return {name: int(rid) for name, rid in rows}
 
 
@@ -356,14 +664,10 @@ def remove_command_permission(guild_id: int, command: str) -> None:
 
 
 def get_command_permissions(guild_id: int) -> dict[str, int]:
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute(
+    rows = _fetchall(
         "SELECT command, role_id FROM command_permissions WHERE guild_id = ?",
         (str(guild_id),),
     )
-    rows = cursor.fetchall()
-    conn.close()
     return {cmd: int(rid) for cmd, rid in rows if rid is not None}
 
 
@@ -381,13 +685,13 @@ def remove_shop_role(role_id: int):
     _execute("DELETE FROM shop_roles WHERE role_id = ?", (role_id,))
 
 
+def get_shop_role_price(role_id: int) -> Optional[int]:
+    row = _fetchone("SELECT price FROM shop_roles WHERE role_id = ?", (role_id,))
+    return row[0] if row else None
+
+
 def get_shop_roles():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT role_id, price FROM shop_roles")
-    rows = cursor.fetchall()
-    conn.close()
-    return rows
+    return _fetchall("SELECT role_id, price FROM shop_roles")
 
 
 def get_custom_role(guild_id: int, user_id: str):
@@ -412,6 +716,55 @@ def delete_custom_role(guild_id: int, user_id: str):
     )
 
 
+# ---------- reaction role helpers ----------
+
+
+# {message_id: {emoji: role_id}} for every reaction-role message, loaded once
+_reaction_roles: Optional[dict[int, dict[str, int]]] = None
+_reaction_roles_lock = threading.Lock()
+_reaction_roles_version = 0
+
+
+def add_reaction_role(message_id: str, emoji: str, role_id: int):
+    global _reaction_roles_version
+    _execute(
+        "INSERT OR REPLACE INTO reaction_roles (message_id, emoji, role_id) VALUES (?, ?, ?)",
+        (str(message_id), emoji, str(role_id)),
+    )
+    with _reaction_roles_lock:
+        _reaction_roles_version += 1
+        if _reaction_roles is not None:
+            _reaction_roles.setdefault(int(message_id), {})[emoji] = int(role_id)
+
+
+def get_reaction_role_index() -> dict[int, dict[str, int]]:
+    """Return the reaction-role index, loading the whole table on first use."""
+
+    global _reaction_roles
+    with _reaction_roles_lock:
+        if _reaction_roles is not None:
+            return _reaction_roles
+        version = _reaction_roles_version
+    index: dict[int, dict[str, int]] = {}
+    for message_id, emoji, role_id in _fetchall(
+        "SELECT message_id, emoji, role_id FROM reaction_roles"
+    ):
+        index.setdefault(int(message_id), {})[emoji] = int(role_id)
+    with _reaction_roles_lock:
+        if _reaction_roles is None and _reaction_roles_version == version:
+            _reaction_roles = index
+    return index
+
+
+def cached_reaction_role_index() -> Optional[dict[int, dict[str, int]]]:
+    return _reaction_roles
+
+
+def get_reaction_role(message_id: int, emoji: str) -> Optional[int]:
+    roles = get_reaction_role_index().get(int(message_id))
+    return roles.get(emoji) if roles else None
+
+
 # ---------- anime title helpers ----------
 
 
@@ -434,6 +787,13 @@ def delete_anime_title(user_id: str):
 # ---------- giveaway helpers ----------
 
 
+# message ids of running giveaways; reactions on anything else are ignored
+_open_giveaways: set[str] = set()
+# message_id -> {user_id: entered?} not yet written to giveaway_entries
+_entry_changes: dict[str, dict[str, bool]] = {}
+_entries_lock = threading.Lock()
+
+
 def create_giveaway(
     message_id: str, channel_id: str, end_time: datetime, prize: str, winners: int
 ):
@@ -441,37 +801,207 @@ def create_giveaway(
         "INSERT OR REPLACE INTO giveaways (message_id, channel_id, end_time, prize, winners, finished) VALUES (?, ?, ?, ?, ?, 0)",
         (message_id, channel_id, end_time.isoformat(), prize, winners),
     )
+    with _entries_lock:
+        _open_giveaways.add(str(message_id))
 
 
 def finish_giveaway(message_id: str):
+    flush_giveaway_entries(message_id)
     _execute("UPDATE giveaways SET finished = 1 WHERE message_id = ?", (message_id,))
+    with _entries_lock:
+        _open_giveaways.discard(str(message_id))
 
 
 def get_active_giveaways():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute(
+    rows = _fetchall(
         "SELECT message_id, channel_id, end_time, prize, winners FROM giveaways WHERE finished = 0"
     )
-    rows = cursor.fetchall()
-    conn.close()
+    with _entries_lock:
+        _open_giveaways.update(str(row[0]) for row in rows)
     return rows
 
 
-def update_date(user_id: str, name: str):
-    if _fetchone("SELECT * FROM dates WHERE user_id = ?", (user_id,)):
-        _execute(
-            "UPDATE dates SET registered_date  = ? WHERE user_id = ?",
-            (
-                str(datetime.now(timezone.utc)),
-                user_id,
-            ),
+def get_giveaway(message_id: str):
+    return _fetchone(
+        "SELECT channel_id, prize, winners, finished FROM giveaways WHERE message_id = ?",
+        (str(message_id),),
+    )
+
+
+def record_giveaway_entry(message_id, user_id, entered: bool) -> bool:
+    """Buffer a 🎉 reaction change; memory only, safe on the event loop.
+
+    Returns ``False`` if *message_id* is not a running giveaway.
+    """
+
+    message_id = str(message_id)
+    with _entries_lock:
+        if message_id not in _open_giveaways:
+            return False
+        _entry_changes.setdefault(message_id, {})[str(user_id)] = entered
+    return True
+
+
+def _apply_entry_changes(conn, message_id: str, changes: dict[str, bool]) -> None:
+    # slots stay dense (0..n-1) so a draw can pick random slots directly
+    count = conn.execute(
+        "SELECT COUNT(*) FROM giveaway_entries WHERE message_id = ?", (message_id,)
+    ).fetchone()[0]
+    for user_id, entered in changes.items():
+        if entered:
+            count += conn.execute(
+                "INSERT OR IGNORE INTO giveaway_entries (message_id, user_id, slot) "
+                "VALUES (?, ?, ?)",
+                (message_id, user_id, count),
+            ).rowcount
+            continue
+        row = conn.execute(
+            "DELETE FROM giveaway_entries WHERE message_id = ? AND user_id = ? "
+            "RETURNING slot",
+            (message_id, user_id),
+        ).fetchone()
+        if row is None:
+            continue
+        count -= 1
+        if row[0] != count:
+            conn.execute(
+                "UPDATE giveaway_entries SET slot = ? WHERE message_id = ? AND slot = ?",
+                (row[0], message_id, count),
+            )
+
+
+def flush_giveaway_entries(message_id: Optional[str] = None) -> int:
+    """Write buffered entries (of one giveaway or all) in one transaction."""
+
+    with _entries_lock:
+        if message_id is None:
+            pending = dict(_entry_changes)
+            _entry_changes.clear()
+        else:
+            changes = _entry_changes.pop(str(message_id), None)
+            pending = {str(message_id): changes} if changes else {}
+    if not pending:
+        return 0
+    try:
+        with _transaction() as conn:
+            for mid, changes in pending.items():
+                _apply_entry_changes(conn, mid, changes)
+    except Exception:
+        with _entries_lock:
+            for mid, changes in pending.items():
+                newer = _entry_changes.get(mid, {})
+                _entry_changes[mid] = {**changes, **newer}
+        raise
+    return sum(len(changes) for changes in pending.values())
+
+
+def replace_giveaway_entries(message_id: str, user_ids: list[int]) -> None:
+    """Reset a giveaway's entrants, e.g. from a reaction crawl at startup."""
+
+    message_id = str(message_id)
+    with _entries_lock:
+        changes = _entry_changes.pop(message_id, {})
+    entrants = dict.fromkeys(str(uid) for uid in user_ids)
+    for uid, entered in changes.items():
+        if entered:
+            entrants[uid] = None
+        else:
+            entrants.pop(uid, None)
+    with _transaction() as conn:
+        conn.execute("DELETE FROM giveaway_entries WHERE message_id = ?", (message_id,))
+        conn.executemany(
+            "INSERT INTO giveaway_entries (message_id, user_id, slot) VALUES (?, ?, ?)",
+            ((message_id, uid, slot) for slot, uid in enumerate(entrants)),
         )
-    else:
-        register_user(user_id, name)
+
+
+def purge_giveaway_entries(before: datetime) -> int:
+    """Delete the entries of giveaways that finished before *before*."""
+
+    return _execute(
+        "DELETE FROM giveaway_entries WHERE message_id IN ("
+        "SELECT message_id FROM giveaways WHERE finished = 1 AND end_time < ?)",
+        (before.isoformat(),),
+    )
+
+
+def draw_giveaway_winners(message_id: str, winners: int) -> list[int]:
+    """Pick up to *winners* distinct entrants with an indexed slot lookup."""
+
+    message_id = str(message_id)
+    flush_giveaway_entries(message_id)
+    count = _fetchone(
+        "SELECT COUNT(*) FROM giveaway_entries WHERE message_id = ?", (message_id,)
+    )[0]
+    slots = random.sample(range(count), min(winners, count))
+    if not slots:
+        return []
+    rows = _fetchall(
+        "SELECT slot, user_id FROM giveaway_entries WHERE message_id = ? "
+        f"AND slot IN ({', '.join('?' * len(slots))})",
+        (message_id, *slots),
+    )
+    by_slot = dict(rows)
+    return [int(by_slot[s]) for s in slots]
+
+
+# user_id -> (username, last seen) not yet written to ``dates``
+_last_seen: dict[str, tuple[str, datetime]] = {}
+_last_seen_lock = threading.Lock()
+
+
+def record_activity(user_id: str, name: str) -> None:
+    """Note that a user was active; written by :func:`flush_last_seen`.
+
+    Memory only, so it is safe to call directly from the event loop.
+    """
+
+    with _last_seen_lock:
+        _last_seen[str(user_id)] = (name, datetime.now(timezone.utc))
+
+
+def flush_last_seen() -> int:
+    """Write buffered activity to ``dates`` in one transaction.
+
+    Users seen for the first time are registered with the usual starting
+    balance. Returns the number of users written.
+    """
+
+    global _last_seen
+    with _last_seen_lock:
+        pending, _last_seen = _last_seen, {}
+    if not pending:
+        return 0
+    try:
+        with _transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO users (user_id, username, money) "
+                "VALUES (?, ?, 5)",
+                ((uid, name) for uid, (name, _) in pending.items()),
+            )
+            registered = conn.total_changes - before
+            conn.executemany(
+                "INSERT INTO dates (user_id, registered_date) VALUES (?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE "
+                "SET registered_date = excluded.registered_date",
+                ((uid, str(ts)) for uid, (_, ts) in pending.items()),
+            )
+    except Exception:
+        with _last_seen_lock:
+            for uid, entry in pending.items():
+                _last_seen.setdefault(uid, entry)
+        raise
+    if registered:
+        _leaderboard.invalidate()
+    return len(pending)
 
 
 def get_lastdate(user_id: str):
+    with _last_seen_lock:
+        entry = _last_seen.get(str(user_id))
+    if entry is not None:
+        return str(entry[1])
     row = _fetchone("SELECT registered_date FROM dates WHERE user_id = ?", (user_id,))
     return row[0] if row else "No date found"
 
@@ -484,6 +1014,7 @@ def add_filtered_word(guild_id: int, word: str):
         "INSERT OR IGNORE INTO filtered_words (guild_id, word) VALUES (?, ?)",
         (str(guild_id), word.lower()),
     )
+    _filter_matchers.invalidate(guild_id)
 
 
 def remove_filtered_word(guild_id: int, word: str):
@@ -491,73 +1022,119 @@ def remove_filtered_word(guild_id: int, word: str):
         "DELETE FROM filtered_words WHERE guild_id = ? AND word = ?",
         (str(guild_id), word.lower()),
     )
+    _filter_matchers.invalidate(guild_id)
 
 
 def get_filtered_words(guild_id: int) -> list[str]:
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute(
+    rows = _fetchall(
         "SELECT word FROM filtered_words WHERE guild_id = ?", (str(guild_id),)
     )
-    rows = cursor.fetchall()
-    conn.close()
     return [row[0] for row in rows]
 
 
+# compiled matcher per guild, dropped whenever the guild's word list changes
+_filter_matchers: GuildCache[WordMatcher] = GuildCache(
+    lambda guild_id: WordMatcher(get_filtered_words(guild_id))
+)
+
+
+def get_filter_matcher(guild_id: int) -> WordMatcher:
+    """Return the guild's compiled filter-word matcher, building it once."""
+
+    return _filter_matchers.get(guild_id)
+
+
+def cached_filter_matcher(guild_id: int) -> Optional[WordMatcher]:
+    return _filter_matchers.peek(guild_id)
+
+
 # ---------- trigger response helpers ----------
 
 
-def add_trigger_response(trigger: str, response: str, guild_id: int):
+def add_trigger_response(
+    trigger: str, response: str, guild_id: int, mode: str = "substring"
+):
+    """Store a trigger; raises ``ValueError`` for a bad mode or regex."""
+
+    compile_trigger(trigger, mode)
+    if mode != "regex":
+        trigger = trigger.lower()
     _execute(
-        "INSERT OR REPLACE INTO trigger_responses (guild_id, trigger, response) VALUES (?, ?, ?)",
-        (str(guild_id), trigger.lower(), response),
+        "INSERT OR REPLACE INTO trigger_responses (guild_id, trigger, response, mode) "
+        "VALUES (?, ?, ?, ?)",
+        (str(guild_id), trigger, response, mode),
     )
+    _trigger_indexes.invalidate(guild_id)
 
 
 def remove_trigger_response(trigger: str, guild_id: int) -> bool:
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute(
-        "DELETE FROM trigger_responses WHERE guild_id = ? AND trigger = ?",
-        (str(guild_id), trigger.lower()),
+    removed = _execute(
+        "DELETE FROM trigger_responses WHERE guild_id = ? AND trigger IN (?, ?)",
+        (str(guild_id), trigger, trigger.lower()),
     )
-    removed = cursor.rowcount > 0
-    conn.commit()
-    conn.close()
-    return removed
+    _trigger_indexes.invalidate(guild_id)
+    return removed > 0
 
 
 def get_trigger_responses(guild_id: int) -> dict:
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute(
+    rows = _fetchall(
         "SELECT trigger, response FROM trigger_responses WHERE guild_id = ?",
         (str(guild_id),),
     )
-    rows = cursor.fetchall()
-    conn.close()
     return {trigger: response for trigger, response in rows}
 
 
+def _build_trigger_index(guild_id: int) -> TriggerIndex:
+    return TriggerIndex(
+        _fetchall(
+            "SELECT trigger, response, mode FROM trigger_responses "
+            "WHERE guild_id = ?",
+            (str(guild_id),),
+        )
+    )
+
+
+_trigger_indexes: GuildCache[TriggerIndex] = GuildCache(_build_trigger_index)
+
+
+def get_trigger_index(guild_id: int) -> TriggerIndex:
+    """Return the guild's compiled trigger index, building it once."""
+
+    return _trigger_indexes.get(guild_id)
+
+
+def cached_trigger_index(guild_id: int) -> Optional[TriggerIndex]:
+    return _trigger_indexes.peek(guild_id)
+
+
 # ---------- message log helpers ----------
 
 
+# (guild_id, user_id) -> [username, messages] not yet written
+_message_counts: dict[tuple[int, str], list] = {}
+_message_counts_lock = threading.Lock()
+
+
+def _discard_message_counts(guild_id: int) -> None:
+    with _message_counts_lock:
+        for key in [k for k in _message_counts if k[0] == guild_id]:
+            del _message_counts[key]
+
+
 def start_message_log(guild_id: int, channel_id: int, end_time: datetime, top: int):
-    _execute(
-        "INSERT OR REPLACE INTO message_logs (guild_id, channel_id, end_time, top) VALUES (?, ?, ?, ?)",
-        (guild_id, channel_id, end_time.isoformat(), top),
-    )
-    _execute("DELETE FROM message_log_counts WHERE guild_id = ?", (guild_id,))
+    _discard_message_counts(guild_id)
+    with _transaction() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO message_logs (guild_id, channel_id, end_time, top) VALUES (?, ?, ?, ?)",
+            (guild_id, channel_id, end_time.isoformat(), top),
+        )
+        conn.execute("DELETE FROM message_log_counts WHERE guild_id = ?", (guild_id,))
 
 
 def get_active_message_logs():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute(
+    rows = _fetchall(
         "SELECT guild_id, channel_id, end_time, top FROM message_logs",
     )
-    rows = cursor.fetchall()
-    conn.close()
     return [
         (int(gid), int(cid), datetime.fromisoformat(end), int(tp))
         for gid, cid, end, tp in rows
@@ -565,49 +1142,117 @@ def get_active_message_logs():
 
 
 def increment_message_log(guild_id: int, user_id: str, username: str):
-    _execute(
-        """
-        INSERT INTO message_log_counts (guild_id, user_id, username, count)
-        VALUES (?, ?, ?, 1)
-        ON CONFLICT(guild_id, user_id)
-        DO UPDATE SET count = count + 1, username = excluded.username
-        """,
-        (guild_id, user_id, username),
-    )
+    """Count one message; memory only until :func:`flush_message_logs`."""
+
+    with _message_counts_lock:
+        entry = _message_counts.get((guild_id, user_id))
+        if entry is None:
+            _message_counts[(guild_id, user_id)] = [username, 1]
+        else:
+            entry[0] = username
+            entry[1] += 1
+
+
+def flush_message_logs(guild_id: Optional[int] = None) -> int:
+    """Add buffered counts (of one guild or all) with one batched upsert."""
+
+    with _message_counts_lock:
+        if guild_id is None:
+            pending = dict(_message_counts)
+            _message_counts.clear()
+        else:
+            pending = {
+                k: _message_counts.pop(k)
+                for k in [k for k in _message_counts if k[0] == guild_id]
+            }
+    if not pending:
+        return 0
+    try:
+        with _transaction() as conn:
+            conn.executemany(
+                """
+                INSERT INTO message_log_counts (guild_id, user_id, username, count)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(guild_id, user_id)
+                DO UPDATE SET count = count + excluded.count,
+                              username = excluded.username
+                """,
+                (
+                    (gid, uid, name, count)
+                    for (gid, uid), (name, count) in pending.items()
+                ),
+            )
+    except Exception:
+        with _message_counts_lock:
+            for key, (name, count) in pending.items():
+                entry = _message_counts.setdefault(key, [name, 0])
+                entry[1] += count
+        raise
+    return len(pending)
 
 
 def get_message_log_counts(guild_id: int, top: int):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute(
+    return _fetchall(
         """
         SELECT username, count FROM message_log_counts
         WHERE guild_id = ? ORDER BY count DESC LIMIT ?
         """,
         (guild_id, top),
     )
-    rows = cursor.fetchall()
-    conn.close()
-    return rows
 
 
 def clear_message_log(guild_id: int):
-    _execute("DELETE FROM message_logs WHERE guild_id = ?", (guild_id,))
-    _execute("DELETE FROM message_log_counts WHERE guild_id = ?", (guild_id,))
+    _discard_message_counts(guild_id)
+    with _transaction() as conn:
+        conn.execute("DELETE FROM message_logs WHERE guild_id = ?", (guild_id,))
+        conn.execute("DELETE FROM message_log_counts WHERE guild_id = ?", (guild_id,))
 
 
 # ---------- anti nuke helpers ----------
 
 
+def _load_anti_nuke_policy(guild_id) -> AntiNukePolicy:
+    gid = str(guild_id)
+    rows = _fetchall(
+        """
+        SELECT 'setting', category, enabled, threshold, punishment, duration
+        FROM anti_nuke_settings WHERE guild_id = ?
+        UNION ALL
+        SELECT 'user', user_id, NULL, NULL, NULL, NULL
+        FROM anti_nuke_safe_users WHERE guild_id = ?
+        UNION ALL
+        SELECT 'role', role_id, NULL, NULL, NULL, NULL
+        FROM anti_nuke_safe_roles WHERE guild_id = ?
+        UNION ALL
+        SELECT 'log', channel_id, NULL, NULL, NULL, NULL
+        FROM anti_nuke_log_channel WHERE guild_id = ?
+        UNION ALL
+        SELECT 'lockdown', enabled, NULL, NULL, NULL, NULL
+        FROM anti_nuke_lockdown WHERE guild_id = ?
+        """,
+        (gid, gid, gid, gid, gid),
+    )
+    return AntiNukePolicy.from_rows(rows)
+
+
+_anti_nuke_policies: GuildCache[AntiNukePolicy] = GuildCache(_load_anti_nuke_policy)
+
+
+def get_anti_nuke_policy(guild_id: int) -> AntiNukePolicy:
+    """Return the guild's anti-nuke settings, safe lists and log channel."""
+
+    return _anti_nuke_policies.get(guild_id)
+
+
+def cached_anti_nuke_policy(guild_id: int) -> Optional[AntiNukePolicy]:
+    return _anti_nuke_policies.peek(guild_id)
+
+
 def get_anti_nuke_setting(
     category: str, guild_id: int
 ) -> Optional[Tuple[int, int, str, Optional[int]]]:
 
-    row = _fetchone(
-        "SELECT enabled, threshold, punishment, duration FROM anti_nuke_settings WHERE guild_id = ? AND category = ?",
-        (str(guild_id), category),
-    )
-    return row if row else None
+    return get_anti_nuke_policy(guild_id).settings.get(category)
 
 
 def set_anti_nuke_setting(
@@ -622,6 +1267,7 @@ def set_anti_nuke_setting(
         "INSERT OR REPLACE INTO anti_nuke_settings (guild_id, category, enabled, threshold, punishment, duration) VALUES (?, ?, ?, ?, ?, ?)",
         (str(guild_id), category, enabled, threshold, punishment, duration),
     )
+    _anti_nuke_policies.invalidate(guild_id)
 
 
 def add_safe_user(guild_id: int, uid: int) -> None:
@@ -629,6 +1275,7 @@ def add_safe_user(guild_id: int, uid: int) -> None:
         "INSERT OR IGNORE INTO anti_nuke_safe_users (guild_id, user_id) VALUES (?, ?)",
         (str(guild_id), str(uid)),
     )
+    _anti_nuke_policies.invalidate(guild_id)
 
 
 def remove_safe_user(guild_id: int, uid: int) -> None:
@@ -636,19 +1283,12 @@ def remove_safe_user(guild_id: int, uid: int) -> None:
         "DELETE FROM anti_nuke_safe_users WHERE guild_id = ? AND user_id = ?",
         (str(guild_id), str(uid)),
     )
+    _anti_nuke_policies.invalidate(guild_id)
 
 
 def get_safe_users(guild_id: int) -> List[int]:
 
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT user_id FROM anti_nuke_safe_users WHERE guild_id = ?",
-        (str(guild_id),),
-    )
-    rows = cursor.fetchall()
-    conn.close()
-    return [int(r[0]) for r in rows]
+    return sorted(get_anti_nuke_policy(guild_id).safe_users)
 
 
 def add_safe_role(guild_id: int, rid: int) -> None:
@@ -656,6 +1296,7 @@ def add_safe_role(guild_id: int, rid: int) -> None:
         "INSERT OR IGNORE INTO anti_nuke_safe_roles (guild_id, role_id) VALUES (?, ?)",
         (str(guild_id), str(rid)),
     )
+    _anti_nuke_policies.invalidate(guild_id)
 
 
 def remove_safe_role(guild_id: int, rid: int) -> None:
@@ -663,19 +1304,12 @@ def remove_safe_role(guild_id: int, rid: int) -> None:
         "DELETE FROM anti_nuke_safe_roles WHERE guild_id = ? AND role_id = ?",
         (str(guild_id), str(rid)),
     )
+    _anti_nuke_policies.invalidate(guild_id)
 
 
 def get_safe_roles(guild_id: int) -> List[int]:
 
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT role_id FROM anti_nuke_safe_roles WHERE guild_id = ?",
-        (str(guild_id),),
-    )
-    rows = cursor.fetchall()
-    conn.close()
-    return [int(r[0]) for r in rows]
+    return sorted(get_anti_nuke_policy(guild_id).safe_roles)
 
 
 def set_anti_nuke_log_channel(guild_id: int, cid: int) -> None:
@@ -683,14 +1317,19 @@ def set_anti_nuke_log_channel(guild_id: int, cid: int) -> None:
         "INSERT OR REPLACE INTO anti_nuke_log_channel (guild_id, channel_id) VALUES (?, ?)",
         (str(guild_id), str(cid)),
     )
+    _anti_nuke_policies.invalidate(guild_id)
 
 
 def get_anti_nuke_log_channel(guild_id: int) -> Optional[int]:
-    row = _fetchone(
-        "SELECT channel_id FROM anti_nuke_log_channel WHERE guild_id = ?",
-        (str(guild_id),),
+    return get_anti_nuke_policy(guild_id).log_channel_id
+
+
+def set_anti_nuke_lockdown(guild_id: int, enabled: bool) -> None:
+    _execute(
+        "INSERT OR REPLACE INTO anti_nuke_lockdown (guild_id, enabled) VALUES (?, ?)",
+        (str(guild_id), int(enabled)),
     )
-    return int(row[0]) if row else None
+    _anti_nuke_policies.invalidate(guild_id)
 
 
 # ---------- prison setup ----------
@@ -727,3 +1366,169 @@ def get_prison_role(guild_id: int) -> Optional[int]:
         (str(guild_id),),
     )
     return int(row[0]) if row and row[0] else None
+
+
+# ---------- scheduled jobs ----------
+
+
+def schedule_job(key: str, job_type: str, due: float, payload: dict) -> None:
+    _execute(
+        "INSERT OR REPLACE INTO scheduled_jobs (key, job_type, due, payload) "
+        "VALUES (?, ?, ?, ?)",
+        (key, job_type, due, json.dumps(payload)),
+    )
+
+
+def cancel_job(key: str) -> bool:
+    return _execute("DELETE FROM scheduled_jobs WHERE key = ?", (key,)) > 0
+
+
+def complete_job(key: str, due: float) -> None:
+    # a job rescheduled while it was running keeps its new row
+    _execute("DELETE FROM scheduled_jobs WHERE key = ? AND due = ?", (key, due))
+
+
+def retry_job(
+    key: str, due: float, max_attempts: int, backoff: float
+) -> tuple[int, Optional[float]]:
+    """Count a failed run of a job and move it to its next attempt.
+
+    Returns the number of failed runs and the new due time, which is
+    *backoff* seconds away and doubles with each failure. The due time is
+    ``None`` once *max_attempts* runs have failed (the row is deleted) or if
+    the job was cancelled or replaced while it ran.
+    """
+
+    with _transaction() as conn:
+        row = conn.execute(
+            "SELECT attempts FROM scheduled_jobs WHERE key = ? AND due = ?",
+            (key, due),
+        ).fetchone()
+        if row is None:
+            return 0, None
+        attempts = row[0] + 1
+        if attempts >= max_attempts:
+            conn.execute("DELETE FROM scheduled_jobs WHERE key = ?", (key,))
+            return attempts, None
+        new_due = time.time() + backoff * 2 ** (attempts - 1)
+        conn.execute(
+            "UPDATE scheduled_jobs SET due = ?, attempts = ? WHERE key = ?",
+            (new_due, attempts, key),
+        )
+    return attempts, new_due
+
+
+def get_job_due(key: str) -> Optional[float]:
+    row = _fetchone("SELECT due FROM scheduled_jobs WHERE key = ?", (key,))
+    return row[0] if row else None
+
+
+def get_jobs_due_before(ts: float) -> list[tuple[str, str, float, dict]]:
+    rows = _fetchall(
+        "SELECT key, job_type, due, payload FROM scheduled_jobs "
+        "WHERE due <= ? ORDER BY due",
+        (ts,),
+    )
+    return [(key, jt, due, json.loads(payload)) for key, jt, due, payload in rows]
+
+
+def get_scheduled_job_counts() -> dict[str, int]:
+    rows = _fetchall("SELECT job_type, COUNT(*) FROM scheduled_jobs GROUP BY job_type")
+    return dict(rows)
+
+
+# ---------- guild snapshots ----------
+
+# guild_id -> {(kind, object_id): data} of live objects as last stored
+_snapshot_state: dict[str, dict[tuple[str, int], str]] = {}
+_snapshot_lock = threading.Lock()
+
+
+def save_guild_snapshot(
+    guild_id: int, objects: dict[tuple[str, int], str]
+) -> tuple[int, int]:
+    """Store a guild's roles/channels, writing only what changed.
+
+    *objects* maps ``(kind, object_id)`` to the serialized object. Rows
+    whose data differs from the previous snapshot are upserted, objects
+    that disappeared are marked deleted, and deleted rows older than
+    SNAPSHOT_RETENTION_DAYS are purged. Returns (written, deleted).
+    """
+
+    gid = str(guild_id)
+    with _snapshot_lock:
+        previous = _snapshot_state.get(gid)
+    if previous is None:
+        previous = {
+            (kind, int(oid)): data
+            for kind, oid, data in _fetchall(
+                "SELECT kind, object_id, data FROM guild_snapshots "
+                "WHERE guild_id = ? AND deleted_at IS NULL",
+                (gid,),
+            )
+        }
+    changed = [
+        (gid, kind, str(oid), data)
+        for (kind, oid), data in objects.items()
+        if previous.get((kind, oid)) != data
+    ]
+    now = time.time()
+    gone = [(now, gid, kind, str(oid)) for kind, oid in previous.keys() - objects]
+    if changed or gone:
+        with _transaction() as conn:
+            conn.executemany(
+                "INSERT INTO guild_snapshots (guild_id, kind, object_id, data) "
+                "VALUES (?, ?, ?, ?) ON CONFLICT(guild_id, kind, object_id) "
+                "DO UPDATE SET data = excluded.data, deleted_at = NULL",
+                changed,
+            )
+            conn.executemany(
+                "UPDATE guild_snapshots SET deleted_at = ? "
+                "WHERE guild_id = ? AND kind = ? AND object_id = ?",
+                gone,
+            )
+            conn.execute(
+                "DELETE FROM guild_snapshots WHERE guild_id = ? AND deleted_at < ?",
+                (gid, now - SNAPSHOT_RETENTION_DAYS * 86400),
+            )
+    with _snapshot_lock:
+        _snapshot_state[gid] = dict(objects)
+    return len(changed), len(gone)
+
+
+def get_deleted_snapshot(guild_id: int, since: float) -> list[tuple[str, int, str]]:
+    """(kind, object_id, data) of objects deleted at or after *since*."""
+
+    rows = _fetchall(
+        "SELECT kind, object_id, data FROM guild_snapshots "
+        "WHERE guild_id = ? AND deleted_at >= ?",
+        (str(guild_id), since),
+    )
+    return [(kind, int(oid), data) for kind, oid, data in rows]
+
+
+def forget_snapshot_objects(guild_id: int, objects: list[tuple[str, int]]) -> None:
+    """Drop deleted objects that were restored under new ids."""
+
+    with _transaction() as conn:
+        conn.executemany(
+            "DELETE FROM guild_snapshots "
+            "WHERE guild_id = ? AND kind = ? AND object_id = ? "
+            "AND deleted_at IS NOT NULL",
+            [(str(guild_id), kind, str(oid)) for kind, oid in objects],
+        )
+
+
+# ---------- write-behind buffers ----------
+
+
+def flush_buffers() -> None:
+    """Write every buffered last-seen date, message-log count, entry and cooldown."""
+
+    flush_last_seen()
+    flush_message_logs()
+    flush_giveaway_entries()
+    flush_cooldowns()
+
+
+atexit.register(flush_buffers)
@@ -0,0 +1,68 @@
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Iterable, Mapping, NamedTuple, Optional
+
+
+class CategorySetting(NamedTuple):
+    enabled: int
+    threshold: int
+    punishment: str
+    duration: Optional[int]
+
+
+@dataclass(frozen=True)
+class AntiNukePolicy:
+    """Everything anti_nuke needs to judge an action in one guild.
+
+    Built from the ``anti_nuke_*`` tables in a single query (see
+    :meth:`from_rows`) and cached per guild until a setter changes them.
+    """
+
+    settings: Mapping[str, CategorySetting] = field(
+        default_factory=lambda: MappingProxyType({})
+    )
+    safe_users: frozenset[int] = frozenset()
+    safe_roles: frozenset[int] = frozenset()
+    log_channel_id: Optional[int] = None
+    lockdown: bool = False
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple]) -> "AntiNukePolicy":
+        """Build from ``(kind, key, enabled, threshold, punishment, duration)``."""
+
+        settings: dict[str, CategorySetting] = {}
+        users: set[int] = set()
+        roles: set[int] = set()
+        log_channel_id = None
+        lockdown = False
+        for kind, key, enabled, threshold, punishment, duration in rows:
+            if kind == "setting":
+                settings[key] = CategorySetting(
+                    enabled, threshold, punishment, duration
+                )
+            elif kind == "user":
+                users.add(int(key))
+            elif kind == "role":
+                roles.add(int(key))
+            elif kind == "log" and key:
+                log_channel_id = int(key)
+            elif kind == "lockdown":
+                lockdown = bool(key)
+        return cls(
+            MappingProxyType(settings),
+            frozenset(users),
+            frozenset(roles),
+            log_channel_id,
+            lockdown,
+        )
+
+    def active(self, category: str) -> Optional[CategorySetting]:
+        """The category's setting if it is enabled, else ``None``."""
+
+        setting = self.settings.get(category)
+        return setting if setting and setting.enabled else None
+
+    def is_safe(self, member) -> bool:
+        return member.id in self.safe_users or any(
+            r.id in self.safe_roles for r in member.roles
+        )
@@ -0,0 +1,180 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import db.DBHelper as DBHelper
+from config import DB_READER_THREADS, DB_QUEUE_SIZE, DB_SLOW_WAIT_SECONDS
+
+_READ_PREFIXES = ("get_", "_fetch")
+
+
+@dataclass(frozen=True)
+class QueueStats:
+    queued: int
+    running: int
+    calls: int
+    avg_wait_ms: float
+    max_wait_ms: float
+
+
+class AsyncDB:
+    """Awaitable facade over :mod:`db.DBHelper`.
+
+    ``await db.get_money(uid)`` runs the helper off the event loop. Writes go
+    through one dedicated writer thread, reads (``get_*`` helpers) through a
+    small reader pool. At most ``queue_size`` calls may be queued or running
+    at once; further callers wait for a free slot.
+    """
+
+    def __init__(
+        self, readers: int = DB_READER_THREADS, queue_size: int = DB_QUEUE_SIZE
+    ):
+        self._writer = ThreadPoolExecutor(1, thread_name_prefix="db-writer")
+        self._readers = ThreadPoolExecutor(readers, thread_name_prefix="db-reader")
+        self._queue_size = queue_size
+        self._slots: asyncio.Semaphore | None = None
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._calls = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def __getattr__(self, name: str):
+        func = getattr(DBHelper, name)
+        if not callable(func):
+            raise AttributeError(name)
+
+        async def call(*args, **kwargs):
+            return await self.run(func, *args, **kwargs)
+
+        call.__name__ = name
+        setattr(self, name, call)
+        return call
+
+    def _invoke(self, submitted: float, func: Callable, args, kwargs) -> Any:
+        wait = time.perf_counter() - submitted
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+            self._calls += 1
+            self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+        if wait > DB_SLOW_WAIT_SECONDS:
+            logging.warning(
+                "DB call %s waited %.2fs in queue", func.__name__, wait
+            )
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a DBHelper function on the reader pool or the writer thread."""
+
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self._queue_size)
+        is_read = func.__name__.startswith(_READ_PREFIXES)
+        executor = self._readers if is_read else self._writer
+        async with self._slots:
+            with self._lock:
+                self._queued += 1
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                executor, self._invoke, time.perf_counter(), func, args, kwargs
+            )
+
+    def record_activity(self, user_id, name: str) -> None:
+        """Buffer a last-seen update in memory; no await needed."""
+
+        DBHelper.record_activity(user_id, name)
+
+    def increment_message_log(self, guild_id: int, user_id: str, username: str):
+        """Buffer a /logmessages count in memory; no await needed."""
+
+        DBHelper.increment_message_log(guild_id, user_id, username)
+
+    def record_giveaway_entry(self, message_id, user_id, entered: bool) -> bool:
+        """Buffer a giveaway reaction in memory; no await needed."""
+
+        return DBHelper.record_giveaway_entry(message_id, user_id, entered)
+
+    async def check_and_set(self, user_id, key: str, seconds: int) -> int:
+        """Start a cooldown unless one is running; seconds left, or 0 if started.
+
+        The stored cooldowns are loaded on the writer thread the first time;
+        after that this is a dict lookup, no thread hop.
+        """
+
+        if not DBHelper.cooldowns_loaded():
+            await self.run(DBHelper.load_cooldowns)
+        return DBHelper.check_and_set_cooldown(user_id, key, seconds)
+
+    async def cooldown_remaining(self, user_id, key: str) -> int:
+        """Seconds left on a running cooldown, 0 if none; starts nothing."""
+
+        if not DBHelper.cooldowns_loaded():
+            await self.run(DBHelper.load_cooldowns)
+        return DBHelper.cooldown_remaining(user_id, key)
+
+    async def reaction_role(self, message_id: int, emoji: str):
+        """Role for a reaction, from the in-memory reaction-role index."""
+
+        index = await self._cached(
+            DBHelper.cached_reaction_role_index, DBHelper.get_reaction_role_index
+        )
+        roles = index.get(message_id)
+        return roles.get(emoji) if roles else None
+
+    async def _cached(self, peek: Callable, load: Callable, *args) -> Any:
+        value = peek(*args)
+        if value is None:
+            value = await self.run(load, *args)
+        return value
+
+    async def guild_config(self, guild_id: int) -> DBHelper.GuildConfig:
+        """Cached guild config; only a cache miss goes to a reader thread."""
+
+        return await self._cached(
+            DBHelper.cached_guild_config, DBHelper.get_guild_config, guild_id
+        )
+
+    async def filter_matcher(self, guild_id: int) -> DBHelper.WordMatcher:
+        """Compiled filter-word matcher, built on a reader thread on a miss."""
+
+        return await self._cached(
+            DBHelper.cached_filter_matcher, DBHelper.get_filter_matcher, guild_id
+        )
+
+    async def trigger_index(self, guild_id: int) -> DBHelper.TriggerIndex:
+        """Compiled trigger index, built on a reader thread on a miss."""
+
+        return await self._cached(
+            DBHelper.cached_trigger_index, DBHelper.get_trigger_index, guild_id
+        )
+
+    async def anti_nuke_policy(self, guild_id: int) -> DBHelper.AntiNukePolicy:
+        """Cached anti-nuke policy; a hit is a dict lookup, no thread hop."""
+
+        return await self._cached(
+            DBHelper.cached_anti_nuke_policy, DBHelper.get_anti_nuke_policy, guild_id
+        )
+
+    def stats(self) -> QueueStats:
+        with self._lock:
+            avg = self._total_wait / self._calls if self._calls else 0.0
+            return QueueStats(
+                queued=self._queued,
+                running=self._running,
+                calls=self._calls,
+                avg_wait_ms=avg * 1000,
+                max_wait_ms=self._max_wait * 1000,
+            )
+
+
+db = AsyncDB()
@@ -0,0 +1,84 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from config import DB_SYNCHRONOUS, DB_MMAP_SIZE, DB_CACHE_SIZE
+
+SYNCHRONOUS_LEVELS = {"OFF", "NORMAL", "FULL", "EXTRA"}
+
+
+class ConnectionManager:
+    """Hand out long-lived SQLite connections, one per thread and database.
+
+    Connections are opened lazily in autocommit mode with WAL journaling and
+    the configured ``synchronous``/``mmap_size``/``cache_size`` pragmas, and
+    stay open until :meth:`close` is called.  Multi-statement work should go
+    through :meth:`transaction`.
+    """
+
+    def __init__(
+        self,
+        synchronous: str = DB_SYNCHRONOUS,
+        mmap_size: int = DB_MMAP_SIZE,
+        cache_size: int = DB_CACHE_SIZE,
+    ):
+        synchronous = synchronous.upper()
+        if synchronous not in SYNCHRONOUS_LEVELS:
+            raise ValueError(f"invalid synchronous level: {synchronous}")
+        self.synchronous = synchronous
+        self.mmap_size = int(mmap_size)
+        self.cache_size = int(cache_size)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._thread_maps: list[dict[str, sqlite3.Connection]] = []
+
+    def _open(self, path: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        conn.execute(f"PRAGMA mmap_size={self.mmap_size}")
+        conn.execute(f"PRAGMA cache_size={self.cache_size}")
+        return conn
+
+    def get(self, path: str) -> sqlite3.Connection:
+        conns = getattr(self._local, "conns", None)
+        if conns is None:
+            conns = self._local.conns = {}
+            with self._lock:
+                self._thread_maps.append(conns)
+        conn = conns.get(path)
+        if conn is None:
+            conn = conns[path] = self._open(path)
+        return conn
+
+    @contextmanager
+    def transaction(self, path: str) -> Iterator[sqlite3.Connection]:
+        """Run a block inside ``BEGIN IMMEDIATE`` and commit or roll back."""
+
+        conn = self.get(path)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def close(self, path: Optional[str] = None) -> None:
+        """Close every open connection (or only those for *path*).
+
+        Must only be called while no other thread is using the connections,
+        e.g. on shutdown or when the test harness swaps databases.
+        """
+
+        with self._lock:
+            for conns in self._thread_maps:
+                for p in list(conns):
+                    if path is None or p == path:
+                        conns.pop(p).close()
+
+
+connections = ConnectionManager()
@@ -0,0 +1,103 @@
+import heapq
+import threading
+import time
+from typing import Callable, Iterable, Optional
+
+Key = tuple[str, str]  # (user_id, cooldown key such as "daily")
+
+
+class CooldownStore:
+    """Running cooldowns in memory, written behind to the ``cooldowns`` table.
+
+    ``loader`` returns the stored ``(user_id, key, expires_at)`` rows that
+    have not expired yet; it runs once, on first use. From then on memory is
+    authoritative: a key that is not held has no cooldown running, so
+    :meth:`check_and_set` never touches the database. Expired entries are
+    evicted through a heap ordered by expiry. Every new expiry is also kept
+    in a dirty map that :meth:`take_dirty` hands to the flusher.
+    """
+
+    def __init__(self, loader: Callable[[int], Iterable[tuple[str, str, int]]]):
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._expires: dict[Key, int] = {}
+        self._heap: list[tuple[int, str, str]] = []
+        self._dirty: dict[Key, int] = {}
+        self._loaded = False
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def load(self) -> None:
+        """Read the stored cooldowns unless that already happened."""
+
+        if self._loaded:
+            return
+        rows = list(self._loader(int(time.time())))
+        with self._lock:
+            if self._loaded:
+                return
+            for user_id, key, expires in rows:
+                self._put((user_id, key), expires)
+            self._loaded = True
+
+    def reset(self) -> None:
+        with self._lock:
+            self._expires.clear()
+            self._heap.clear()
+            self._dirty.clear()
+            self._loaded = False
+
+    def _put(self, key: Key, expires: int) -> None:
+        self._expires[key] = expires
+        heapq.heappush(self._heap, (expires, *key))
+
+    def _evict(self, now: int) -> None:
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            expires, user_id, key = heapq.heappop(heap)
+            if self._expires.get((user_id, key)) == expires:
+                del self._expires[(user_id, key)]
+
+    def check_and_set(
+        self, user_id: str, key: str, seconds: int, now: Optional[float] = None
+    ) -> int:
+        """Seconds left on a running cooldown, or 0 after starting a new one."""
+
+        self.load()
+        now = int(time.time() if now is None else now)
+        with self._lock:
+            self._evict(now)
+            expires = self._expires.get((user_id, key))
+            if expires is not None:
+                return expires - now
+            expires = now + seconds
+            self._put((user_id, key), expires)
+            self._dirty[(user_id, key)] = expires
+            return 0
+
+    def remaining(self, user_id: str, key: str, now: Optional[float] = None) -> int:
+        """Seconds left on a running cooldown, 0 if none; starts nothing."""
+
+        self.load()
+        now = int(time.time() if now is None else now)
+        with self._lock:
+            self._evict(now)
+            expires = self._expires.get((user_id, key))
+            return expires - now if expires is not None else 0
+
+    def take_dirty(self) -> dict[Key, int]:
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+        return dirty
+
+    def restore_dirty(self, dirty: dict[Key, int]) -> None:
+        """Put back entries whose write failed, unless newer ones exist."""
+
+        with self._lock:
+            for key, expires in dirty.items():
+                self._dirty.setdefault(key, expires)
+
+    def __len__(self) -> int:
+        return len(self._expires)
@@ -0,0 +1,43 @@
+import threading
+from typing import Callable, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class GuildCache(Generic[T]):
+    """Per-guild objects built from the database and dropped on writes.
+
+    ``build`` is called with the guild id on a miss. Writers call
+    :meth:`invalidate` after changing the underlying rows; a build that
+    raced with such a write is returned but not cached.
+    """
+
+    def __init__(self, build: Callable[[int], T]):
+        self._build = build
+        self._lock = threading.Lock()
+        self._items: dict[str, T] = {}
+        self._version = 0
+
+    def peek(self, guild_id) -> Optional[T]:
+        with self._lock:
+            return self._items.get(str(guild_id))
+
+    def get(self, guild_id) -> T:
+        key = str(guild_id)
+        with self._lock:
+            item = self._items.get(key)
+            version = self._version
+        if item is None:
+            item = self._build(guild_id)
+            with self._lock:
+                if self._version == version:
+                    self._items[key] = item
+        return item
+
+    def invalidate(self, guild_id=None) -> None:
+        with self._lock:
+            self._version += 1
+            if guild_id is None:
+                self._items.clear()
+            else:
+                self._items.pop(str(guild_id), None)
@@ -0,0 +1,102 @@
+import threading
+from dataclasses import dataclass, replace
+from typing import Callable, Optional
+
+# columns of the ``server`` table, in select order
+COLUMNS = (
+    "welcome_channel_id",
+    "leave_channel_id",
+    "welcome_message",
+    "leave_message",
+    "booster_channel_id",
+    "booster_message",
+    "log_channel_id",
+)
+_CHANNEL_COLUMNS = {c for c in COLUMNS if c.endswith("_channel_id")}
+
+
+@dataclass(frozen=True)
+class GuildConfig:
+    welcome_channel_id: Optional[int] = None
+    leave_channel_id: Optional[int] = None
+    welcome_message: Optional[str] = None
+    leave_message: Optional[str] = None
+    booster_channel_id: Optional[int] = None
+    booster_message: Optional[str] = None
+    log_channel_id: Optional[int] = None
+
+    @classmethod
+    def from_row(cls, row: Optional[tuple]) -> "GuildConfig":
+        if not row:
+            return cls()
+        return cls(**{c: _parse(c, v) for c, v in zip(COLUMNS, row)})
+
+    def with_value(self, column: str, value: Optional[str]) -> "GuildConfig":
+        return replace(self, **{column: _parse(column, value)})
+
+
+def _parse(column: str, value: Optional[str]):
+    if not value:
+        return None
+    return int(value) if column in _CHANNEL_COLUMNS else value
+
+
+class GuildConfigCache:
+    """Whole ``server`` rows cached per guild and updated write-through.
+
+    ``loader`` fetches a guild's row on a miss. Writers call :meth:`set`
+    after the row is stored; a load that raced with a write is discarded
+    instead of overwriting the newer value.
+    """
+
+    def __init__(self, loader: Callable[[str], Optional[tuple]]):
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._configs: dict[str, GuildConfig] = {}
+        self._version = 0
+        self.hits = 0
+        self.misses = 0
+
+    def peek(self, guild_id) -> Optional[GuildConfig]:
+        with self._lock:
+            cfg = self._configs.get(str(guild_id))
+            if cfg is not None:
+                self.hits += 1
+            return cfg
+
+    def get(self, guild_id) -> GuildConfig:
+        key = str(guild_id)
+        with self._lock:
+            cfg = self._configs.get(key)
+            if cfg is not None:
+                self.hits += 1
+                return cfg
+            self.misses += 1
+            version = self._version
+        cfg = GuildConfig.from_row(self._loader(key))
+        with self._lock:
+            if self._version == version:
+                self._configs[key] = cfg
+        return cfg
+
+    def set(self, guild_id, column: str, value: Optional[str]) -> None:
+        key = str(guild_id)
+        with self._lock:
+            self._version += 1
+            cfg = self._configs.get(key)
+            if cfg is not None:
+                self._configs[key] = cfg.with_value(column, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._version += 1
+            self._configs.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "guilds": len(self._configs),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -1,5 +1,20 @@
 import sqlite3
-from config import DB_PATH
+from config import (
+    DB_PATH,
+    DAILY_COOLDOWN_HOURS,
+    FISHING_COOLDOWN_MINUTES,
+    QUEST_COOLDOWN_HOURS,
+    WEEKLY_COOLDOWN_DAYS,
+)
+
+# cooldowns that used to be ISO timestamps of the last use in users columns:
+# (column, cooldown key, seconds)
+_LEGACY_COOLDOWNS = [
+    ("last_claim", "daily", DAILY_COOLDOWN_HOURS * 3600),
+    ("last_weekly", "weekly", WEEKLY_COOLDOWN_DAYS * 86400),
+    ("last_quest", "quest", QUEST_COOLDOWN_HOURS * 3600),
+    ("last_fishing", "fishing", FISHING_COOLDOWN_MINUTES * 60),
+]
 
 
 def init_db():
@@ -164,6 +179,67 @@ def init_db():
         """
     )
 
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS giveaway_entries (
+            message_id TEXT NOT NULL,
+            user_id TEXT NOT NULL,
+            slot INTEGER NOT NULL,
+            PRIMARY KEY (message_id, user_id),
+            UNIQUE (message_id, slot)
+        )
+        """
+    )
+
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS scheduled_jobs (
+            key TEXT PRIMARY KEY,
+            job_type TEXT NOT NULL,
+            due REAL NOT NULL,
+            payload TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0
+        )
+        """
+    )
+    cursor.execute("PRAGMA table_info(scheduled_jobs)")
+    if "attempts" not in {col[1] for col in cursor.fetchall()}:
+        cursor.execute(
+            "ALTER TABLE scheduled_jobs ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0"
+        )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_scheduled_jobs_due ON scheduled_jobs(due)"
+    )
+
+    # coins staked in games that are still running, already taken out of
+    # users.money; see DBHelper.reserve_hold
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS holds (
+            hold_id INTEGER PRIMARY KEY,
+            user_id TEXT NOT NULL,
+            amount INTEGER NOT NULL,
+            reason TEXT,
+            created REAL NOT NULL
+        )
+        """
+    )
+
+    # roles and channels as of the last snapshot (JSON in ``data``); rows of
+    # deleted objects keep their data and get ``deleted_at`` set
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS guild_snapshots (
+            guild_id TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            object_id TEXT NOT NULL,
+            data TEXT NOT NULL,
+            deleted_at REAL,
+            PRIMARY KEY (guild_id, kind, object_id)
+        ) WITHOUT ROWID
+        """
+    )
+
     _recreate(
         "filtered_words",
         """
@@ -183,11 +259,17 @@ def init_db():
             guild_id TEXT,
             trigger TEXT,
             response TEXT NOT NULL,
+            mode TEXT DEFAULT 'substring',
             PRIMARY KEY (guild_id, trigger)
         )
         """,
         {"guild_id", "trigger", "response"},
     )
+    cursor.execute("PRAGMA table_info(trigger_responses)")
+    if "mode" not in {col[1] for col in cursor.fetchall()}:
+        cursor.execute(
+            "ALTER TABLE trigger_responses ADD COLUMN mode TEXT DEFAULT 'substring'"
+        )
 
     _recreate(
         "anti_nuke_settings",
@@ -240,6 +322,17 @@ def init_db():
         {"guild_id", "channel_id"},
     )
 
+    _recreate(
+        "anti_nuke_lockdown",
+        """
+        CREATE TABLE IF NOT EXISTS anti_nuke_lockdown (
+            guild_id TEXT PRIMARY KEY,
+            enabled INTEGER DEFAULT 0
+        )
+        """,
+        {"guild_id", "enabled"},
+    )
+
     _recreate(
         "prison_settings",
         """
@@ -308,6 +401,30 @@ def init_db():
                 cursor.execute(
                     f"ALTER TABLE users ADD COLUMN {col} INTEGER DEFAULT {default}"
                 )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_money ON users(money)")
+
+    # running cooldowns only; expired rows are deleted when new ones are
+    # flushed (see DBHelper.flush_cooldowns)
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS cooldowns (
+            user_id TEXT NOT NULL,
+            key TEXT NOT NULL,
+            expires_at INTEGER NOT NULL,
+            PRIMARY KEY (user_id, key)
+        ) WITHOUT ROWID
+        """
+    )
+    for column, key, seconds in _LEGACY_COOLDOWNS:
+        expires = f"CAST(strftime('%s', {column}) AS INTEGER) + {seconds}"
+        cursor.execute(
+            f"INSERT INTO cooldowns (user_id, key, expires_at) "
+            f"SELECT user_id, ?, {expires} FROM users "
+            f"WHERE {column} != '' AND {expires} > CAST(strftime('%s') AS INTEGER) "
+            f"ON CONFLICT(user_id, key) DO NOTHING",
+            (key,),
+        )
+        cursor.execute(f"UPDATE users SET {column} = NULL WHERE {column} IS NOT NULL")
 
     conn.commit()
     conn.close()
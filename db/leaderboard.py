@@ -0,0 +1,82 @@
+import threading
+from typing import Callable, Optional
+
+Row = tuple[str, str, int]  # (user_id, username, money)
+
+
+class TopK:
+    """In-memory top-K of users by balance, kept current by every coin write.
+
+    Invariant: every user *not* held in the cache has a balance ``<= bound``
+    (``bound is None`` means the cache holds every user). A ``top(n)`` query
+    can therefore be answered from memory as long as at least ``n`` cached
+    entries reach ``bound``; otherwise the cache is rebuilt with ``loader``.
+    """
+
+    def __init__(self, capacity: int, loader: Callable[[int], list[Row]]):
+        self.capacity = capacity
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._entries: dict[str, tuple[str, int]] = {}
+        self._bound: Optional[int] = None
+        self._valid = False
+        self.hits = 0
+        self.rebuilds = 0
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._valid = False
+            self._entries.clear()
+
+    def _rebuild(self) -> None:
+        rows = self._loader(self.capacity)
+        self._entries = {uid: (name, money) for uid, name, money in rows}
+        self._bound = rows[-1][2] if len(rows) >= self.capacity else None
+        self._valid = True
+        self.rebuilds += 1
+
+    def update(self, user_id: str, money: int, username: Optional[str]) -> None:
+        """Record a user's new balance (call after the write has committed)."""
+
+        with self._lock:
+            if not self._valid:
+                return
+            if user_id in self._entries:
+                name = self._entries[user_id][0] if username is None else username
+                self._entries[user_id] = (name, money)
+                return
+            if self._bound is not None and money <= self._bound:
+                return
+            self._entries[user_id] = (username or "", money)
+            if len(self._entries) > self.capacity:
+                lowest = min(self._entries, key=lambda uid: self._entries[uid][1])
+                evicted = self._entries.pop(lowest)[1]
+                self._bound = evicted if self._bound is None else max(
+                    self._bound, evicted
+                )
+
+    def rename(self, user_id: str, username: str) -> None:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                self._entries[user_id] = (username, entry[1])
+
+    def top(self, n: int) -> list[tuple[str, int]]:
+        """Return ``[(username, money), ...]`` for the ``n`` richest users."""
+
+        with self._lock:
+            if n <= self.capacity:
+                if self._valid:
+                    ranked = self._ranked()
+                    if len(ranked) >= n:
+                        self.hits += 1
+                        return ranked[:n]
+                self._rebuild()
+                return self._ranked()[:n]
+        return [(name, money) for _, name, money in self._loader(n)]
+
+    def _ranked(self) -> list[tuple[str, int]]:
+        ranked = sorted(self._entries.values(), key=lambda e: e[1], reverse=True)
+        if self._bound is not None:
+            ranked = [e for e in ranked if e[1] >= self._bound]
+        return ranked
@@ -2,115 +2,133 @@ import asyncio
 import logging
 from datetime import datetime, timezone, timedelta
 import uuid
+from typing import Optional
 
 import discord
 from discord import app_commands
 from discord.app_commands import CommandOnCooldown
 from discord.ext import commands
-import random
 
 from db.initializeDB import init_db
-from db.DBHelper import (
-    delete_custom_role,
-    get_custom_role,
-    _fetchone,
-    get_trigger_responses,
-    get_welcome_channel,
-    get_leave_channel,
-    get_welcome_message,
-    get_leave_message,
-    get_booster_channel,
-    get_booster_message,
-    get_log_channel,
-    get_prison_role,
-    start_message_log as db_start_message_log,
-    get_active_message_logs,
-    increment_message_log,
-    get_message_log_counts,
-    clear_message_log,
-)
+from db.async_db import db
+from scheduler import scheduler
 from utils import get_channel_webhook
 
-from config import ROD_SHOP
+from config import ROD_SHOP, DB_FLUSH_SECONDS, GIVEAWAY_REROLL_DAYS
 
 rod_shop: dict[int, tuple[int, float]] = ROD_SHOP.copy()
-active_giveaway_tasks: dict[int, asyncio.Task] = {}
 filtered_violations: dict[int, dict[int, list[float]]] = {}
-trigger_responses: dict[int, dict[str, str]] = {}
-message_log_tasks: dict[int, asyncio.Task] = {}
+flush_task: Optional[asyncio.Task] = None
+entry_sync: Optional[asyncio.Task] = None
 active_message_logs: dict[int, tuple[int, float, int]] = {}
 
 ERROR_LOG_CHANNEL_ID = 1373912883527815262
 
 
-async def end_giveaway(
+GIVEAWAY_EMOJI = "🎉"
+
+
+async def announce_giveaway_winners(
     bot: commands.Bot, channel_id: int, message_id: int, prize: str, winners: int
-):
+) -> bool:
+    """Draw winners from the stored entries and reply to the giveaway."""
+
     channel = bot.get_channel(channel_id)
     if channel is None:
-        from db.DBHelper import finish_giveaway
-
-        finish_giveaway(str(message_id))
-        return
+        return False
+    selected = await db.draw_giveaway_winners(str(message_id), winners)
+    message = channel.get_partial_message(message_id)
     try:
-        refreshed = await channel.fetch_message(message_id)
-    except Exception:
-        from db.DBHelper import finish_giveaway
+        if not selected:
+            await message.reply("No one has participated.")
+        else:
+            selected_winners = ", ".join(f"<@{uid}>" for uid in selected)
+            await message.reply(
+                f"🎊 Congratulations! {selected_winners} won **{prize}** 🎉"
+            )
+    except discord.HTTPException:
+        return False
+    return True
 
-        finish_giveaway(str(message_id))
-        return
 
-    reaction = discord.utils.get(refreshed.reactions, emoji="🎉")
-    if reaction is None:
-        await refreshed.reply("No one has participated.")
-        from db.DBHelper import finish_giveaway
+async def end_giveaway(
+    bot: commands.Bot, channel_id: int, message_id: int, prize: str, winners: int
+):
+    if entry_sync is not None and not entry_sync.done():
+        await asyncio.wait([entry_sync])  # draw from the crawled entries
+    await announce_giveaway_winners(bot, channel_id, message_id, prize, winners)
+    await db.finish_giveaway(str(message_id))
+    await scheduler.schedule(
+        f"giveaway_purge:{message_id}",
+        "giveaway_purge",
+        datetime.now(timezone.utc) + timedelta(days=GIVEAWAY_REROLL_DAYS),
+        {},
+    )
 
-        finish_giveaway(str(message_id))
-        active_giveaway_tasks.pop(message_id, None)
-        return
 
-    users = [u async for u in reaction.users() if not u.bot]
-    if not users:
-        await refreshed.reply("No one has participated.")
-        from db.DBHelper import finish_giveaway
+async def purge_giveaway_entries() -> int:
+    """Drop entries of giveaways that ended more than GIVEAWAY_REROLL_DAYS ago."""
 
-        finish_giveaway(str(message_id))
-        active_giveaway_tasks.pop(message_id, None)
-        return
-    if winners > len(users):
-        winners = len(users)
-    selected = random.sample(users, winners)
-    selected_winners = ", ".join(u.mention for u in selected)
-    await refreshed.reply(f"🎊 Congratulations! {selected_winners} won **{prize}** 🎉")
-    from db.DBHelper import finish_giveaway
+    cutoff = datetime.now(timezone.utc) - timedelta(days=GIVEAWAY_REROLL_DAYS)
+    return await db.purge_giveaway_entries(cutoff)
 
-    finish_giveaway(str(message_id))
-    active_giveaway_tasks.pop(message_id, None)
 
+async def schedule_giveaway(
+    channel_id: int, message_id: int, end_time: datetime, prize: str, winners: int
+):
+    await scheduler.schedule(
+        f"giveaway:{message_id}",
+        "giveaway",
+        end_time,
+        {
+            "channel_id": channel_id,
+            "message_id": message_id,
+            "prize": prize,
+            "winners": winners,
+        },
+    )
 
-async def load_giveaways(bot: commands.Bot):
-    from db.DBHelper import get_active_giveaways
 
-    for mid, cid, end, prize, winners in get_active_giveaways():
-        end_dt = datetime.fromisoformat(end)
-        delay = (end_dt - datetime.now(timezone.utc)).total_seconds()
+async def sync_giveaway_entries(bot: commands.Bot, giveaways: list[tuple[int, int]]):
+    """Rebuild entries of running giveaways from their reactions.
 
-        async def runner(m=int(mid), c=int(cid), p=prize, w=winners, d=delay):
-            try:
-                if d > 0:
-                    await asyncio.sleep(d)
-                await end_giveaway(bot, c, m, p, w)
-            except asyncio.CancelledError:
-                pass
+    Catches reactions made while the bot was offline and giveaways started
+    before entries were tracked. Runs once at startup as a background task
+    (``entry_sync``) so commands and other jobs do not wait for the crawl;
+    :func:`end_giveaway` waits for it before drawing.
+    """
 
-        task = asyncio.create_task(runner())
-        active_giveaway_tasks[int(mid)] = task
+    for channel_id, message_id in giveaways:
+        channel = bot.get_channel(channel_id)
+        if channel is None:
+            continue
+        try:
+            message = await channel.fetch_message(message_id)
+        except discord.HTTPException:
+            continue
+        reaction = discord.utils.get(message.reactions, emoji=GIVEAWAY_EMOJI)
+        users = [u.id async for u in reaction.users() if not u.bot] if reaction else []
+        await db.replace_giveaway_entries(str(message_id), users)
+
+
+async def load_giveaways(bot: commands.Bot) -> list[tuple[int, int]]:
+    """Schedule running giveaways; returns their (channel_id, message_id)."""
+
+    running = []
+    for mid, cid, end, prize, winners in await db.get_active_giveaways():
+        # giveaways started before the scheduler existed have no job yet
+        await schedule_giveaway(
+            int(cid), int(mid), datetime.fromisoformat(end), prize, winners
+        )
+        running.append((int(cid), int(mid)))
+    return running
 
 
 async def end_message_log(bot: commands.Bot, guild_id: int):
     channel_id, _, top = active_message_logs.get(guild_id, (None, None, 30))
     channel = bot.get_channel(channel_id) if channel_id else None
-    users = get_message_log_counts(guild_id, top)
+    await db.flush_message_logs(guild_id)
+    users = await db.get_message_log_counts(guild_id, top)
     if channel:
         if users:
             lines = [
@@ -125,9 +143,8 @@ async def end_message_log(bot: commands.Bot, guild_id: int):
             await channel.send(embed=embed)
         else:
             await channel.send("No messages were recorded.")
-    clear_message_log(guild_id)
+    await db.clear_message_log(guild_id)
     active_message_logs.pop(guild_id, None)
-    message_log_tasks.pop(guild_id, None)
 
 
 async def start_message_log(
@@ -136,50 +153,52 @@ async def start_message_log(
     if guild_id in active_message_logs:
         return False
     end_dt = datetime.now(timezone.utc) + timedelta(seconds=seconds)
-    db_start_message_log(guild_id, channel_id, end_dt, top)
+    await db.start_message_log(guild_id, channel_id, end_dt, top)
     end_ts = end_dt.timestamp()
     active_message_logs[guild_id] = (channel_id, end_ts, top)
-
-    async def runner():
-        try:
-            await asyncio.sleep(seconds)
-            await end_message_log(bot, guild_id)
-        except asyncio.CancelledError:
-            pass
-
-    task = asyncio.create_task(runner())
-    message_log_tasks[guild_id] = task
+    await scheduler.schedule(
+        f"message_log:{guild_id}", "message_log", end_ts, {"guild_id": guild_id}
+    )
     return True
 
 
 async def load_message_logs(bot: commands.Bot):
-    now = datetime.now(timezone.utc).timestamp()
-    for gid, cid, end_dt, top in get_active_message_logs():
+    for gid, cid, end_dt, top in await db.get_active_message_logs():
         end_ts = end_dt.timestamp()
         active_message_logs[gid] = (cid, end_ts, top)
-        delay = end_ts - now
+        await scheduler.schedule(
+            f"message_log:{gid}", "message_log", end_ts, {"guild_id": gid}
+        )
 
-        async def runner(d=delay, g=gid):
-            try:
-                if d > 0:
-                    await asyncio.sleep(d)
-                await end_message_log(bot, g)
-            except asyncio.CancelledError:
-                pass
 
-        task = asyncio.create_task(runner())
-        message_log_tasks[gid] = task
+async def flush_buffers_loop():
+    while True:
+        await asyncio.sleep(DB_FLUSH_SECONDS)
+        try:
+            await db.flush_buffers()
+        except Exception:
+            logging.exception("Failed to flush buffered DB writes")
 
 
 async def on_ready(bot: commands.Bot):
     init_db()
-    global rod_shop, trigger_responses
+    global rod_shop, flush_task, entry_sync
+    if flush_task is None or flush_task.done():
+        flush_task = asyncio.create_task(flush_buffers_loop())
     # Load fixed shop from config
     rod_shop = ROD_SHOP.copy()
-    trigger_responses = {g.id: get_trigger_responses(g.id) for g in bot.guilds}
+    for g in bot.guilds:
+        await db.trigger_index(g.id)
+    await db.get_reaction_role_index()
     await bot.tree.sync()
-    await load_giveaways(bot)
-    await load_message_logs(bot)
+    if not scheduler.running:
+        refunded = await db.release_stale_holds()
+        if refunded:
+            logging.info("Refunded %d coins held by games of the last run", refunded)
+        giveaways = await load_giveaways(bot)
+        await load_message_logs(bot)
+        await scheduler.start()
+        entry_sync = asyncio.create_task(sync_giveaway_entries(bot, giveaways))
     print(f"Bot is online as {bot.user}")
 
 
@@ -187,7 +206,7 @@ async def on_member_update(
     bot: commands.Bot, before: discord.Member, after: discord.Member
 ):
     if before.premium_since and not after.premium_since:
-        role_id = get_custom_role(after.guild.id, str(after.id))
+        role_id = await db.get_custom_role(after.guild.id, str(after.id))
         if role_id:
             role = after.guild.get_role(role_id)
             if role:
@@ -195,9 +214,10 @@ async def on_member_update(
                     await role.delete(reason="User stopped boosting")
                 except Exception:
                     pass
-            delete_custom_role(after.guild.id, str(after.id))
+            await db.delete_custom_role(after.guild.id, str(after.id))
     if not before.premium_since and after.premium_since:
-        cid = get_booster_channel(after.guild.id)
+        cfg = await db.guild_config(after.guild.id)
+        cid = cfg.booster_channel_id
         if cid:
             channel = bot.get_channel(cid)
             if channel:
@@ -206,7 +226,7 @@ async def on_member_update(
                     "member_mention": after.mention,
                     "server": after.guild.name,
                 }
-                template = get_booster_message(after.guild.id)
+                template = cfg.booster_message
                 if template:
                     try:
                         message = template.format(**args)
@@ -225,7 +245,7 @@ async def on_message(
     if message.guild.id in active_message_logs:
         _, end_ts, _ = active_message_logs[message.guild.id]
         if datetime.now(timezone.utc).timestamp() < end_ts:
-            increment_message_log(
+            db.increment_message_log(
                 message.guild.id, str(message.author.id), message.author.display_name
             )
     locked = lowercase_locked.get(message.guild.id, set())
@@ -242,52 +262,49 @@ async def on_message(
             allowed_mentions=discord.AllowedMentions.all(),
         )
     content = message.content.lower()
-    from db.DBHelper import update_date, get_filtered_words
 
-    content = message.content.lower()
-
-    for word in get_filtered_words(message.guild.id):
-        if content.startswith(word) or " " + word in content:
-            try:
-                await message.delete()
-            except discord.Forbidden:
-                return
-            now = datetime.now().timestamp()
-            guild_violations = filtered_violations.setdefault(message.guild.id, {})
-            history = guild_violations.setdefault(message.author.id, [])
-            history.append(now)
-            history = [t for t in history if now - t <= 60]
-            guild_violations[message.author.id] = history
-            if len(history) >= 3:
-                try:
-                    await message.author.timeout(
-                        datetime.now(timezone.utc) + timedelta(minutes=10),
-                        reason="Filtered words",
-                    )
-                except Exception:
-                    pass
-                guild_violations[message.author.id] = []
+    matcher = await db.filter_matcher(message.guild.id)
+    if matcher.find(content) is not None:
+        try:
+            await message.delete()
+        except discord.Forbidden:
             return
+        now = datetime.now().timestamp()
+        guild_violations = filtered_violations.setdefault(message.guild.id, {})
+        history = guild_violations.setdefault(message.author.id, [])
+        history.append(now)
+        history = [t for t in history if now - t <= 60]
+        guild_violations[message.author.id] = history
+        if len(history) >= 3:
+            try:
+                await message.author.timeout(
+                    datetime.now(timezone.utc) + timedelta(minutes=10),
+                    reason="Filtered words",
+                )
+            except Exception:
+                pass
+            guild_violations[message.author.id] = []
+        return
 
-    for trigger, reply in trigger_responses.get(message.guild.id, {}).items():
-        if trigger in content:
-            await message.channel.send(reply)
-            break
+    reply = (await db.trigger_index(message.guild.id)).find(content)
+    if reply is not None:
+        await message.channel.send(reply)
     if message.author.bot:
         return
-    update_date(message.author.id, message.author.name)
+    db.record_activity(message.author.id, message.author.name)
 
 
 async def on_member_join(bot: commands.Bot, member: discord.Member):
     role = discord.utils.get(member.guild.roles, name="Member")
     if role:
         await member.add_roles(role)
-    pid = get_prison_role(member.guild.id)
+    pid = await db.get_prison_role(member.guild.id)
     if pid:
         prole = member.guild.get_role(pid)
         if prole:
             await member.add_roles(prole)
-    cid = get_welcome_channel(member.guild.id)
+    cfg = await db.guild_config(member.guild.id)
+    cid = cfg.welcome_channel_id
     if cid:
         channel = bot.get_channel(cid)
         if channel:
@@ -297,7 +314,7 @@ async def on_member_join(bot: commands.Bot, member: discord.Member):
                 "server": member.guild.name,
                 "member_count": member.guild.member_count,
             }
-            template = get_welcome_message(member.guild.id)
+            template = cfg.welcome_message
             if template:
                 try:
                     message = template.format(**args)
@@ -314,7 +331,8 @@ async def on_member_join(bot: commands.Bot, member: discord.Member):
 
 
 async def on_member_remove(bot: commands.Bot, member: discord.Member):
-    cid = get_leave_channel(member.guild.id)
+    cfg = await db.guild_config(member.guild.id)
+    cid = cfg.leave_channel_id
     if cid:
         channel = bot.get_channel(cid)
         if channel:
@@ -324,7 +342,7 @@ async def on_member_remove(bot: commands.Bot, member: discord.Member):
                 "server": member.guild.name,
                 "member_count": member.guild.member_count,
             }
-            template = get_leave_message(member.guild.id)
+            template = cfg.leave_message
             if template:
                 try:
                     message = template.format(**args)
@@ -343,13 +361,14 @@ async def on_raw_reaction_add(
 ):
     if payload.member is None or payload.member.bot:
         return
-    row = _fetchone(
-        "SELECT role_id FROM reaction_roles WHERE message_id = ? AND emoji = ?",
-        (str(payload.message_id), str(payload.emoji)),
-    )
-    if not row:
+    if str(payload.emoji) == GIVEAWAY_EMOJI and db.record_giveaway_entry(
+        payload.message_id, payload.user_id, True
+    ):
         return
-    role = payload.member.guild.get_role(int(row[0]))
+    role_id = await db.reaction_role(payload.message_id, str(payload.emoji))
+    if not role_id:
+        return
+    role = payload.member.guild.get_role(role_id)
     if role:
         await payload.member.add_roles(role, reason="Reaction role added")
 
@@ -357,24 +376,31 @@ async def on_raw_reaction_add(
 async def on_raw_reaction_remove(
     bot: commands.Bot, payload: discord.RawReactionActionEvent
 ):
+    if str(payload.emoji) == GIVEAWAY_EMOJI and db.record_giveaway_entry(
+        payload.message_id, payload.user_id, False
+    ):
+        return
     guild = bot.get_guild(payload.guild_id)
     member = guild.get_member(payload.user_id)
     if member is None or member.bot:
         return
-    row = _fetchone(
-        "SELECT role_id FROM reaction_roles WHERE message_id = ? AND emoji = ?",
-        (str(payload.message_id), str(payload.emoji)),
-    )
-    if not row:
+    role_id = await db.reaction_role(payload.message_id, str(payload.emoji))
+    if not role_id:
         return
-    role = guild.get_role(int(row[0]))
+    role = guild.get_role(role_id)
     if role:
         await member.remove_roles(role, reason="Reaction role removed")
 
 
+async def _log_channel_id(guild: Optional[discord.Guild]) -> Optional[int]:
+    if guild is None:
+        return None
+    return (await db.guild_config(guild.id)).log_channel_id
+
+
 async def on_app_error(bot: commands.Bot, inter: discord.Interaction, error: Exception):
     error_id = uuid.uuid4().hex[:8]
-    cid = get_log_channel(inter.guild.id) if inter.guild else None
+    cid = await _log_channel_id(inter.guild)
     log_ch = bot.get_channel(cid) if cid else None
     central_log = bot.get_channel(ERROR_LOG_CHANNEL_ID)
 
@@ -421,7 +447,7 @@ async def on_command_error(
     if isinstance(error, commands.CommandNotFound):
         return
     error_id = uuid.uuid4().hex[:8]
-    cid = get_log_channel(ctx.guild.id) if ctx.guild else None
+    cid = await _log_channel_id(ctx.guild)
     log_ch = bot.get_channel(cid) if cid else None
     central_log = bot.get_channel(ERROR_LOG_CHANNEL_ID)
 
@@ -482,7 +508,7 @@ def _format_option(opt: dict, users_data: dict) -> str:
 async def on_app_command_completion(
     bot: commands.Bot, inter: discord.Interaction, command: app_commands.Command
 ):
-    cid = get_log_channel(inter.guild.id) if inter.guild else None
+    cid = await _log_channel_id(inter.guild)
     log_ch = bot.get_channel(cid) if cid else None
     if not log_ch:
         return
@@ -502,6 +528,21 @@ async def on_app_command_completion(
 
 
 def setup(bot: commands.Bot, lowercase_locked: dict[int, set[int]]):
+    async def giveaway_job(job: dict):
+        await end_giveaway(
+            bot, job["channel_id"], job["message_id"], job["prize"], job["winners"]
+        )
+
+    async def message_log_job(job: dict):
+        await end_message_log(bot, job["guild_id"])
+
+    async def giveaway_purge_job(job: dict):
+        await purge_giveaway_entries()
+
+    scheduler.register("giveaway", giveaway_job)
+    scheduler.register("giveaway_purge", giveaway_purge_job)
+    scheduler.register("message_log", message_log_job)
+
     async def ready_wrapper():
         await on_ready(bot)
 
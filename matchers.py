@@ -0,0 +1,139 @@
+import re
+from typing import Iterable, Iterator, Optional
+
+TRIGGER_MODES = ("substring", "word", "regex")
+
+
+class Automaton:
+    """Aho–Corasick automaton over a fixed set of lower-case strings.
+
+    :meth:`scan` walks the text once and yields ``(start, word)`` for every
+    occurrence, ordered by where the occurrence ends.
+    """
+
+    def __init__(self, words: Iterable[str]):
+        self.words = sorted(set(words))
+        self._goto: list[dict[str, int]] = [{}]
+        self._out: list[tuple[str, ...]] = [()]
+        fail = [0]
+        for word in self.words:
+            node = 0
+            for ch in word:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = self._goto[node][ch] = len(self._goto)
+                    self._goto.append({})
+                    self._out.append(())
+                    fail.append(0)
+                node = nxt
+            self._out[node] += (word,)
+
+        # breadth-first: fail links, then merge outputs along them
+        queue = list(self._goto[0].values())
+        for node in queue:
+            for ch, nxt in self._goto[node].items():
+                f = fail[node]
+                while f and ch not in self._goto[f]:
+                    f = fail[f]
+                fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] += self._out[fail[nxt]]
+                queue.append(nxt)
+        self._fail = fail
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def scan(self, text: str) -> Iterator[tuple[int, str]]:
+        goto, fail, out = self._goto, self._fail, self._out
+        for word in out[0]:  # the empty string occurs at the start
+            yield 0, word
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for word in out[node]:
+                yield i - len(word) + 1, word
+
+
+class WordMatcher(Automaton):
+    """Filter-word matcher.
+
+    :meth:`find` reports a word that occurs at the very start of the text or
+    right after a space, i.e. the same rule as
+    ``text.startswith(word) or " " + word in text`` but in a single pass
+    over the text regardless of how many words are loaded.
+    """
+
+    def find(self, text: str) -> Optional[str]:
+        """Return the first filtered word found in *text*, if any."""
+
+        for start, word in self.scan(text):
+            if start == 0 or text[start - 1] == " ":
+                return word
+        return None
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+def compile_trigger(trigger: str, mode: str):
+    """Validate *trigger* for *mode*; regex triggers are compiled here."""
+
+    if mode not in TRIGGER_MODES:
+        raise ValueError(f"unknown trigger mode: {mode}")
+    if mode == "regex":
+        try:
+            return re.compile(trigger, re.IGNORECASE)
+        except re.error as exc:
+            raise ValueError(f"invalid regex: {exc}") from None
+    return trigger.lower()
+
+
+class TriggerIndex:
+    """All trigger responses of one guild, compiled for single-pass lookup.
+
+    ``substring`` triggers fire anywhere in the message, ``word`` triggers
+    only on whole words, and ``regex`` triggers when the pattern matches.
+    Plain triggers share one :class:`Automaton`; :meth:`find` returns the
+    response of the trigger whose match ends first in the message.
+    """
+
+    def __init__(self, rows: Iterable[tuple[str, str, str]]):
+        self._responses: dict[str, str] = {}
+        self._word_triggers: set[str] = set()
+        self._regexes: list[tuple[re.Pattern, str]] = []
+        for trigger, response, mode in rows:
+            compiled = compile_trigger(trigger, mode or "substring")
+            if mode == "regex":
+                self._regexes.append((compiled, response))
+                continue
+            if mode == "word":
+                self._word_triggers.add(compiled)
+            self._responses[compiled] = response
+        self._automaton = Automaton(self._responses)
+
+    def __len__(self) -> int:
+        return len(self._responses) + len(self._regexes)
+
+    def _literal(self, text: str) -> Optional[tuple[int, str]]:
+        for start, trigger in self._automaton.scan(text):
+            if trigger in self._word_triggers:
+                end = start + len(trigger)
+                if start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if end < len(text) and _is_word_char(text[end]):
+                    continue
+            return start + len(trigger), self._responses[trigger]
+        return None
+
+    def find(self, text: str) -> Optional[str]:
+        """Return the response for *text* (already lower-cased), if any."""
+
+        best = self._literal(text) if self._responses else None
+        for pattern, response in self._regexes:
+            m = pattern.search(text)
+            if m and (best is None or m.end() < best[0]):
+                best = (m.end(), response)
+        return best[1] if best else None
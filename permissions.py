@@ -42,6 +42,7 @@ COMMAND_PERMISSION_RULES: Mapping[str, PermissionRule] = dict(
             role_ids=frozenset({MOD_ROLE_ID}), allow_boosters=True
         ),
         "giveaway": PermissionRule(role_ids=frozenset({MOD_ROLE_ID})),
+        "reroll": PermissionRule(role_ids=frozenset({MOD_ROLE_ID})),
         "lock": PermissionRule(role_ids=frozenset({ADMIN_ROLE_ID})),
         "unlock": PermissionRule(role_ids=frozenset({ADMIN_ROLE_ID})),
         "addfilterword": PermissionRule(role_ids=frozenset({MOD_ROLE_ID})),
@@ -66,6 +67,8 @@ COMMAND_PERMISSION_RULES: Mapping[str, PermissionRule] = dict(
         "antinukeignoreuser": PermissionRule(role_ids=frozenset({ADMIN_ROLE_ID})),
         "antinukeignorerole": PermissionRule(role_ids=frozenset({ADMIN_ROLE_ID})),
         "antinukelog": PermissionRule(role_ids=frozenset({ADMIN_ROLE_ID})),
+        "antinukelockdown": PermissionRule(role_ids=frozenset({ADMIN_ROLE_ID})),
+        "antinukerestore": PermissionRule(role_ids=frozenset({ADMIN_ROLE_ID})),
         "antinukesettings": PermissionRule(role_ids=frozenset({ADMIN_ROLE_ID})),
     }
 )
@@ -0,0 +1,256 @@
+"""Integer playing cards and a table-driven poker hand evaluator.
+
+A card is an ``int`` that packs ``5 ** rank`` (ranks 0-12 are 2..Ace) with a
+one-bit-per-card counter in the nibble of its suit, above bit 32. Adding up
+the cards of a hand therefore yields, in one ``sum()``, both a key that
+identifies the multiset of ranks (every rank appears at most four times, so
+the base-5 digits never carry) and the number of cards of every suit. A
+suit nibble that was biased with 3 has its top bit set exactly when that
+suit holds five cards or more.
+
+:func:`evaluate` maps the sum through two tables built at import time:
+``_FLUSHES`` indexed by the 13-bit rank mask of the flush suit, and
+``_RANKS`` keyed by the rank multiset of every 5 to 7 card hand. Strengths
+are plain ints - the category above bit 20, then up to five ranks of four
+bits each - so the best hand is simply ``max()``. Emoji are only used for
+rendering (:func:`render`).
+"""
+
+import random
+import re
+from typing import Iterable, Optional, Sequence
+
+RANKS = "23456789TJQKA"
+SUITS = "shdc"
+HAND_NAMES = (
+    "High Card",
+    "One Pair",
+    "Two Pair",
+    "Three of a Kind",
+    "Straight",
+    "Flush",
+    "Full House",
+    "Four of a Kind",
+    "Straight Flush",
+)
+CATEGORY_SHIFT = 20
+
+_SUIT_SHIFT = 32
+_SUIT_BIAS = 0x3333 << _SUIT_SHIFT
+_FLUSH_BITS = 0x8888 << _SUIT_SHIFT
+_RANK_KEY_MASK = (1 << _SUIT_SHIFT) - 1
+
+# unicode playing cards: suit rows A-D (spades, hearts, diamonds, clubs),
+# ranks 1-E with the knight (C) skipped
+_EMOJI_SUITS = "ABDC"  # in SUITS order
+_EMOJI_RANKS = "23456789ABDE1"  # in RANKS order
+
+
+def card(rank: int, suit: int) -> int:
+    """The card of *rank* (0 = deuce .. 12 = ace) and *suit* (index in SUITS)."""
+
+    return 5**rank | 1 << (_SUIT_SHIFT + 4 * suit)
+
+
+DECK: tuple[int, ...] = tuple(card(r, s) for s in range(4) for r in range(13))
+
+_RANK_OF = {c: i % 13 for i, c in enumerate(DECK)}
+_SUIT_OF = {c: i // 13 for i, c in enumerate(DECK)}
+_EMOJI = {
+    c: chr(int(f"1F0{_EMOJI_SUITS[_SUIT_OF[c]]}{_EMOJI_RANKS[_RANK_OF[c]]}", 16))
+    for c in DECK
+}
+_NAMES = {c: RANKS[_RANK_OF[c]] + SUITS[_SUIT_OF[c]] for c in DECK}
+_BY_NAME = {name.lower(): c for c, name in _NAMES.items()}
+
+
+def rank_of(c: int) -> int:
+    return _RANK_OF[c]
+
+
+def suit_of(c: int) -> int:
+    return _SUIT_OF[c]
+
+
+def emoji(c: int) -> str:
+    return _EMOJI[c]
+
+
+def render(cards: Iterable[int]) -> str:
+    return " ".join(_EMOJI[c] for c in cards)
+
+
+def name(c: int) -> str:
+    """Two-letter name such as ``"As"`` or ``"Td"``."""
+
+    return _NAMES[c]
+
+
+def parse_card(text: str) -> int:
+    """The card named *text* (``"As"``, ``"10h"``, ``"td"``); ValueError if none."""
+
+    text = text.strip().lower().replace("10", "t")
+    try:
+        return _BY_NAME[text]
+    except KeyError:
+        raise ValueError(f"Unknown card {text!r}") from None
+
+
+_CARD_RE = re.compile(r"(10|[2-9tjqka])([shdc])")
+_SUIT_SYMBOLS = str.maketrans("♠♥♦♣", "shdc", " ,")
+
+
+def parse_cards(text: str) -> list[int]:
+    """Cards written one after another: ``"As Kd"``, ``"ahkh10c"``, ``"Q♠ J♠"``."""
+
+    text = text.lower().translate(_SUIT_SYMBOLS)
+    cards = []
+    end = 0
+    for match in _CARD_RE.finditer(text):
+        if match.start() != end:
+            break
+        cards.append(parse_card(match.group()))
+        end = match.end()
+    if end != len(text):
+        raise ValueError(f"Can't read the cards in {text[end:]!r}")
+    return cards
+
+
+def hand_name(strength: int) -> str:
+    return HAND_NAMES[strength >> CATEGORY_SHIFT]
+
+
+def _strength(category: int, ranks: Iterable[int]) -> int:
+    value = category
+    n = 0
+    for r in ranks:
+        value = value << 4 | r
+        n += 1
+    return value << 4 * (5 - n)
+
+
+_STRAIGHTS = [(0b11111 << low, low + 4) for low in range(8, -1, -1)]
+_STRAIGHTS.append((0b1000000001111, 3))  # the wheel, A-2-3-4-5
+
+
+def _straight_high(mask: int) -> int:
+    for bits, high in _STRAIGHTS:
+        if mask & bits == bits:
+            return high
+    return -1
+
+
+def _flush_strength(mask: int) -> int:
+    high = _straight_high(mask)
+    if high >= 0:
+        return _strength(8, (high,))
+    top = [r for r in range(12, -1, -1) if mask >> r & 1][:5]
+    return _strength(5, top)
+
+
+def _multiset_strength(counts: list[int]) -> int:
+    """Best non-flush strength of a hand holding ``counts[r]`` cards of rank r."""
+
+    present = [r for r in range(12, -1, -1) if counts[r]]
+    # ranks ordered by how often they occur, then by rank, best first
+    order = sorted(present, key=counts.__getitem__, reverse=True)
+    first, second = order[0], order[1]
+    if counts[first] == 4:
+        return _strength(7, (first, max(r for r in present if r != first)))
+    if counts[first] == 3 and counts[second] >= 2:
+        return _strength(6, (first, second))
+    high = _straight_high(sum(1 << r for r in present))
+    if high >= 0:
+        return _strength(4, (high,))
+    singles = [r for r in present if counts[r] == 1]
+    if counts[first] == 3:
+        return _strength(3, [first] + singles[:2])
+    if counts[second] == 2:
+        # with three pairs the lowest one can still be the kicker
+        kicker = next(r for r in present if r != first and r != second)
+        return _strength(2, (first, second, kicker))
+    if counts[first] == 2:
+        return _strength(1, [first] + singles[:3])
+    return _strength(0, singles[:5])
+
+
+def _build_tables() -> tuple[list[int], dict[int, int]]:
+    flushes = [0] * (1 << 13)
+    for mask in range(1 << 13):
+        if bin(mask).count("1") >= 5:
+            flushes[mask] = _flush_strength(mask)
+    by_key: dict[int, int] = {}
+    counts = [0] * 13
+
+    def fill(rank: int, cards: int, key: int) -> None:
+        # every way to hold 0-4 cards of each rank, 5 to 7 cards in all
+        if rank < 0:
+            if cards >= 5:
+                by_key[key] = _multiset_strength(counts)
+            return
+        for n in range(min(4, 7 - cards) + 1):
+            counts[rank] = n
+            fill(rank - 1, cards + n, key + n * 5**rank)
+        counts[rank] = 0
+
+    fill(12, 0, 0)
+    return flushes, by_key
+
+
+_FLUSHES, _RANKS = _build_tables()
+_RANK_BIT = {c: 1 << _RANK_OF[c] for c in DECK}
+
+
+def evaluate(cards: Iterable[int]) -> int:
+    """Strength of the best five-card hand among 5 to 7 *cards*; higher wins."""
+
+    cards = tuple(cards)
+    total = sum(cards, _SUIT_BIAS)
+    flush = total & _FLUSH_BITS
+    if flush:
+        suit = flush >> 3  # the counter bit of the flush suit
+        return _FLUSHES[sum(_RANK_BIT[c] for c in cards if c & suit)]
+    return _RANKS[total & _RANK_KEY_MASK]
+
+
+def simulate(
+    hole: Sequence[int],
+    board: Sequence[int],
+    opponents: int,
+    trials: int,
+    seed: Optional[int] = None,
+) -> tuple[float, int, int]:
+    """Deal *trials* random run-outs against *opponents* random hands.
+
+    Returns ``(equity, wins, ties)`` summed over the trials; a pot split
+    ``n`` ways adds ``1 / n`` to the equity. Pure and picklable so that it
+    can run in a worker process.
+    """
+
+    rng = random.Random(seed)
+    hole, board = tuple(hole), tuple(board)
+    known = set(hole + board)
+    rest = [c for c in DECK if c not in known]
+    need = 5 - len(board)
+    draw = need + 2 * opponents
+    sample = rng.sample
+    equity = 0.0
+    wins = ties = 0
+    for _ in range(trials):
+        cards = sample(rest, draw)
+        full = board + tuple(cards[:need])
+        mine = evaluate(hole + full)
+        tied = 0
+        for i in range(need, draw, 2):
+            theirs = evaluate(full + (cards[i], cards[i + 1]))
+            if theirs > mine:
+                break
+            tied += theirs == mine
+        else:
+            if tied:
+                ties += 1
+                equity += 1 / (tied + 1)
+            else:
+                wins += 1
+                equity += 1
+    return equity, wins, ties
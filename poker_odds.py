@@ -0,0 +1,133 @@
+import asyncio
+import multiprocessing
+import random
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import permutations
+from typing import NamedTuple, Optional, Sequence
+
+import poker
+from config import (
+    POKER_ODDS_BUDGET_SECONDS,
+    POKER_ODDS_CACHE_SIZE,
+    POKER_ODDS_WORKERS,
+)
+
+FIRST_BATCH = 1_000  # trials per worker in the first round
+TARGET_ERROR = 0.002  # stop once the equity's standard error is this small
+MAX_TRIALS = 1_000_000
+
+_PERMUTATIONS = list(permutations(range(4)))
+
+
+class Odds(NamedTuple):
+    equity: float
+    win: float
+    tie: float
+    trials: int
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_cache: "OrderedDict[tuple, Odds]" = OrderedDict()
+
+
+def canonical(hole: Sequence[int], board: Sequence[int], opponents: int) -> tuple:
+    """One key for all situations that only differ by a relabelling of suits.
+
+    ``As Ks`` on ``Qs Js 2d`` has the same odds as ``Ah Kh`` on ``Qh Jh 2c``;
+    the key is the smallest of the 24 relabellings.
+    """
+
+    best = None
+    for perm in _PERMUTATIONS:
+        key = tuple(
+            tuple(sorted((poker.rank_of(c), perm[poker.suit_of(c)]) for c in cards))
+            for cards in (hole, board)
+        )
+        if best is None or key < best:
+            best = key
+    return best + (opponents,)
+
+
+def _executor() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # forking a process that runs the event loop and DB threads is unsafe
+        context = multiprocessing.get_context("spawn")
+        _pool = ProcessPoolExecutor(POKER_ODDS_WORKERS, mp_context=context)
+    return _pool
+
+
+async def warm_up() -> None:
+    """Start the worker processes so the first /pokerodds is not slowed down."""
+
+    loop = asyncio.get_running_loop()
+    pool = _executor()
+    await asyncio.gather(
+        *(
+            loop.run_in_executor(pool, poker.evaluate, poker.DECK[:5])
+            for _ in range(POKER_ODDS_WORKERS)
+        )
+    )
+
+
+async def estimate(hole: Sequence[int], board: Sequence[int], opponents: int) -> Odds:
+    """Equity of *hole* on *board* against *opponents* random hands.
+
+    Every worker simulates a batch per round. The first batch is small;
+    later ones are sized from the measured speed so that the next round
+    still ends within POKER_ODDS_BUDGET_SECONDS. Simulation stops early once
+    the standard error drops below TARGET_ERROR. Results are cached per
+    :func:`canonical` situation.
+    """
+
+    key = canonical(hole, board, opponents)
+    odds = _cache.get(key)
+    if odds is not None:
+        _cache.move_to_end(key)
+        return odds
+
+    loop = asyncio.get_running_loop()
+    pool = _executor()
+    deadline = loop.time() + POKER_ODDS_BUDGET_SECONDS
+    hole, board = tuple(hole), tuple(board)
+    batch = FIRST_BATCH
+    equity = 0.0
+    wins = ties = trials = 0
+    while True:
+        started = loop.time()
+        results = await asyncio.gather(
+            *(
+                loop.run_in_executor(
+                    pool,
+                    poker.simulate,
+                    hole,
+                    board,
+                    opponents,
+                    batch,
+                    random.getrandbits(64),
+                )
+                for _ in range(POKER_ODDS_WORKERS)
+            )
+        )
+        for e, w, t in results:
+            equity += e
+            wins += w
+            ties += t
+        trials += batch * POKER_ODDS_WORKERS
+        mean = equity / trials
+        if trials >= MAX_TRIALS or (mean * (1 - mean) / trials) ** 0.5 <= TARGET_ERROR:
+            break
+        now = loop.time()
+        per_trial = (now - started) / batch
+        fits = int((deadline - now) * 0.8 / per_trial)
+        if fits < FIRST_BATCH:
+            break
+        needed = min(int(mean * (1 - mean) / TARGET_ERROR**2), MAX_TRIALS) - trials
+        batch = min(fits, needed // POKER_ODDS_WORKERS + 1)
+
+    odds = Odds(equity / trials, wins / trials, ties / trials, trials)
+    _cache[key] = odds
+    if len(_cache) > POKER_ODDS_CACHE_SIZE:
+        _cache.popitem(last=False)
+    return odds
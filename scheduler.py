@@ -0,0 +1,160 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Optional
+
+from config import (
+    SCHEDULER_LOOKAHEAD_SECONDS,
+    SCHEDULER_MAX_ATTEMPTS,
+    SCHEDULER_RETRY_SECONDS,
+)
+from db.async_db import db
+
+Handler = Callable[[dict], Awaitable[None]]
+
+
+class Scheduler:
+    """Single timer loop for every delayed job (giveaways, logs, prison).
+
+    Jobs live in the ``scheduled_jobs`` table so they survive restarts. Only
+    jobs due within the next ``lookahead`` seconds are held in memory, in a
+    heap ordered by due time; the rest are pulled in bulk from the ``due``
+    index as the window moves forward. When a job fires, the handler
+    registered for its type is called with the job's payload and the row is
+    deleted once it returns. A handler that raises is retried after
+    ``SCHEDULER_RETRY_SECONDS``, doubling each time, and the job is dropped
+    after ``SCHEDULER_MAX_ATTEMPTS`` failed runs.
+    """
+
+    def __init__(self, lookahead: float = SCHEDULER_LOOKAHEAD_SECONDS):
+        self.lookahead = lookahead
+        self._handlers: dict[str, Handler] = {}
+        self._heap: list[tuple[float, int, str]] = []
+        self._jobs: dict[str, tuple[float, str, dict]] = {}
+        self._seq = itertools.count()
+        self._horizon = 0.0  # every job due before this is in memory
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._inflight: set[asyncio.Task] = set()
+
+    def register(self, job_type: str, handler: Handler) -> None:
+        self._handlers[job_type] = handler
+
+    async def start(self) -> None:
+        """Load due jobs and start the timer loop (no-op if running)."""
+
+        if self.running:
+            return
+        self._wakeup = asyncio.Event()
+        await self._refill()
+        self._task = asyncio.create_task(self._run())
+
+    async def schedule(
+        self, key: str, job_type: str, due: datetime | float, payload: dict
+    ) -> None:
+        """Persist a job, replacing any job with the same key."""
+
+        due = due.timestamp() if isinstance(due, datetime) else float(due)
+        await db.schedule_job(key, job_type, due, payload)
+        self._jobs.pop(key, None)
+        if due <= self._horizon:
+            self._push(key, job_type, due, payload)
+
+    async def cancel(self, key: str) -> bool:
+        """Drop a pending job; returns whether one existed."""
+
+        self._jobs.pop(key, None)
+        return await db.cancel_job(key)
+
+    async def pending(self) -> dict[str, int]:
+        """Number of pending jobs per type (from the database)."""
+
+        return await db.get_scheduled_job_counts()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def loaded(self) -> int:
+        return len(self._jobs)
+
+    def _push(self, key: str, job_type: str, due: float, payload: dict) -> None:
+        self._jobs[key] = (due, job_type, payload)
+        heapq.heappush(self._heap, (due, next(self._seq), key))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _refill(self) -> None:
+        horizon = time.time() + self.lookahead
+        for key, job_type, due, payload in await db.get_jobs_due_before(horizon):
+            if key not in self._jobs:
+                self._push(key, job_type, due, payload)
+        self._horizon = horizon
+        # drop heap entries of cancelled/rescheduled jobs
+        self._heap = [
+            e for e in self._heap if self._jobs.get(e[2], (None,))[0] == e[0]
+        ]
+        heapq.heapify(self._heap)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                now = time.time()
+                if now + self.lookahead / 2 >= self._horizon:
+                    await self._refill()
+                while self._heap and self._heap[0][0] <= now:
+                    due, _, key = heapq.heappop(self._heap)
+                    job = self._jobs.get(key)
+                    if job is None or job[0] != due:
+                        continue  # cancelled or rescheduled
+                    del self._jobs[key]
+                    task = asyncio.create_task(self._fire(key, *job))
+                    self._inflight.add(task)
+                    task.add_done_callback(self._inflight.discard)
+                wake_at = self._horizon - self.lookahead / 2
+                if self._heap:
+                    wake_at = min(wake_at, self._heap[0][0])
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(
+                        self._wakeup.wait(), max(wake_at - time.time(), 0)
+                    )
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logging.exception("Scheduler loop error")
+                await asyncio.sleep(1)
+
+    async def _fire(self, key: str, due: float, job_type: str, payload: dict) -> None:
+        handler = self._handlers.get(job_type)
+        if handler is None:
+            logging.warning("No handler for scheduled job %s (%s)", key, job_type)
+            return
+        if await db.get_job_due(key) != due:
+            return  # cancelled while it was being loaded
+        try:
+            await handler(payload)
+        except Exception:
+            logging.exception("Scheduled job %s (%s) failed", key, job_type)
+            attempts, retry_at = await db.retry_job(
+                key, due, SCHEDULER_MAX_ATTEMPTS, SCHEDULER_RETRY_SECONDS
+            )
+            if retry_at is not None:
+                if retry_at <= self._horizon:
+                    self._push(key, job_type, retry_at, payload)
+            elif attempts >= SCHEDULER_MAX_ATTEMPTS:
+                logging.error(
+                    "Scheduled job %s (%s) dropped after %d failed runs",
+                    key, job_type, attempts,
+                )
+            return
+        await db.complete_job(key, due)
+
+
+scheduler = Scheduler()
@@ -0,0 +1,542 @@
+"""Anti-nuke harness: burst latency and replay of recorded event streams.
+
+Without ``--replay`` one actor deletes ``--actions`` channels within
+``--burst`` seconds against a fake guild whose REST ``audit_logs`` endpoint
+costs ``--rest-latency`` seconds and is limited to ``--rest-rate`` requests
+per second (Discord does not publish the audit-log bucket; the defaults are
+deliberately modest). Three runs are compared:
+
+* ``per-event REST`` - the old handlers: one ``audit_logs(limit=1)`` call
+  per gateway event;
+* ``audit stream``   - entries delivered via ``on_audit_log_entry_create``;
+* ``stream + drops`` - the same with ``--drop`` of the entries lost, so the
+  REST fallback has to pick them up after the grace period.
+
+Every ``--threshold`` deletes is one trigger. The punishment executor drops
+a trigger while a punishment of the same actor is still queued or running,
+so when the fallback resolves several dropped entries at once the actor is
+punished fewer times than there are triggers. Those show up as
+``coalesced``; punished plus coalesced always adds up to the trigger count.
+
+```bash
+python scripts/anti_nuke_harness.py --actions 100 --burst 1 --threshold 3
+```
+
+``--replay FILE`` instead feeds a JSONL event stream through the real
+listeners at ``--speed`` times real time (0 = as fast as possible) and
+reports who was punished against the expected actors, handler throughput
+and p50/p99 time-to-punish. anti_nuke's clock follows the stream, so the
+rate windows see the recorded timing whatever the speed. One object per
+line::
+
+    {"setting": "delete_channels", "enabled": 1, "threshold": 3,
+     "punishment": "timeout", "duration": 60}
+    {"safe_user": 7}            {"safe_role": 9}
+    {"member": 8, "roles": [9]}
+    {"expect": [42, 43]}        actors that should end up punished
+    {"t": 1.5, "action": "channel_delete", "user": 42, "target": 1001}
+    {"t": 2.0, "message": 43, "mentions": [1, 2, 3], "everyone": false}
+
+``action`` is an ``AuditLogAction`` name (channel_delete, role_delete,
+role_create, kick, ban, webhook_create; the target of webhook_create is the
+channel). Each one is delivered as an audit log entry plus its gateway
+event; ``"audit": false`` on the line, or ``--drop``, loses the entry so
+only the REST fallback can see it. ``--generate FILE`` writes a synthetic
+stream (benign traffic, a few nukers, two mention raids and busy safe
+moderators) to start from:
+
+```bash
+python scripts/anti_nuke_harness.py --generate /tmp/raid.jsonl
+python scripts/anti_nuke_harness.py --replay /tmp/raid.jsonl --speed 20
+```
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+# ensure project root is on the Python path when running as a script
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+import discord
+
+import anti_nuke
+import db.DBHelper as DBHelper
+import db.initializeDB as initdb
+from db.connection import connections
+
+GUILD_ID = 1
+ACTOR_ID = 42
+DELETE = discord.AuditLogAction.channel_delete
+
+
+class FakeRole:
+    def __init__(self, rid: int):
+        self.id = rid
+
+    def is_assignable(self) -> bool:
+        return True
+
+
+class FakeMember:
+    bot = False
+
+    def __init__(self, guild: "FakeGuild", uid: int, roles=()):
+        self.guild = guild
+        self.id = uid
+        self.roles = [FakeRole(rid) for rid in roles]
+        self.mention = f"<@{uid}>"
+        self.punished: list[float] = []
+        self.triggered: list[float] = []  # dispatch time of the deciding event
+
+    async def timeout(self, *args, **kwargs):
+        self.punished.append(time.perf_counter())
+
+    remove_roles = kick = ban = timeout
+
+
+class FakeGuild:
+    def __init__(self, rest_latency: float, rest_rate: float):
+        self.id = GUILD_ID
+        self.members: dict[int, FakeMember] = {}
+        self.entries: list = []  # newest last
+        self.rest_calls = 0
+        self._latency = rest_latency
+        self._interval = 1 / rest_rate
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    def get_member(self, uid):
+        return self.members.get(uid)
+
+    def member(self, uid: int, roles=()) -> FakeMember:
+        if uid not in self.members:
+            self.members[uid] = FakeMember(self, uid, roles)
+        return self.members[uid]
+
+    def get_channel(self, cid):
+        return None
+
+    async def audit_logs(self, limit=100, action=None):
+        async with self._lock:  # one shared rate-limit bucket
+            wait = self._next_slot - time.perf_counter()
+            self._next_slot = max(self._next_slot, time.perf_counter()) + self._interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+        self.rest_calls += 1
+        await asyncio.sleep(self._latency)
+        matching = [e for e in reversed(self.entries) if e.action is action]
+        for e in matching[:limit]:
+            yield e
+
+
+async def legacy_on_channel_delete(channel):
+    """The handler anti_nuke used before it consumed the audit log stream."""
+
+    guild = channel.guild
+    entry = None
+    async for e in guild.audit_logs(limit=1, action=DELETE):
+        entry = e
+        break
+    if (
+        entry
+        and (discord.utils.utcnow() - entry.created_at).total_seconds()
+        < anti_nuke.ACTION_WINDOW
+    ):
+        member = guild.get_member(entry.user_id)
+        if member:
+            await anti_nuke.handle_event(guild, member, "delete_channels")
+
+
+def reset_state() -> None:
+    anti_nuke.action_windows.clear()
+    anti_nuke.recent_entries.clear()
+    anti_nuke.handled_entries.clear()
+    anti_nuke.streaming_guilds.clear()
+    anti_nuke.mention_storms.clear()
+    anti_nuke.punishments.dropped = 0
+
+
+async def run(mode: str, args, drop: float) -> dict:
+    reset_state()
+    guild = FakeGuild(args.rest_latency, args.rest_rate)
+    actor = guild.members[ACTOR_ID] = FakeMember(guild, ACTOR_ID)
+    rng = random.Random(1)
+    ids = itertools.count(1000)
+    emitted: list[float] = []
+    tasks: list[asyncio.Task] = []
+    start = time.perf_counter()
+    for i in range(args.actions):
+        await asyncio.sleep(
+            max(0.0, start + i * args.burst / args.actions - time.perf_counter())
+        )
+        channel = SimpleNamespace(id=next(ids), guild=guild)
+        entry = SimpleNamespace(
+            id=next(ids),
+            action=DELETE,
+            guild=guild,
+            user_id=ACTOR_ID,
+            target=discord.Object(id=channel.id),
+            after=SimpleNamespace(),
+            created_at=discord.utils.utcnow(),
+        )
+        guild.entries.append(entry)
+        emitted.append(time.perf_counter())
+        if mode == "legacy":
+            tasks.append(asyncio.create_task(legacy_on_channel_delete(channel)))
+            continue
+        if rng.random() >= drop:
+            tasks.append(
+                asyncio.create_task(anti_nuke.on_audit_log_entry_create(entry))
+            )
+        tasks.append(asyncio.create_task(anti_nuke.on_channel_delete(channel)))
+    await asyncio.gather(*tasks)
+    await anti_nuke.punishments.join()
+
+    # the k-th punishment is due once threshold * k actions have happened
+    triggers = emitted[args.threshold - 1 :: args.threshold]
+    latencies = [(p - t) * 1e3 for p, t in zip(sorted(actor.punished), triggers)]
+    return {
+        "punishments": len(actor.punished),
+        "coalesced": anti_nuke.punishments.dropped,
+        "expected": len(triggers),
+        "rest": guild.rest_calls,
+        "first": latencies[0] if latencies else float("nan"),
+        "p50": statistics.median(latencies) if latencies else float("nan"),
+        "max": max(latencies, default=float("nan")),
+        "total": time.perf_counter() - start,
+    }
+
+
+class VirtualClock:
+    """Stands in for the ``time`` module inside anti_nuke during a replay."""
+
+    def __init__(self):
+        self.base = self.now = time.monotonic()
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+def _gateway(action: str, guild: FakeGuild, target: int):
+    """The gateway event Discord sends alongside an audit entry of *action*."""
+
+    obj = SimpleNamespace(id=target, guild=guild)
+    if action == "channel_delete":
+        return anti_nuke.on_channel_delete(obj)
+    if action == "role_delete":
+        return anti_nuke.on_role_delete(obj)
+    if action == "role_create":
+        return anti_nuke.on_role_create(obj)
+    if action == "kick":
+        return anti_nuke.on_member_remove(obj)
+    if action == "ban":
+        return anti_nuke.on_member_ban(guild, obj)
+    if action == "webhook_create":
+        return anti_nuke.on_webhooks_update(obj)
+    raise ValueError(f"unknown action {action!r}")
+
+
+def load_stream(path: str) -> list[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def configure(lines: list[dict]) -> None:
+    for line in lines:
+        if "setting" in line:
+            DBHelper.set_anti_nuke_setting(
+                line["setting"],
+                line.get("enabled", 1),
+                line["threshold"],
+                line.get("punishment", "timeout"),
+                line.get("duration", 60),
+                GUILD_ID,
+            )
+        elif "safe_user" in line:
+            DBHelper.add_safe_user(GUILD_ID, line["safe_user"])
+        elif "safe_role" in line:
+            DBHelper.add_safe_role(GUILD_ID, line["safe_role"])
+
+
+async def replay(lines: list[dict], args) -> dict:
+    reset_state()
+    guild = FakeGuild(args.rest_latency, args.rest_rate)
+    for line in lines:
+        if "member" in line:
+            guild.member(line["member"], line.get("roles", ()))
+    expected = {uid for line in lines if "expect" in line for uid in line["expect"]}
+    events = sorted((e for e in lines if "t" in e), key=lambda e: e["t"])
+
+    clock = VirtualClock()
+    dispatched = [0.0]  # real time the event being handled was dispatched
+    handle_entry = anti_nuke.handle_entry
+    submit = anti_nuke.punishments.submit
+
+    async def timed_entry(entry):
+        dispatched[0] = entry.dispatched
+        await handle_entry(entry)
+
+    def recording_submit(member, *rest) -> bool:
+        queued = submit(member, *rest)
+        if queued:
+            member.triggered.append(dispatched[0])
+        return queued
+
+    rng = random.Random(1)
+    ids = itertools.count(10**12)
+    backstops: list[asyncio.Task] = []
+    busy = 0.0
+    anti_nuke.time = clock
+    anti_nuke.handle_entry = timed_entry
+    anti_nuke.punishments.submit = recording_submit
+    start = time.perf_counter()
+    try:
+        for event in events:
+            if args.speed:
+                await asyncio.sleep(
+                    max(0.0, start + event["t"] / args.speed - time.perf_counter())
+                )
+            clock.now = clock.base + event["t"]
+            began = time.perf_counter()
+            if "action" in event:
+                entry = SimpleNamespace(
+                    id=next(ids),
+                    action=discord.AuditLogAction[event["action"]],
+                    guild=guild,
+                    user_id=event["user"],
+                    target=discord.Object(id=event["target"]),
+                    after=SimpleNamespace(channel=discord.Object(id=event["target"])),
+                    created_at=discord.utils.utcnow(),
+                    dispatched=began,
+                )
+                guild.member(event["user"])
+                guild.entries.append(entry)
+                if event.get("audit", True) and rng.random() >= args.drop:
+                    await anti_nuke.on_audit_log_entry_create(entry)
+                backstops.append(
+                    asyncio.create_task(
+                        _gateway(event["action"], guild, event["target"])
+                    )
+                )
+            else:
+                dispatched[0] = began
+                await anti_nuke.on_message(
+                    SimpleNamespace(
+                        author=guild.member(event["message"]),
+                        webhook_id=None,
+                        guild=guild,
+                        raw_mentions=event.get("mentions", []),
+                        mention_everyone=event.get("everyone", False),
+                    )
+                )
+            busy += time.perf_counter() - began
+            if not args.speed:
+                await asyncio.sleep(0)  # let the executor keep up
+        await asyncio.gather(*backstops)
+        await anti_nuke.punishments.join()
+    finally:
+        anti_nuke.time = time
+        anti_nuke.handle_entry = handle_entry
+        del anti_nuke.punishments.submit
+
+    punished = {m.id for m in guild.members.values() if m.punished}
+    latencies = sorted(
+        (p - t) * 1e3
+        for m in guild.members.values()
+        for p, t in zip(m.punished, m.triggered)
+    )
+    if len(latencies) > 1:
+        p50, p99 = (statistics.quantiles(latencies, n=100)[i] for i in (49, 98))
+    else:
+        p50 = p99 = latencies[0] if latencies else float("nan")
+    return {
+        "events": len(events),
+        "actions": sum("action" in e for e in events),
+        "expected": expected,
+        "caught": punished & expected,
+        "false": punished - expected,
+        "missed": expected - punished,
+        "punishments": len(latencies),
+        "coalesced": anti_nuke.punishments.dropped,
+        "rest": guild.rest_calls,
+        "busy": busy,
+        "total": time.perf_counter() - start,
+        "p50": p50,
+        "p99": p99,
+    }
+
+
+def generate(
+    seed: int = 1,
+    benign: int = 200,
+    nukers: int = 3,
+    raiders: int = 40,
+    seconds: float = 60.0,
+) -> list[dict]:
+    """A synthetic stream: what the default thresholds should and should not catch."""
+
+    rng = random.Random(seed)
+    targets = itertools.count(100_000)
+    admin, moderator, mod_role = 7, 8, 9
+    lines: list[dict] = [
+        {"setting": "delete_channels", "threshold": 3, "punishment": "timeout"},
+        {"setting": "delete_roles", "threshold": 3, "punishment": "strip"},
+        {"setting": "add_roles", "threshold": 5, "punishment": "timeout"},
+        {"setting": "kick", "threshold": 3, "punishment": "timeout"},
+        {"setting": "ban", "threshold": 3, "punishment": "ban", "duration": None},
+        {"setting": "webhook", "threshold": 3, "punishment": "kick"},
+        {"setting": "anti_mention", "threshold": 8, "punishment": "timeout"},
+        {"setting": "mention_storm", "threshold": 100, "punishment": "timeout"},
+        {"safe_user": admin},
+        {"safe_role": mod_role},
+        {"member": moderator, "roles": [mod_role]},
+    ]
+    actions = ("channel_delete", "role_delete", "role_create", "kick", "ban")
+    events = []
+
+    def act(t, action, user):
+        events.append(
+            {"t": round(t, 3), "action": action, "user": user, "target": next(targets)}
+        )
+
+    def message(t, author, mentions):
+        events.append(
+            {
+                "t": round(t, 3),
+                "message": author,
+                "mentions": rng.sample(range(1, 1000), mentions),
+            }
+        )
+
+    for uid in range(1000, 1000 + benign):
+        act(rng.uniform(0, seconds), rng.choice(actions), uid)
+        for _ in range(2):
+            message(rng.uniform(0, seconds), uid, rng.choice((0,) * 8 + (1, 2)))
+    # cleanup by trusted staff stays above every threshold
+    for i in range(20):
+        act(5 + i * 0.25, "channel_delete", admin)
+        act(20 + i * 0.25, "kick", moderator)
+    expect = []
+    for n in range(nukers):
+        uid = 5000 + n
+        expect.append(uid)
+        begin = rng.uniform(0, seconds - 5)
+        for i in range(15):
+            act(begin + i * 0.1, "channel_delete", uid)
+            act(begin + i * 0.1 + 0.05, rng.choice(("ban", "role_delete")), uid)
+        act(begin + 2, "webhook_create", uid)
+    # a raid of fresh accounts, each below the single-message limit
+    for uid in range(6000, 6000 + raiders):
+        expect.append(uid)
+        for _ in range(3):
+            message(seconds / 2 + rng.uniform(0, 3), uid, 3)
+    # and one in which every account pings only once
+    for uid in range(7000, 7000 + raiders):
+        expect.append(uid)
+        message(seconds / 4 + rng.uniform(0, 3), uid, 3)
+    events.sort(key=lambda e: e["t"])
+    return lines + events + [{"expect": expect}]
+
+
+def burst(args) -> None:
+    DBHelper.set_anti_nuke_setting(
+        "delete_channels", 1, args.threshold, "timeout", 60, GUILD_ID
+    )
+    runs = [
+        ("per-event REST", "legacy", 0.0),
+        ("audit stream", "stream", 0.0),
+        (f"stream + {args.drop:.0%} drops", "stream", args.drop),
+    ]
+    print(
+        f"{args.actions} channel deletes in {args.burst}s, threshold "
+        f"{args.threshold}, REST {args.rest_latency * 1e3:.0f} ms @ "
+        f"{args.rest_rate}/s, grace {args.grace}s"
+    )
+    for label, mode, drop in runs:
+        r = asyncio.run(run(mode, args, drop))
+        print(
+            f"  {label:22} punished {r['punishments']:3}/{r['expected']:<3} "
+            f"(+{r['coalesced']} coalesced) | "
+            f"{r['rest']:3} REST calls | latency first {r['first']:8.1f} ms, "
+            f"p50 {r['p50']:8.1f} ms, max {r['max']:8.1f} ms | "
+            f"done in {r['total']:.2f}s"
+        )
+
+
+def replay_file(args) -> None:
+    lines = load_stream(args.replay)
+    configure(lines)
+    # the grace period is real time, so it shrinks with the replay
+    anti_nuke.AUDIT_GRACE = args.grace / args.speed if args.speed else 0.01
+    r = asyncio.run(replay(lines, args))
+    speed = f"{args.speed:g}x" if args.speed else "full speed"
+    print(
+        f"{r['events']} events ({r['actions']} actions) from {args.replay} at "
+        f"{speed}, {args.drop:.0%} audit entries dropped"
+    )
+    print(
+        f"  detection: {len(r['caught'])}/{len(r['expected'])} expected actors "
+        f"punished, {len(r['false'])} false positives "
+        f"{sorted(r['false'])[:10]}, missed {sorted(r['missed'])[:10]}"
+    )
+    print(
+        f"  throughput: {r['events'] / r['busy']:,.0f} events/s in the handlers "
+        f"({r['busy'] * 1e3:.1f} ms busy), replay took {r['total']:.2f}s"
+    )
+    print(
+        f"  time-to-punish: p50 {r['p50']:.1f} ms, p99 {r['p99']:.1f} ms over "
+        f"{r['punishments']} punishments (+{r['coalesced']} coalesced), "
+        f"{r['rest']} REST calls"
+    )
+
+
+def main(args) -> None:
+    if args.generate:
+        with open(args.generate, "w") as f:
+            for line in generate(args.seed):
+                f.write(json.dumps(line) + "\n")
+        print(f"wrote {args.generate}")
+        return
+    anti_nuke.AUDIT_GRACE = args.grace
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "harness.db")
+        initdb.DB_PATH = path
+        initdb.init_db()
+        original = DBHelper.DB_PATH
+        DBHelper.DB_PATH = path
+        try:
+            if args.replay:
+                replay_file(args)
+            else:
+                burst(args)
+        finally:
+            connections.close(path)
+            DBHelper.DB_PATH = original
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--actions", type=int, default=100)
+    parser.add_argument("--burst", type=float, default=1.0)
+    parser.add_argument("--threshold", type=int, default=3)
+    parser.add_argument("--rest-latency", type=float, default=0.1)
+    parser.add_argument("--rest-rate", type=float, default=10.0)
+    parser.add_argument("--drop", type=float, default=0.1)
+    parser.add_argument("--grace", type=float, default=anti_nuke.AUDIT_GRACE)
+    parser.add_argument("--replay", metavar="FILE")
+    parser.add_argument("--speed", type=float, default=20.0)
+    parser.add_argument("--generate", metavar="FILE")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    main(args)
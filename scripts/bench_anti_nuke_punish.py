@@ -0,0 +1,213 @@
+"""Time to contain a multi-actor nuke: inline punishments vs the executor.
+
+``--actors`` accounts each perform ``--actions`` audited actions within
+``--burst`` seconds against a fake guild in which every API call (timeout,
+log message, role edit) takes ``--api-latency`` seconds and all calls share
+a ``--api-rate`` requests-per-second budget (Discord's global limit is
+50/s; discord.py waits when it is exceeded). The old code
+awaited the punishment and then the log message inside each event handler;
+the executor queues them, drops repeat triggers for an actor that is
+already being punished and sends both calls at once. The lockdown part
+edits ``--roles`` roles one by one and then through :func:`anti_nuke.lockdown`:
+
+```bash
+python scripts/bench_anti_nuke_punish.py --actors 10 --actions 30 --roles 100
+```
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# ensure project root is on the Python path when running as a script
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+import discord
+
+import anti_nuke
+import db.DBHelper as DBHelper
+import db.initializeDB as initdb
+from db.connection import connections
+
+GUILD_ID = 1
+LOG_CHANNEL_ID = 2
+CATEGORY = "delete_channels"
+
+
+class FakeAPI:
+    """Fixed latency per call behind a global requests-per-second limit."""
+
+    def __init__(self, latency: float, rate: float):
+        self.latency = latency
+        self.calls = 0
+        self._interval = 1 / rate
+        self._next_slot = 0.0
+
+    async def call(self) -> None:
+        now = time.perf_counter()
+        wait = self._next_slot - now
+        self._next_slot = max(self._next_slot, now) + self._interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+
+
+class FakeRole:
+    def __init__(self, api: FakeAPI, rid: int, position: int, permissions: int):
+        self._api = api
+        self.id = rid
+        self.position = position
+        self.permissions = discord.Permissions(permissions)
+        self.managed = False
+
+    def __lt__(self, other: "FakeRole") -> bool:
+        return self.position < other.position
+
+    async def edit(self, permissions, reason=None):
+        await self._api.call()
+        self.permissions = permissions
+
+
+class FakeChannel:
+    def __init__(self, api: FakeAPI):
+        self._api = api
+
+    async def send(self, text):
+        await self._api.call()
+
+
+class FakeMember:
+    def __init__(self, guild: "FakeGuild", uid: int):
+        self.guild = guild
+        self.id = uid
+        self.roles: list = []
+        self.mention = f"<@{uid}>"
+        self.first_punished = None
+
+    async def timeout(self, until, reason=None):
+        await self.guild.api.call()
+        if self.first_punished is None:
+            self.first_punished = time.perf_counter()
+
+
+class FakeGuild:
+    def __init__(self, api: FakeAPI, roles: int):
+        self.id = GUILD_ID
+        self.api = api
+        self.channel = FakeChannel(api)
+        admin = discord.Permissions(administrator=True, manage_roles=True).value
+        self.roles = [FakeRole(api, 100 + i, i, admin) for i in range(roles)]
+        self.me = FakeMember(self, 0)
+        self.me.top_role = FakeRole(api, 99, roles + 1, admin)
+
+    def get_channel(self, cid):
+        return self.channel if cid == LOG_CHANNEL_ID else None
+
+
+async def legacy_handle_event(guild, user, category):
+    """handle_event before the executor: punish, then log, in the handler."""
+
+    policy = await anti_nuke.db.anti_nuke_policy(guild.id)
+    _, threshold, punishment, duration = policy.active(category)
+    if anti_nuke.action_windows.hit((guild.id, category, user.id), threshold):
+        await anti_nuke.punish(user, punishment, duration)
+        line = anti_nuke.action_message(user, category, punishment, duration)
+        await anti_nuke.send_log(guild, f"<@{anti_nuke.OWNER_ID}> {line}")
+
+
+async def nuke(args, handler) -> tuple[float, float, int]:
+    """Return (time until every actor is punished, total time, API calls)."""
+
+    anti_nuke.action_windows.clear()
+    api = FakeAPI(args.api_latency, args.api_rate)
+    guild = FakeGuild(api, 0)
+    actors = [FakeMember(guild, 1000 + i) for i in range(args.actors)]
+    tasks = []
+    start = time.perf_counter()
+    for i in range(args.actions):
+        await asyncio.sleep(
+            max(0.0, start + i * args.burst / args.actions - time.perf_counter())
+        )
+        for actor in actors:
+            tasks.append(asyncio.create_task(handler(guild, actor, CATEGORY)))
+    await asyncio.gather(*tasks)
+    await anti_nuke.punishments.join()
+    contained = max(a.first_punished for a in actors) - start
+    return contained, time.perf_counter() - start, api.calls
+
+
+async def sequential_lockdown(guild) -> None:
+    for role in guild.roles:
+        value = role.permissions.value & ~anti_nuke.DANGEROUS_PERMISSIONS.value
+        await role.edit(permissions=discord.Permissions(value))
+
+
+async def lockdowns(args) -> tuple[float, float, int]:
+    guild = FakeGuild(FakeAPI(args.api_latency, args.api_rate), args.roles)
+    start = time.perf_counter()
+    await sequential_lockdown(guild)
+    sequential = time.perf_counter() - start
+
+    guild = FakeGuild(FakeAPI(args.api_latency, args.api_rate), args.roles)
+    start = time.perf_counter()
+    edited, _ = await anti_nuke.lockdown(guild)
+    return sequential, time.perf_counter() - start, edited
+
+
+async def executor_handle_event(guild, user, category):
+    await anti_nuke.handle_event(guild, user, category)
+
+
+def main(args) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "bench.db")
+        initdb.DB_PATH = path
+        initdb.init_db()
+        original = DBHelper.DB_PATH
+        DBHelper.DB_PATH = path
+        try:
+            DBHelper.set_anti_nuke_setting(
+                CATEGORY, 1, args.threshold, "timeout", 60, GUILD_ID
+            )
+            DBHelper.set_anti_nuke_log_channel(GUILD_ID, LOG_CHANNEL_ID)
+            print(
+                f"{args.actors} actors x {args.actions} actions in {args.burst}s, "
+                f"threshold {args.threshold}, API {args.api_latency * 1e3:.0f} ms/call "
+                f"@ {args.api_rate:.0f}/s"
+            )
+            for label, handler in (
+                ("inline punish+log", legacy_handle_event),
+                ("executor", executor_handle_event),
+            ):
+                contained, total, calls = asyncio.run(nuke(args, handler))
+                print(
+                    f"  {label:18} all actors punished after {contained * 1e3:7.1f} ms | "
+                    f"{calls:4} API calls | done in {total:.2f}s"
+                )
+            sequential, parallel, edited = asyncio.run(lockdowns(args))
+            print(
+                f"lockdown of {edited} roles: one by one {sequential:.2f}s, "
+                f"{anti_nuke.LOCKDOWN_CONCURRENCY} at a time {parallel:.2f}s"
+            )
+        finally:
+            connections.close(path)
+            DBHelper.DB_PATH = original
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--actors", type=int, default=10)
+    parser.add_argument("--actions", type=int, default=30)
+    parser.add_argument("--burst", type=float, default=1.0)
+    parser.add_argument("--threshold", type=int, default=3)
+    parser.add_argument("--api-latency", type=float, default=0.15)
+    parser.add_argument("--api-rate", type=float, default=50.0)
+    parser.add_argument("--roles", type=int, default=100)
+    args = parser.parse_args()
+    main(args)
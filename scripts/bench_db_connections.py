@@ -0,0 +1,101 @@
+"""Compare per-call ``sqlite3.connect`` with the pooled connection manager.
+
+Builds a throw-away database with N users and runs the same mix of
+``get_money``/``set_money`` calls through both access patterns:
+
+```bash
+python scripts/bench_db_connections.py --users 10000 1000000 --ops 20000
+```
+"""
+
+import argparse
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# ensure project root is on the Python path when running as a script
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+import db.DBHelper as DBHelper
+import db.initializeDB as initdb
+from db.connection import connections
+
+
+def populate(path: str, users: int) -> None:
+    initdb.DB_PATH = path
+    initdb.init_db()
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO users (user_id, username, money) VALUES (?, ?, ?)",
+        ((str(i), f"user{i}", random.randint(0, 100_000)) for i in range(users)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def per_call_get_money(path: str, user_id: str) -> int:
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+    cursor.execute("SELECT money FROM users WHERE user_id = ?", (user_id,))
+    row = cursor.fetchone()
+    conn.close()
+    return row[0] if row else 0
+
+
+def per_call_set_money(path: str, user_id: str, amount: int) -> None:
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+    cursor.execute("UPDATE users SET money = ? WHERE user_id = ?", (amount, user_id))
+    conn.commit()
+    conn.close()
+
+
+def run_ops(get_money, set_money, ids: list[str]) -> float:
+    start = time.perf_counter()
+    for i, uid in enumerate(ids):
+        balance = get_money(uid)
+        if i % 4 == 0:
+            set_money(uid, balance + 1)
+    return time.perf_counter() - start
+
+
+def bench(users: int, ops: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "bench.db")
+        populate(path, users)
+        ids = [str(random.randrange(users)) for _ in range(ops)]
+
+        per_call = run_ops(
+            lambda uid: per_call_get_money(path, uid),
+            lambda uid, amt: per_call_set_money(path, uid, amt),
+            ids,
+        )
+
+        original = DBHelper.DB_PATH
+        DBHelper.DB_PATH = path
+        try:
+            pooled = run_ops(DBHelper.get_money, DBHelper.set_money, ids)
+        finally:
+            connections.close(path)
+            DBHelper.DB_PATH = original
+
+    print(
+        f"{users:>9} users | {ops} ops (25% writes) | "
+        f"per-call {per_call:.3f}s ({ops / per_call:,.0f} ops/s) | "
+        f"pooled {pooled:.3f}s ({ops / pooled:,.0f} ops/s) | "
+        f"{per_call / pooled:.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, nargs="+", default=[10_000, 1_000_000])
+    parser.add_argument("--ops", type=int, default=20_000)
+    args = parser.parse_args()
+    for n in args.users:
+        bench(n, args.ops)
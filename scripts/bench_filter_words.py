@@ -0,0 +1,81 @@
+"""Compare the per-word filter loop with the compiled ``WordMatcher``.
+
+Generates a random filter list and chat-like messages (a share of which
+contain a filtered word) and reports messages per second for both:
+
+```bash
+python scripts/bench_filter_words.py --words 5000 --messages 20000
+```
+"""
+
+import argparse
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+# ensure project root is on the Python path when running as a script
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from matchers import WordMatcher
+
+
+def random_word(rng: random.Random) -> str:
+    return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10)))
+
+
+def make_messages(rng: random.Random, words: list[str], count: int, hit_rate: float):
+    messages = []
+    for _ in range(count):
+        tokens = [random_word(rng) for _ in range(rng.randint(3, 25))]
+        if rng.random() < hit_rate:
+            tokens[rng.randrange(len(tokens))] = rng.choice(words)
+        messages.append(" ".join(tokens))
+    return messages
+
+
+def legacy_find(words: list[str], content: str):
+    for word in words:
+        if content.startswith(word) or " " + word in content:
+            return word
+    return None
+
+
+def timed(find, messages: list[str]) -> tuple[float, int]:
+    start = time.perf_counter()
+    hits = sum(find(m) is not None for m in messages)
+    return time.perf_counter() - start, hits
+
+
+def bench(words: int, messages: int, hit_rate: float) -> None:
+    rng = random.Random(1)
+    word_list = list({random_word(rng) for _ in range(words)})
+    msgs = make_messages(rng, word_list, messages, hit_rate)
+
+    start = time.perf_counter()
+    matcher = WordMatcher(word_list)
+    build = time.perf_counter() - start
+
+    legacy, legacy_hits = timed(lambda m: legacy_find(word_list, m), msgs)
+    compiled, hits = timed(matcher.find, msgs)
+    assert hits == legacy_hits, (hits, legacy_hits)
+    print(
+        f"{len(word_list)} words, {messages} messages ({hits} hits) | "
+        f"build {build * 1e3:.1f} ms | "
+        f"loop {messages / legacy:,.0f} msg/s | "
+        f"automaton {messages / compiled:,.0f} msg/s | "
+        f"{legacy / compiled:.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--words", type=int, nargs="+", default=[50, 500, 5_000])
+    parser.add_argument("--messages", type=int, default=20_000)
+    parser.add_argument("--hit-rate", type=float, default=0.05)
+    args = parser.parse_args()
+    for n in args.words:
+        bench(n, args.messages, args.hit_rate)
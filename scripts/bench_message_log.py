@@ -0,0 +1,117 @@
+"""Compare per-message ``/logmessages`` upserts with the write-behind buffer.
+
+Replays a chat burst at a fixed message rate (default 500 msg/s) from a
+pool of users, once writing every message straight to SQLite and once
+through ``increment_message_log`` + periodic ``flush_message_logs``. The
+burst is replayed as fast as possible; the report shows how much database
+time one simulated second of chat costs and checks both runs count the
+same messages:
+
+```bash
+python scripts/bench_message_log.py --rate 500 --seconds 20 --users 300
+```
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# ensure project root is on the Python path when running as a script
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+import db.DBHelper as DBHelper
+import db.initializeDB as initdb
+from db.connection import connections
+
+GUILD_ID = 1
+
+
+def per_message(user_id: str, username: str) -> None:
+    DBHelper._execute(
+        """
+        INSERT INTO message_log_counts (guild_id, user_id, username, count)
+        VALUES (?, ?, ?, 1)
+        ON CONFLICT(guild_id, user_id)
+        DO UPDATE SET count = count + 1, username = excluded.username
+        """,
+        (GUILD_ID, user_id, username),
+    )
+
+
+def replay(burst, write, flush_every: int) -> tuple[float, float]:
+    """Return (total seconds, worst single call) for the burst."""
+
+    worst = 0.0
+    start = time.perf_counter()
+    for i, uid in enumerate(burst, 1):
+        t = time.perf_counter()
+        write(uid, f"user{uid}")
+        if flush_every and i % flush_every == 0:
+            DBHelper.flush_message_logs()
+        worst = max(worst, time.perf_counter() - t)
+    DBHelper.flush_message_logs(GUILD_ID)
+    return time.perf_counter() - start, worst
+
+
+def counts() -> dict:
+    return dict(
+        DBHelper._fetchall(
+            "SELECT user_id, count FROM message_log_counts WHERE guild_id = ?",
+            (GUILD_ID,),
+        )
+    )
+
+
+def bench(rate: int, seconds: int, users: int, flush_seconds: float) -> None:
+    rng = random.Random(1)
+    burst = [str(int(rng.paretovariate(1.2)) % users) for _ in range(rate * seconds)]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "bench.db")
+        initdb.DB_PATH = path
+        initdb.init_db()
+        original = DBHelper.DB_PATH
+        DBHelper.DB_PATH = path
+        try:
+            DBHelper.start_message_log(GUILD_ID, 1, datetime.now(), 10)
+            direct, direct_worst = replay(burst, per_message, 0)
+            expected = counts()
+
+            DBHelper.start_message_log(GUILD_ID, 1, datetime.now(), 10)
+            flush_every = max(1, int(rate * flush_seconds))
+            buffered, buffered_worst = replay(
+                burst,
+                lambda uid, name: DBHelper.increment_message_log(GUILD_ID, uid, name),
+                flush_every,
+            )
+            assert counts() == expected, "buffered counts differ"
+        finally:
+            connections.close(path)
+            DBHelper.DB_PATH = original
+
+    total = len(burst)
+    print(
+        f"{total} messages at {rate} msg/s over {seconds}s, "
+        f"flush every {flush_seconds}s ({flush_every} msgs):\n"
+        f"  per-message upsert  {direct:.3f}s "
+        f"({direct / seconds * 1e3:.1f} ms DB per chat second, "
+        f"max {total / direct:,.0f} msg/s, worst call {direct_worst * 1e3:.2f} ms)\n"
+        f"  write-behind        {buffered:.3f}s "
+        f"({buffered / seconds * 1e3:.1f} ms DB per chat second, "
+        f"max {total / buffered:,.0f} msg/s, worst call {buffered_worst * 1e3:.2f} ms)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=int, default=500)
+    parser.add_argument("--seconds", type=int, default=20)
+    parser.add_argument("--users", type=int, default=300)
+    parser.add_argument("--flush-seconds", type=float, default=10.0)
+    args = parser.parse_args()
+    bench(args.rate, args.seconds, args.users, args.flush_seconds)
@@ -0,0 +1,195 @@
+"""Check poker.evaluate against the old evaluator and time both.
+
+``--hands`` random 7-card hands are evaluated by :func:`poker.evaluate` and
+by a copy of the emoji-based ``_evaluate_hand`` that ``/poker`` used before.
+Both must put every hand in the same category and order every pair of
+neighbouring hands the same way, except for the two hands the old code got
+wrong: two sets of trips (``3-3-3-9-9-9-K``) were three of a kind rather
+than a full house, and with three pairs the lowest pair could not be the
+kicker (``Q-Q-T-T-6-6-3`` kicked with the 3). All 2,598,960 five-card hands are then checked to
+fall into the 7,462 distinct strengths poker has, with the expected count
+per category:
+
+```bash
+python scripts/bench_poker_eval.py --hands 300000
+```
+"""
+
+import argparse
+import itertools
+import random
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+# ensure project root is on the Python path when running as a script
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+import poker
+
+# distinct five-card strengths per category, high card .. straight flush
+DISTINCT = (1277, 2860, 858, 858, 10, 1277, 156, 156, 10)
+
+_rank_map = {
+    "1": 14,
+    "2": 2,
+    "3": 3,
+    "4": 4,
+    "5": 5,
+    "6": 6,
+    "7": 7,
+    "8": 8,
+    "9": 9,
+    "A": 10,
+    "B": 11,
+    "D": 12,
+    "E": 13,
+}
+_suit_map = {"A": "S", "B": "H", "C": "D", "D": "C"}
+
+
+def legacy_parse_card(emoji: str) -> tuple[int, str]:
+    code = f"{ord(emoji):05X}"
+    return _rank_map[code[4]], _suit_map[code[3]]
+
+
+def legacy_evaluate_hand(cards: list[tuple[int, str]]) -> tuple:
+    """``_evaluate_hand`` as it was in commands/economy_commands.py."""
+
+    ranks = sorted((r for r, _ in cards), reverse=True)
+    counts = Counter(ranks)
+    suits = Counter(s for _, s in cards)
+    flush = next((s for s, c in suits.items() if c >= 5), None)
+    unique = sorted(set(ranks), reverse=True)
+    if 14 in unique:
+        unique.append(1)
+    straight_high = None
+    for i in range(len(unique) - 4):
+        seq = unique[i : i + 5]
+        if seq[0] - seq[4] == 4:
+            straight_high = seq[0]
+            break
+    if flush:
+        flush_cards = [r for r, s in cards if s == flush]
+        flush_cards.sort(reverse=True)
+        fu = sorted(set(flush_cards), reverse=True)
+        if 14 in fu:
+            fu.append(1)
+        for i in range(len(fu) - 4):
+            seq = fu[i : i + 5]
+            if seq[0] - seq[4] == 4:
+                return (8, seq[0])
+        return (5, flush_cards[:5])
+    if 4 in counts.values():
+        quad = max(r for r, c in counts.items() if c == 4)
+        kicker = max(r for r in ranks if r != quad)
+        return (7, quad, kicker)
+    if 3 in counts.values() and 2 in counts.values():
+        tri = max(r for r, c in counts.items() if c == 3)
+        pair = max(r for r, c in counts.items() if c == 2)
+        return (6, tri, pair)
+    if straight_high:
+        return (4, straight_high)
+    if 3 in counts.values():
+        tri = max(r for r, c in counts.items() if c == 3)
+        kick = [r for r in ranks if r != tri][:2]
+        return (3, tri, kick[0], kick[1])
+    pairs = sorted([r for r, c in counts.items() if c == 2], reverse=True)
+    if len(pairs) >= 2:
+        kicker = max(r for r in ranks if r not in pairs)
+        return (2, pairs[0], pairs[1], kicker)
+    if len(pairs) == 1:
+        pair = pairs[0]
+        kick = [r for r in ranks if r != pair][:3]
+        return (1, pair, kick[0], kick[1], kick[2])
+    return (0, ranks[:5])
+
+
+def legacy(cards: tuple[int, ...]) -> tuple:
+    """The old path: emoji in the hand, parsed back for every evaluation."""
+
+    return legacy_evaluate_hand([legacy_parse_card(poker.emoji(c)) for c in cards])
+
+
+def old_bug(cards: tuple[int, ...]) -> bool:
+    """Two sets of trips or three pairs: the hands the old code misjudged."""
+
+    counts = list(Counter(map(poker.rank_of, cards)).values())
+    return counts.count(3) == 2 or counts.count(2) == 3
+
+
+def sign(x) -> int:
+    return (x > 0) - (x < 0)
+
+
+def compare(a, b) -> int:
+    return sign((a > b) - (a < b))
+
+
+def verify(hands: list[tuple[int, ...]]) -> None:
+    old = [legacy(h) for h in hands]
+    new = [poker.evaluate(h) for h in hands]
+    per_category = Counter()
+    mismatched = known = 0
+    for hand, o, n in zip(hands, old, new):
+        per_category[n >> poker.CATEGORY_SHIFT] += 1
+        if old_bug(hand):
+            known += 1
+        elif o[0] != n >> poker.CATEGORY_SHIFT:
+            mismatched += 1
+    order = 0
+    for i in range(len(hands) - 1):
+        if old_bug(hands[i]) or old_bug(hands[i + 1]):
+            continue
+        order += compare(old[i], old[i + 1]) != compare(new[i], new[i + 1])
+    print(f"{len(hands)} random 7-card hands:")
+    for category, name in enumerate(poker.HAND_NAMES):
+        print(f"  {name:16} {per_category[category]:7}")
+    print(
+        f"  category mismatches {mismatched}, pairs ordered differently {order} "
+        f"(skipping {known} two-trips full houses and three-pair hands)"
+    )
+
+
+def exhaustive() -> None:
+    strengths = {poker.evaluate(h) for h in itertools.combinations(poker.DECK, 5)}
+    counts = Counter(s >> poker.CATEGORY_SHIFT for s in strengths)
+    ok = tuple(counts[c] for c in range(9)) == DISTINCT
+    print(
+        f"all 5-card hands: {len(strengths)} distinct strengths, per category "
+        f"{'as expected' if ok else 'WRONG: ' + str(dict(counts))}"
+    )
+
+
+def throughput(hands: list[tuple[int, ...]]) -> None:
+    rates = {}
+    for label, fn in (("old", legacy), ("table", poker.evaluate)):
+        start = time.perf_counter()
+        for hand in hands:
+            fn(hand)
+        rates[label] = len(hands) / (time.perf_counter() - start)
+    print(
+        f"throughput: old {rates['old'] / 1e3:,.0f}k/s, table "
+        f"{rates['table'] / 1e6:.2f}M/s ({rates['table'] / rates['old']:.0f}x)"
+    )
+
+
+def main(args) -> None:
+    rng = random.Random(args.seed)
+    hands = [tuple(rng.sample(poker.DECK, 7)) for _ in range(args.hands)]
+    verify(hands)
+    if not args.skip_exhaustive:
+        exhaustive()
+    throughput(hands)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hands", type=int, default=300_000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--skip-exhaustive", action="store_true")
+    args = parser.parse_args()
+    main(args)
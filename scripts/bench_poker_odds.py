@@ -0,0 +1,104 @@
+"""Latency and event-loop stalls of /pokerodds: inline vs the process pool.
+
+A few situations are estimated once by running :func:`poker.simulate` on
+the event loop (what a naive command would do, with the trial count the
+pool reached) and once through :func:`poker_odds.estimate`, while a ticker
+task measures how late the loop wakes it up. Each situation is then asked
+again with the suits relabelled, which must come from the cache:
+
+```bash
+python scripts/bench_poker_odds.py --workers 2 --budget 1.0
+```
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# ensure project root is on the Python path when running as a script
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+import poker
+import poker_odds
+
+SITUATIONS = [
+    ("As Ah", "", 1),
+    ("7c 2d", "", 1),
+    ("As Ks", "Qs Js 2d", 3),
+    ("Th 9h", "8h 2c 3d Kh", 2),
+    ("Ac Kd", "", 9),
+]
+RELABEL = str.maketrans("shdc", "hscd")
+
+
+async def ticker(stop: asyncio.Event, lags: list[float]) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.005)
+        lags.append(time.perf_counter() - start - 0.005)
+
+
+async def timed(coro_or_fn) -> tuple[float, float, object]:
+    """(seconds, worst loop stall, result) of awaiting/calling *coro_or_fn*."""
+
+    stop = asyncio.Event()
+    lags: list[float] = [0.0]
+    task = asyncio.create_task(ticker(stop, lags))
+    await asyncio.sleep(0.01)
+    start = time.perf_counter()
+    if asyncio.iscoroutine(coro_or_fn):
+        result = await coro_or_fn
+    else:
+        result = coro_or_fn()
+    elapsed = time.perf_counter() - start
+    await asyncio.sleep(0.01)
+    stop.set()
+    await task
+    return elapsed, max(lags), result
+
+
+async def run(args) -> None:
+    poker_odds.POKER_ODDS_WORKERS = args.workers
+    poker_odds.POKER_ODDS_BUDGET_SECONDS = args.budget
+    start = time.perf_counter()
+    await poker_odds.warm_up()
+    print(
+        f"{args.workers} workers started in {time.perf_counter() - start:.2f}s, "
+        f"budget {args.budget}s"
+    )
+    for hole, board, opponents in SITUATIONS:
+        mine, shared = poker.parse_cards(hole), poker.parse_cards(board)
+        took, stall, odds = await timed(poker_odds.estimate(mine, shared, opponents))
+        inline, inline_stall, _ = await timed(
+            lambda: poker.simulate(mine, shared, opponents, odds.trials)
+        )
+        swapped = (
+            poker.parse_cards(hole.lower().translate(RELABEL)),
+            poker.parse_cards(board.lower().translate(RELABEL)),
+        )
+        cached, _, again = await timed(poker_odds.estimate(*swapped, opponents))
+        print(
+            f"  {hole:5} | {board or '-':11} | {opponents} opp: equity "
+            f"{odds.equity:6.1%} from {odds.trials:7,} deals | pool {took * 1e3:6.0f} ms "
+            f"(loop stalled {stall * 1e3:4.1f} ms) | inline {inline * 1e3:6.0f} ms "
+            f"(stalled {inline_stall * 1e3:6.0f} ms) | relabelled "
+            f"{'cached' if again == odds else 'MISSED'} in {cached * 1e6:.0f} µs"
+        )
+
+
+def main(args) -> None:
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=poker_odds.POKER_ODDS_WORKERS)
+    parser.add_argument(
+        "--budget", type=float, default=poker_odds.POKER_ODDS_BUDGET_SECONDS
+    )
+    args = parser.parse_args()
+    main(args)
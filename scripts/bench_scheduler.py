@@ -0,0 +1,124 @@
+"""Startup time, memory and firing accuracy of the job scheduler.
+
+Fills a throw-away database with N jobs spread over the next 30 days plus
+a few hundred due within seconds, then starts the scheduler and waits for
+the near ones to fire. For comparison it also measures one sleeping
+``asyncio.Task`` per job, which is what giveaways/prison timers used to do:
+
+```bash
+python scripts/bench_scheduler.py --jobs 10000 100000
+```
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# ensure project root is on the Python path when running as a script
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+import db.DBHelper as DBHelper
+import db.initializeDB as initdb
+from db.connection import connections
+from scheduler import Scheduler
+
+MONTH = 30 * 24 * 3600
+
+
+def populate(path: str, jobs: int, soon: int, now: float) -> None:
+    initdb.DB_PATH = path
+    initdb.init_db()
+    rows = [
+        (f"job:{i}", "bench", now + 60 + random.random() * MONTH, "{}")
+        for i in range(jobs)
+    ]
+    for i in range(soon):
+        due = now + 1 + random.random() * 2
+        rows.append((f"soon:{i}", "bench", due, json.dumps({"due": due})))
+    with connections.transaction(path) as conn:
+        conn.executemany(
+            "INSERT INTO scheduled_jobs (key, job_type, due, payload) "
+            "VALUES (?, ?, ?, ?)",
+            rows,
+        )
+
+
+async def run_scheduler(soon: int) -> tuple[float, int, int, list[float]]:
+    lateness: list[float] = []
+    done = asyncio.Event()
+    sched = Scheduler()
+
+    async def handler(job: dict):
+        lateness.append((time.time() - job["due"]) * 1e3)
+        if len(lateness) == soon:
+            done.set()
+
+    sched.register("bench", handler)
+    tracemalloc.start()
+    start = time.perf_counter()
+    await sched.start()
+    startup = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    loaded = sched.loaded
+    await asyncio.wait_for(done.wait(), 30)
+    await asyncio.sleep(0.2)  # let the last completions delete their rows
+    return startup, memory, loaded, lateness
+
+
+async def run_tasks(jobs: int) -> tuple[float, int]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(asyncio.sleep(MONTH)) for _ in range(jobs)]
+    await asyncio.sleep(0)
+    elapsed = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    for t in tasks:
+        t.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return elapsed, memory
+
+
+def bench(jobs: int, soon: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "bench.db")
+        now = time.time()
+        populate(path, jobs, soon, now)
+        original = DBHelper.DB_PATH
+        DBHelper.DB_PATH = path
+        try:
+            startup, memory, loaded, delays = asyncio.run(run_scheduler(soon))
+            left = DBHelper.get_scheduled_job_counts()
+        finally:
+            connections.close(path)
+            DBHelper.DB_PATH = original
+
+    task_time, task_memory = asyncio.run(run_tasks(jobs))
+    print(
+        f"{jobs} jobs (+{soon} due now):\n"
+        f"  scheduler  start {startup * 1e3:7.1f} ms | "
+        f"{memory / 1024:8.0f} KiB | {loaded} in memory | "
+        f"lateness p50 {statistics.median(delays):.1f} ms, max {max(delays):.1f} ms | "
+        f"{left.get('bench', 0)} left in DB\n"
+        f"  1 task/job start {task_time * 1e3:7.1f} ms | "
+        f"{task_memory / 1024:8.0f} KiB"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--soon", type=int, default=500)
+    args = parser.parse_args()
+    for n in args.jobs:
+        bench(n, args.soon)
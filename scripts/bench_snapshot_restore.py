@@ -0,0 +1,287 @@
+"""Snapshot cost and restore time for a nuked guild.
+
+Builds a fake guild with ``--roles`` roles and ``--channels`` channels (one
+category per ten channels, text and voice channels with role overwrites),
+snapshots it, snapshots again with nothing and with one thing changed, then
+nukes it and restores it. The nuke deletes every role and half the
+channels; the categories and the other channels survive but lose their
+overwrites for the deleted roles, as on Discord. Every create or edit call takes
+``--api-latency`` seconds under a shared ``--api-rate`` requests-per-second
+limit. The restore runs once one object at a time and once with
+``snapshots.RESTORE_CONCURRENCY``, and the result is checked against the
+original layout:
+
+```bash
+python scripts/bench_snapshot_restore.py --roles 50 --channels 100
+```
+"""
+
+import argparse
+import asyncio
+import itertools
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# ensure project root is on the Python path when running as a script
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+import discord
+
+import db.DBHelper as DBHelper
+import db.initializeDB as initdb
+import snapshots
+from db.connection import connections
+
+GUILD_ID = 1
+_ids = itertools.count(10_000)
+
+
+class FakeAPI:
+    """Fixed latency per call behind a global requests-per-second limit."""
+
+    def __init__(self, latency: float, rate: float):
+        self.latency = latency
+        self.calls = 0
+        self._interval = 1 / rate
+        self._next_slot = 0.0
+
+    async def call(self) -> None:
+        now = time.perf_counter()
+        wait = self._next_slot - now
+        self._next_slot = max(self._next_slot, now) + self._interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+
+
+class FakeRole:
+    managed = False
+
+    def __init__(self, name, permissions, colour, hoist, mentionable, position=1):
+        self.id = next(_ids)
+        self.name = name
+        self.permissions = permissions
+        self.colour = colour
+        self.hoist = hoist
+        self.mentionable = mentionable
+        self.position = position
+
+    def is_default(self) -> bool:
+        return False
+
+
+class FakeChannel:
+    def __init__(self, kind, name, position, category, overwrites, **extra):
+        self.id = next(_ids)
+        self.type = kind
+        self.name = name
+        self.position = position
+        self.category_id = category.id if category else None
+        self.overwrites = overwrites
+        self._api = None
+        for key, value in extra.items():
+            setattr(self, key, value)
+
+    async def edit(self, *, overwrites, reason=None):
+        await self._api.call()
+        self.overwrites = overwrites
+
+
+class FakeGuild:
+    bitrate_limit = 96_000.0
+
+    def __init__(self, api: FakeAPI):
+        self.id = GUILD_ID
+        self.api = api
+        self.roles: list[FakeRole] = []
+        self.channels: list[FakeChannel] = []
+        top = FakeRole("bot", discord.Permissions.all(), discord.Colour(0), 0, 0)
+        top.position = 1_000
+        self.me = type("Me", (), {"top_role": top})()
+
+    def get_role(self, rid):
+        return next((r for r in self.roles if r.id == rid), None)
+
+    def get_channel(self, cid):
+        return next((c for c in self.channels if c.id == cid), None)
+
+    def get_member(self, uid):
+        return None
+
+    async def create_role(self, *, reason=None, **kwargs):
+        await self.api.call()
+        role = FakeRole(**kwargs)
+        self.roles.append(role)
+        return role
+
+    async def edit_role_positions(self, positions, *, reason=None):
+        await self.api.call()
+        for role, position in positions.items():
+            role.position = position
+
+    async def _create(self, kind, *, name, position, overwrites, reason=None, **kw):
+        await self.api.call()
+        kw.pop("news", None)
+        channel = FakeChannel(
+            kind, name, position, kw.pop("category", None), overwrites, **kw
+        )
+        channel._api = self.api
+        self.channels.append(channel)
+        return channel
+
+    async def create_category(self, **kwargs):
+        return await self._create(discord.ChannelType.category, **kwargs)
+
+    async def create_text_channel(self, **kwargs):
+        return await self._create(discord.ChannelType.text, **kwargs)
+
+    async def create_voice_channel(self, **kwargs):
+        return await self._create(discord.ChannelType.voice, **kwargs)
+
+
+def build(guild: FakeGuild, roles: int, channels: int) -> None:
+    for i in range(roles):
+        role = FakeRole(
+            f"role-{i}",
+            discord.Permissions(send_messages=True, manage_messages=i % 5 == 0),
+            discord.Colour(i * 1000),
+            i % 3 == 0,
+            i % 2 == 0,
+            position=i + 1,
+        )
+        guild.roles.append(role)
+    category = None
+    for i in range(channels):
+        overwrites = {
+            guild.roles[(i + k) % roles]: discord.PermissionOverwrite(
+                view_channel=k != 0, send_messages=k == 0
+            )
+            for k in range(3)
+        }
+        if i % 10 == 0:
+            category = FakeChannel(
+                discord.ChannelType.category, f"cat-{i}", i, None, overwrites
+            )
+            guild.channels.append(category)
+        elif i % 4 == 0:
+            guild.channels.append(
+                FakeChannel(
+                    discord.ChannelType.voice,
+                    f"voice-{i}",
+                    i,
+                    category,
+                    overwrites,
+                    bitrate=64_000,
+                    user_limit=i % 10,
+                )
+            )
+        else:
+            guild.channels.append(
+                FakeChannel(
+                    discord.ChannelType.text,
+                    f"text-{i}",
+                    i,
+                    category,
+                    overwrites,
+                    topic=f"topic {i}",
+                    nsfw=False,
+                    slowmode_delay=i % 3,
+                )
+            )
+
+
+def layout(guild: FakeGuild) -> set:
+    """Everything that should survive a restore, with ids replaced by names."""
+
+    names = {o.id: o.name for o in guild.roles + guild.channels}
+    items = {("role", r.name, r.permissions.value, r.colour.value) for r in guild.roles}
+    for c in guild.channels:
+        items.add(
+            (
+                "channel",
+                c.name,
+                c.type.value,
+                names.get(c.category_id),
+                frozenset(
+                    (names[t.id], ow.pair()[0].value, ow.pair()[1].value)
+                    for t, ow in c.overwrites.items()
+                ),
+            )
+        )
+    return items
+
+
+async def timed(coro) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = await coro
+    return time.perf_counter() - start, result
+
+
+async def run(args, concurrency: int) -> None:
+    DBHelper.reset_caches()
+    snapshots.RESTORE_CONCURRENCY = concurrency
+    api = FakeAPI(args.api_latency, args.api_rate)
+    guild = FakeGuild(api)
+    build(guild, args.roles, args.channels)
+    expected = layout(guild)
+
+    first, (written, _) = await timed(snapshots.take_snapshot(guild))
+    again, (unchanged, _) = await timed(snapshots.take_snapshot(guild))
+    guild.channels[1].topic = "edited"
+    _, (edited, _) = await timed(snapshots.take_snapshot(guild))
+    guild.roles.clear()
+    guild.channels = [
+        c
+        for c in guild.channels
+        if c.type is discord.ChannelType.category or c.position % 2
+    ]
+    for channel in guild.channels:
+        channel._api = api
+        channel.overwrites = {}  # every overwrite pointed at a deleted role
+    await snapshots.take_snapshot(guild)  # the loop ran before anyone noticed
+    since = time.time()
+    restore, report = await timed(snapshots.restore(guild, since - 60))
+    ok = layout(guild) == expected
+    print(
+        f"  {concurrency} at a time: snapshot {first * 1e3:.1f} ms ({written} rows), "
+        f"unchanged {again * 1e3:.1f} ms ({unchanged} rows), one edit ({edited} row) | "
+        f"restored {report.roles} roles + {report.channels} channels in {restore:.2f}s, "
+        f"{api.calls} API calls, {report.failed} failed, layout {'OK' if ok else 'DIFFERS'}"
+    )
+
+
+def main(args) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "bench.db")
+        initdb.DB_PATH = path
+        initdb.init_db()
+        original = DBHelper.DB_PATH
+        DBHelper.DB_PATH = path
+        try:
+            print(
+                f"{args.roles} roles, {args.channels} channels, API "
+                f"{args.api_latency * 1e3:.0f} ms/call @ {args.api_rate:.0f}/s"
+            )
+            concurrency = snapshots.RESTORE_CONCURRENCY
+            for n in (1, concurrency):
+                with connections.transaction(path) as conn:
+                    conn.execute("DELETE FROM guild_snapshots")
+                asyncio.run(run(args, n))
+        finally:
+            connections.close(path)
+            DBHelper.DB_PATH = original
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--roles", type=int, default=50)
+    parser.add_argument("--channels", type=int, default=100)
+    parser.add_argument("--api-latency", type=float, default=0.15)
+    parser.add_argument("--api-rate", type=float, default=50.0)
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,100 @@
+"""Measure ``/topcoins`` latency: full scan vs. money index vs. top-K cache.
+
+Builds a throw-away database with N users, then times ``get_top_users``
+three ways while a share of calls mutate balances in between:
+
+```bash
+python scripts/bench_topcoins.py --users 1000000 --queries 2000
+```
+"""
+
+import argparse
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# ensure project root is on the Python path when running as a script
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+import db.DBHelper as DBHelper
+import db.initializeDB as initdb
+from db.connection import connections
+
+
+def populate(path: str, users: int) -> None:
+    initdb.DB_PATH = path
+    initdb.init_db()
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO users (user_id, username, money) VALUES (?, ?, ?)",
+        ((str(i), f"user{i}", random.randint(0, 1_000_000)) for i in range(users)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def timed(query, queries: int, users: int, write_every: int) -> list[float]:
+    samples = []
+    for i in range(queries):
+        if write_every and i % write_every == 0:
+            DBHelper.add_coins(str(random.randrange(users)), random.randint(-500, 5_000))
+        start = time.perf_counter()
+        query(random.randint(1, 25))
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def report(label: str, samples: list[float]) -> None:
+    samples.sort()
+    p99 = samples[int(len(samples) * 0.99) - 1]
+    print(
+        f"  {label:<12} mean {statistics.mean(samples) * 1e3:8.3f} ms | "
+        f"p99 {p99 * 1e3:8.3f} ms"
+    )
+
+
+def sql_top(limit: int):
+    return DBHelper._fetchall(
+        "SELECT username, money FROM users ORDER BY money DESC LIMIT ?", (limit,)
+    )
+
+
+def bench(users: int, queries: int, write_every: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "bench.db")
+        populate(path, users)
+        original = DBHelper.DB_PATH
+        DBHelper.DB_PATH = path
+        DBHelper.reset_caches()
+        try:
+            print(f"{users} users, {queries} queries, 1 write per {write_every}:")
+            DBHelper._execute("DROP INDEX idx_users_money")
+            report("full scan", timed(sql_top, max(queries // 20, 10), users, 0))
+            DBHelper._execute("CREATE INDEX idx_users_money ON users(money)")
+            report("money index", timed(sql_top, queries, users, write_every))
+            report(
+                "top-K cache",
+                timed(DBHelper.get_top_users, queries, users, write_every),
+            )
+            board = DBHelper._leaderboard
+            print(f"  cache hits {board.hits}, rebuilds {board.rebuilds}")
+        finally:
+            connections.close(path)
+            DBHelper.DB_PATH = original
+            DBHelper.reset_caches()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, nargs="+", default=[1_000_000])
+    parser.add_argument("--queries", type=int, default=2_000)
+    parser.add_argument("--write-every", type=int, default=4)
+    args = parser.parse_args()
+    for n in args.users:
+        bench(n, args.queries, args.write_every)
@@ -0,0 +1,343 @@
+"""Simulate weeks of the coin economy and report inflation, house edge and Gini.
+
+``--users`` players are simulated hour by hour for ``--weeks`` weeks with
+NumPy: every hour each player who is online that day starts a session with
+probability ``sessions / 24`` (sessions per day are log-normal around
+``--sessions``). A session claims /daily and /weekly when due, fishes, does
+a quest when off cooldown, spends stat points, maybe buys the next rod,
+uses steal/hack/fight for the player's main stat and gambles part of the
+balance with ``--gamble``/``--casino`` probability. Odds and payouts come
+from config.py (GAMBLE_BANDS, FISHING_REWARDS, ROD_SHOP, STEAL_PCT, ...), so
+a tuning change there can be checked here before it ships:
+
+```bash
+python scripts/simulate_economy.py --users 200000 --weeks 4
+```
+
+Simplifications: one hour per tick, so every command with a shorter
+cooldown runs at most once per session; a player is robbed (steal or
+fight) at most once per tick; the unreachable 10x "mega jackpot" of
+/gamble (``roll == 0.01``) is left out.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# ensure project root is on the Python path when running as a script
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+import numpy as np
+
+from config import (
+    ACTION_MIN_STAT,
+    CASINO_WIN_CHANCE,
+    DAILY_REWARD,
+    FIGHT_PCT,
+    FIGHT_PENALTY_PCT,
+    FISHING_REWARDS,
+    GAMBLE_BANDS,
+    HACK_CHANCE,
+    HACK_LOSS,
+    HACK_REWARD,
+    QUEST_COOLDOWN_HOURS,
+    QUEST_STAT_POINTS,
+    REFUND_COINS_PER_POINT,
+    ROD_SHOP,
+    STAT_PRICE,
+    STEAL_PCT,
+    WEEKLY_REWARD,
+)
+
+STEALTH, INTELLIGENCE, STRENGTH = range(3)
+SOURCES = (
+    "daily",
+    "weekly",
+    "fishing",
+    "refunds",
+    "hack wins",
+    "hack losses",
+    "rods",
+    "points bought",
+    "gamble",
+    "casino",
+)
+
+
+def gini(balances: np.ndarray) -> float:
+    x = np.sort(balances.astype(np.float64))
+    total = x.sum()
+    if total <= 0:
+        return 0.0
+    n = len(x)
+    return float((n + 1 - 2 * np.cumsum(x).sum() / total) / n)
+
+
+def gamble_edge() -> float:
+    bounds = [0.0] + [b for b, _ in GAMBLE_BANDS]
+    return 1 - sum((hi - lo) * m for lo, (hi, m) in zip(bounds, GAMBLE_BANDS))
+
+
+class Economy:
+    def __init__(self, args):
+        n = args.users
+        self.args = args
+        self.rng = np.random.default_rng(args.seed)
+        rng = self.rng
+        self.money = np.full(n, args.start_coins, dtype=np.int64)
+        self.points = np.zeros(n, dtype=np.int64)
+        self.stats = np.zeros((n, 3), dtype=np.int64)
+        self.rod = np.zeros(n, dtype=np.int64)
+        self.main_stat = rng.integers(0, 3, n)
+        self.refunder = rng.random(n) < args.refund_share
+        sigma = 0.75
+        self.session_p = np.minimum(
+            rng.lognormal(np.log(args.sessions) - sigma**2 / 2, sigma, n) / 24, 1.0
+        )
+        self.last_daily = np.full(n, -1)
+        self.last_weekly = np.full(n, -7)
+        self.last_quest = np.full(n, -QUEST_COOLDOWN_HOURS)
+        self.flows = dict.fromkeys(SOURCES, 0)
+        self.wagered = {"gamble": 0, "casino": 0}
+        self.returns = {"gamble": [0, 0.0], "casino": [0, 0.0]}  # bets, sum of payout/bet
+        self.actions = 0
+
+        levels = max(ROD_SHOP) + 2
+        self.rod_mult = np.array([ROD_SHOP.get(l, (0, 1.0))[1] for l in range(levels)])
+        self.rod_price = np.array([ROD_SHOP.get(l, (0, 0))[0] for l in range(levels)])
+        self.fish_bounds = np.array([b for b, *_ in FISHING_REWARDS])
+        self.fish_coins = np.array([k == "coins" for _, k, _, _ in FISHING_REWARDS])
+        self.fish_low = np.array([lo for *_, lo, _ in FISHING_REWARDS])
+        self.fish_high = np.array([hi for *_, hi in FISHING_REWARDS])
+        self.gamble_bounds = np.array([b for b, _ in GAMBLE_BANDS])
+        self.gamble_mult = np.array([m for _, m in GAMBLE_BANDS] + [0])
+
+    def flow(self, source: str, users: np.ndarray, amounts: np.ndarray) -> None:
+        np.add.at(self.money, users, amounts)
+        self.flows[source] += int(amounts.sum())
+
+    def session(self, hour: int, u: np.ndarray) -> None:
+        rng, args = self.rng, self.args
+        day = hour // 24
+        self.actions += 2 * len(u)  # fishing and stat spending, always
+
+        due = u[self.last_daily[u] < day]
+        self.last_daily[due] = day
+        self.flow("daily", due, np.full(len(due), DAILY_REWARD))
+        due = u[self.last_weekly[u] <= day - 7]
+        self.last_weekly[due] = day
+        self.flow("weekly", due, np.full(len(due), WEEKLY_REWARD))
+        self.actions += len(due)
+
+        band = np.searchsorted(self.fish_bounds, rng.random(len(u)), side="right")
+        amount = (
+            rng.integers(self.fish_low[band], self.fish_high[band] + 1)
+            * self.rod_mult[self.rod[u]]
+        ).astype(np.int64)
+        coins = self.fish_coins[band]
+        self.flow("fishing", u[coins], amount[coins])
+        self.points[u[~coins]] += amount[~coins]
+
+        due = u[hour - self.last_quest[u] >= QUEST_COOLDOWN_HOURS]
+        self.last_quest[due] = hour
+        self.points[due] += rng.integers(
+            QUEST_STAT_POINTS[0], QUEST_STAT_POINTS[1] + 1, len(due)
+        )
+        self.actions += len(due)
+
+        sell = u[self.refunder[u]]
+        self.flow("refunds", sell, self.points[sell] * REFUND_COINS_PER_POINT)
+        self.points[sell] = 0
+        keep = u[~self.refunder[u]]
+        spend = self.money[keep] * args.buy_points // 100 // STAT_PRICE
+        self.flow("points bought", keep, -spend * STAT_PRICE)
+        self.stats[keep, self.main_stat[keep]] += self.points[keep] + spend
+        self.points[keep] = 0
+
+        nxt = self.rod[u] + 1
+        price = self.rod_price[np.minimum(nxt, len(self.rod_price) - 1)]
+        buy = u[(price > 0) & (self.money[u] >= 2 * price)]
+        self.flow("rods", buy, -self.rod_price[self.rod[buy] + 1])
+        self.rod[buy] += 1
+        self.actions += len(buy)
+
+        for stat, act in (
+            (STEALTH, self.steal),
+            (INTELLIGENCE, self.hack),
+            (STRENGTH, self.fight),
+        ):
+            actors = u[
+                (self.main_stat[u] == stat) & (self.stats[u, stat] >= ACTION_MIN_STAT)
+            ]
+            self.actions += len(actors)
+            act(actors)
+
+        self.gamble(u[rng.random(len(u)) < args.gamble])
+        self.casino(u[rng.random(len(u)) < args.casino])
+
+    def _targets(self, actors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        n = len(self.money)
+        targets = (actors + self.rng.integers(1, n, len(actors))) % n
+        # a player is robbed at most once per tick
+        _, first = np.unique(targets, return_index=True)
+        return actors[first], targets[first]
+
+    def _transfer(self, src: np.ndarray, dst: np.ndarray, amount: np.ndarray) -> None:
+        amount = np.minimum(amount, self.money[src])
+        np.subtract.at(self.money, src, amount)
+        np.add.at(self.money, dst, amount)
+
+    def steal(self, actors: np.ndarray) -> None:
+        rng = self.rng
+        actors, targets = self._targets(actors)
+        mine = self.stats[actors, STEALTH]
+        theirs = self.stats[targets, STEALTH]
+        ok = (rng.random(len(actors)) <= mine / (mine + theirs)) & (
+            self.money[targets] >= 5
+        )
+        actors, targets = actors[ok], targets[ok]
+        base, per_level, cap = STEAL_PCT
+        lead = np.maximum(mine[ok] - theirs[ok], 0)
+        pct = rng.random(len(actors)) * np.minimum(base + per_level * lead, cap)
+        amount = np.maximum(1, (self.money[targets] * pct).astype(np.int64))
+        self._transfer(targets, actors, amount)
+
+    def hack(self, actors: np.ndarray) -> None:
+        rng = self.rng
+        level = self.stats[actors, INTELLIGENCE]
+        base, per_level, cap = HACK_CHANCE
+        won = rng.random(len(actors)) < np.minimum(
+            base + per_level * (level - ACTION_MIN_STAT), cap
+        )
+        reward = rng.integers(HACK_REWARD[0], HACK_REWARD[1] + 1, len(actors)) * level // 2
+        self.flow("hack wins", actors[won], reward[won])
+        lost = actors[~won]
+        loss = rng.integers(HACK_LOSS[0], HACK_LOSS[1] + 1, len(lost)) * level[~won]
+        self.flow("hack losses", lost, -np.minimum(loss, self.money[lost]))
+
+    def fight(self, actors: np.ndarray) -> None:
+        rng = self.rng
+        actors, targets = self._targets(actors)
+        mine = self.stats[actors, STRENGTH]
+        theirs = self.stats[targets, STRENGTH]
+        won = rng.random(len(actors)) <= mine / (mine + theirs)
+        penalty = np.maximum(
+            1, (self.money[actors[~won]] * FIGHT_PENALTY_PCT).astype(np.int64)
+        )
+        self._transfer(actors[~won], targets[~won], penalty)
+        base, per_level, cap = FIGHT_PCT
+        lead = np.maximum(mine[won] - theirs[won], 0)
+        pct = rng.random(int(won.sum())) * np.minimum(base + per_level * lead, cap)
+        amount = np.maximum(1, (self.money[targets[won]] * pct).astype(np.int64))
+        self._transfer(targets[won], actors[won], amount)
+
+    def _bets(self, players: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        fraction = self.rng.random(len(players)) * 2 * self.args.bet
+        bets = np.minimum(
+            np.maximum(2, (self.money[players] * fraction).astype(np.int64)),
+            self.money[players],
+        )
+        ok = bets >= 2
+        self.actions += int(ok.sum())
+        return players[ok], bets[ok]
+
+    def gamble(self, players: np.ndarray) -> None:
+        players, bets = self._bets(players)
+        band = np.searchsorted(
+            self.gamble_bounds, self.rng.random(len(players)), side="right"
+        )
+        self.wagered["gamble"] += int(bets.sum())
+        self.returns["gamble"][0] += len(bets)
+        self.returns["gamble"][1] += float(self.gamble_mult[band].sum())
+        self.flow("gamble", players, bets * (self.gamble_mult[band] - 1))
+
+    def casino(self, players: np.ndarray) -> None:
+        players, bets = self._bets(players)
+        won = self.rng.random(len(players)) < CASINO_WIN_CHANCE
+        self.wagered["casino"] += int(bets.sum())
+        self.returns["casino"][0] += len(bets)
+        self.returns["casino"][1] += 2.0 * won.sum()
+        self.flow("casino", players, np.where(won, bets, -bets))
+
+    def run(self):
+        rng, args = self.rng, self.args
+        n = args.users
+        weeks = []
+        user_days = 0
+        for day in range(args.weeks * 7):
+            online = rng.random(n) < args.active
+            user_days += int(online.sum())
+            for hour in range(day * 24, day * 24 + 24):
+                self.session(hour, np.flatnonzero(online & (rng.random(n) < self.session_p)))
+            if day % 7 == 6:
+                weeks.append((self.money.copy(), user_days, dict(self.flows)))
+        return weeks
+
+
+def main(args) -> None:
+    economy = Economy(args)
+    start = time.perf_counter()
+    weeks = economy.run()
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"{args.users:,} players, {args.weeks} weeks, online {args.active:.0%} of days, "
+        f"~{args.sessions} sessions/day, gamble {args.gamble:.0%} / casino "
+        f"{args.casino:.0%} of sessions betting ~{args.bet:.0%} of the balance"
+    )
+    print(
+        f"{economy.actions:,} actions in {elapsed:.1f}s "
+        f"({economy.actions / elapsed / 1e6:.1f}M/s)\n"
+    )
+    print("week      supply   growth  coins/user-day   median  top 1%   gini")
+    previous = args.start_coins * args.users
+    previous_days = 0
+    for week, (money, user_days, _) in enumerate(weeks, 1):
+        supply = int(money.sum())
+        top = np.sort(money)[-max(1, args.users // 100) :].sum() / max(supply, 1)
+        growth = f"{(supply - previous) / previous:+8.1%}" if previous else "       -"
+        print(
+            f"{week:4} {supply:12,} {growth} {(supply - previous) / (user_days - previous_days):15.1f} "
+            f"{int(np.median(money)):8,} {top:7.1%} {gini(money):6.3f}"
+        )
+        previous, previous_days = supply, user_days
+
+    money, user_days, flows = weeks[-1]
+    print(f"\nnet coins per online player-day by source, weeks 1-{args.weeks}:")
+    for source in SOURCES:
+        print(f"  {source:14} {flows[source] / user_days:+9.2f}")
+    print(f"  {'total':14} {sum(flows.values()) / user_days:+9.2f}")
+
+    # per coin is dominated by the few biggest bets; per bet converges fast
+    print("\nhouse edge      config   per bet  per coin")
+    for game, expected in (
+        ("gamble", gamble_edge()),
+        ("casino", 1 - 2 * CASINO_WIN_CHANCE),
+    ):
+        wagered = economy.wagered[game]
+        per_coin = -flows[game] / wagered if wagered else float("nan")
+        bets, paid = economy.returns[game]
+        per_bet = 1 - paid / bets if bets else float("nan")
+        print(f"  {game:12} {expected:7.2%} {per_bet:9.2%} {per_coin:9.2%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--weeks", type=int, default=4)
+    parser.add_argument("--active", type=float, default=0.5, help="online share per day")
+    parser.add_argument("--sessions", type=float, default=4.0, help="per online day")
+    parser.add_argument("--gamble", type=float, default=0.3, help="chance per session")
+    parser.add_argument("--casino", type=float, default=0.2, help="chance per session")
+    parser.add_argument("--bet", type=float, default=0.2, help="mean share of balance")
+    parser.add_argument("--refund-share", type=float, default=0.3)
+    parser.add_argument(
+        "--buy-points", type=int, default=5, help="percent of balance per session"
+    )
+    parser.add_argument("--start-coins", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    main(args)
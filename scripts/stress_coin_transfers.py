@@ -0,0 +1,140 @@
+"""Hammer ``transfer``/``add_coins`` from many threads and check no coins vanish.
+
+Every worker moves random amounts between a small set of users, so the
+same rows are contended constantly; some of the moves are two-player games
+whose stakes go through ``reserve_hold``/``settle_holds``. Afterwards the
+total supply must be exactly what it was at the start, no hold may be left
+open and no balance may be negative:
+
+```bash
+python scripts/stress_coin_transfers.py --threads 16 --ops 2000
+python scripts/stress_coin_transfers.py --legacy   # old read-modify-write
+```
+"""
+
+import argparse
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# ensure project root is on the Python path when running as a script
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+import db.DBHelper as DBHelper
+import db.initializeDB as initdb
+from db.connection import connections
+
+
+def populate(path: str, users: int, balance: int) -> None:
+    initdb.DB_PATH = path
+    initdb.init_db()
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO users (user_id, username, money) VALUES (?, ?, ?)",
+        ((str(i), f"user{i}", balance) for i in range(users)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def legacy_transfer(from_id: str, to_id: str, amount: int) -> int:
+    balance = DBHelper.get_money(from_id)
+    if balance < amount:
+        return 0
+    DBHelper.set_money(from_id, balance - amount)
+    DBHelper.set_money(to_id, DBHelper.get_money(to_id) + amount)
+    return amount
+
+
+def worker(users: int, ops: int, legacy: bool, errors: list) -> None:
+    rng = random.Random()
+    try:
+        for _ in range(ops):
+            a, b = rng.sample(range(users), 2)
+            amount = rng.randint(1, 50)
+            roll = rng.random()
+            if legacy:
+                legacy_transfer(str(a), str(b), amount)
+            elif roll < 0.6:
+                DBHelper.transfer(str(a), str(b), amount, partial=rng.random() < 0.5)
+            elif roll < 0.8:
+                # paired debit/credit through add_coins
+                if DBHelper.add_coins(str(a), -amount) is not None:
+                    DBHelper.add_coins(str(b), amount)
+            else:
+                # a duel: both stakes held, the winner takes the pot
+                holds = [DBHelper.reserve_hold(str(p), amount, "stress") for p in (a, b)]
+                if None in holds:
+                    DBHelper.release_holds([h for h in holds if h is not None])
+                else:
+                    DBHelper.settle_holds(holds, {str(rng.choice((a, b))): 2 * amount})
+    except Exception as exc:  # pragma: no cover - reported below
+        errors.append(exc)
+
+
+def totals(path: str) -> tuple[int, int, int]:
+    """(supply including held coins, lowest balance, open holds)"""
+
+    conn = sqlite3.connect(path)
+    total, lowest = conn.execute("SELECT SUM(money), MIN(money) FROM users").fetchone()
+    held, open_holds = conn.execute(
+        "SELECT COALESCE(SUM(amount), 0), COUNT(*) FROM holds"
+    ).fetchone()
+    conn.close()
+    return total + held, lowest, open_holds
+
+
+def run(threads: int, ops: int, users: int, legacy: bool) -> bool:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "stress.db")
+        populate(path, users, 1_000)
+        expected, _, _ = totals(path)
+
+        original = DBHelper.DB_PATH
+        DBHelper.DB_PATH = path
+        errors: list = []
+        pool = [
+            threading.Thread(target=worker, args=(users, ops, legacy, errors))
+            for _ in range(threads)
+        ]
+        start = time.perf_counter()
+        try:
+            for t in pool:
+                t.start()
+            for t in pool:
+                t.join()
+        finally:
+            elapsed = time.perf_counter() - start
+            connections.close(path)
+            DBHelper.DB_PATH = original
+
+        total, lowest, open_holds = totals(path)
+
+    ok = total == expected and lowest >= 0 and not open_holds and not errors
+    mode = "legacy" if legacy else "atomic"
+    print(
+        f"{mode}: {threads} threads x {ops} ops in {elapsed:.2f}s | "
+        f"supply {expected} -> {total} (diff {total - expected:+}) | "
+        f"min balance {lowest} | open holds {open_holds} | errors {len(errors)} | "
+        f"{'OK' if ok else 'FAIL'}"
+    )
+    for exc in errors[:5]:
+        print(f"  {type(exc).__name__}: {exc}")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--ops", type=int, default=2_000)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--legacy", action="store_true")
+    args = parser.parse_args()
+    ok = run(args.threads, args.ops, args.users, args.legacy)
+    sys.exit(0 if ok else 1)
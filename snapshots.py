@@ -0,0 +1,241 @@
+import asyncio
+import json
+import logging
+from typing import NamedTuple
+
+import discord
+from discord.ext import commands
+
+from config import SNAPSHOT_INTERVAL_SECONDS
+from db.async_db import db
+
+RESTORE_CONCURRENCY = 5  # parallel create calls; discord.py waits out 429s
+
+_CHANNEL_FIELDS = ("topic", "nsfw", "slowmode_delay", "bitrate", "user_limit")
+
+
+def _role_data(role: discord.Role, overwrites: list) -> dict:
+    return {
+        "name": role.name,
+        "permissions": role.permissions.value,
+        "colour": role.colour.value,
+        "hoist": role.hoist,
+        "mentionable": role.mentionable,
+        "position": role.position,
+        "overwrites": sorted(overwrites),
+    }
+
+
+def _is_member(target) -> bool:
+    if isinstance(target, (discord.Member, discord.User)):
+        return True
+    return getattr(target, "type", None) is discord.Member
+
+
+def _channel_data(channel: discord.abc.GuildChannel) -> dict:
+    overwrites = []
+    for target, overwrite in channel.overwrites.items():
+        allow, deny = overwrite.pair()
+        overwrites.append([target.id, int(_is_member(target)), allow.value, deny.value])
+    data = {
+        "type": channel.type.value,
+        "name": channel.name,
+        "position": channel.position,
+        "category_id": channel.category_id,
+        "overwrites": sorted(overwrites),
+    }
+    for name in _CHANNEL_FIELDS:
+        value = getattr(channel, name, None)
+        if value is not None:
+            data[name] = value
+    return data
+
+
+def _dump(data: dict) -> str:
+    return json.dumps(data, separators=(",", ":"), sort_keys=True)
+
+
+def serialize(guild: discord.Guild) -> dict[tuple[str, int], str]:
+    """Every restorable role and channel of *guild*, as compact JSON.
+
+    A role also records its ``[channel_id, allow, deny]`` overwrites: Discord
+    drops them from the channels when the role is deleted, so the role's
+    frozen row is the only place they survive for channels the nuke spared.
+    """
+
+    objects = {}
+    role_overwrites: dict[int, list] = {}
+    for channel in guild.channels:
+        data = _channel_data(channel)
+        objects[("channel", channel.id)] = _dump(data)
+        for target_id, is_member, allow, deny in data["overwrites"]:
+            if not is_member:
+                role_overwrites.setdefault(target_id, []).append(
+                    [channel.id, allow, deny]
+                )
+    for role in guild.roles:
+        if not role.is_default() and not role.managed:
+            objects[("role", role.id)] = _dump(
+                _role_data(role, role_overwrites.get(role.id, []))
+            )
+    return objects
+
+
+async def take_snapshot(guild: discord.Guild) -> tuple[int, int]:
+    """Snapshot *guild*; returns (rows written, objects marked deleted)."""
+
+    return await db.save_guild_snapshot(guild.id, serialize(guild))
+
+
+async def snapshot_loop(bot: commands.Bot) -> None:
+    while True:
+        for guild in list(bot.guilds):
+            try:
+                await take_snapshot(guild)
+            except Exception:
+                logging.exception("Snapshot of guild %s failed", guild.id)
+        await asyncio.sleep(SNAPSHOT_INTERVAL_SECONDS)
+
+
+class RestoreReport(NamedTuple):
+    roles: int
+    channels: int
+    failed: int
+
+
+async def restore(guild: discord.Guild, since: float) -> RestoreReport:
+    """Recreate the roles and channels deleted since *since*.
+
+    Roles go first so that channel overwrites can point at them, then
+    categories, then the channels inside them. Within each step the create
+    calls run concurrently, at most RESTORE_CONCURRENCY at a time.
+    Overwrites and parents that referred to deleted objects are remapped
+    to the recreated ones, and channels that survived get back the
+    overwrites they had for the recreated roles.
+    """
+
+    await take_snapshot(guild)  # mark whatever went since the last run
+    deleted = await db.get_deleted_snapshot(guild.id, since)
+    roles = {oid: json.loads(data) for kind, oid, data in deleted if kind == "role"}
+    channels = {
+        oid: json.loads(data) for kind, oid, data in deleted if kind == "channel"
+    }
+    limit = asyncio.Semaphore(RESTORE_CONCURRENCY)
+    new_roles: dict[int, discord.Role] = {}
+    new_channels: dict[int, discord.abc.GuildChannel] = {}
+
+    async def create_role(oid: int, data: dict):
+        async with limit:
+            new_roles[oid] = await guild.create_role(
+                name=data["name"],
+                permissions=discord.Permissions(data["permissions"]),
+                colour=discord.Colour(data["colour"]),
+                hoist=data["hoist"],
+                mentionable=data["mentionable"],
+                reason="Anti-nuke restore",
+            )
+
+    def overwrites(data: dict) -> dict:
+        result = {}
+        for target_id, is_member, allow, deny in data["overwrites"]:
+            if is_member:
+                target = guild.get_member(target_id)
+            else:
+                target = new_roles.get(target_id) or guild.get_role(target_id)
+            if target is not None:
+                result[target] = discord.PermissionOverwrite.from_pair(
+                    discord.Permissions(allow), discord.Permissions(deny)
+                )
+        return result
+
+    async def create_channel(oid: int, data: dict):
+        kind = discord.ChannelType(data["type"])
+        kwargs = {
+            "name": data["name"],
+            "position": data["position"],
+            "overwrites": overwrites(data),
+            "reason": "Anti-nuke restore",
+        }
+        if kind is discord.ChannelType.category:
+            create = guild.create_category
+        else:
+            parent = data["category_id"]
+            kwargs["category"] = new_channels.get(parent) or guild.get_channel(parent)
+            if kind is discord.ChannelType.voice:
+                create = guild.create_voice_channel
+                kwargs["bitrate"] = min(data["bitrate"], int(guild.bitrate_limit))
+                kwargs["user_limit"] = data["user_limit"]
+            elif kind is discord.ChannelType.stage_voice:
+                create = guild.create_stage_channel
+            elif kind is discord.ChannelType.forum:
+                create = guild.create_forum
+                kwargs["topic"] = data.get("topic")
+                kwargs["nsfw"] = data.get("nsfw", False)
+            else:
+                create = guild.create_text_channel
+                kwargs["topic"] = data.get("topic")
+                kwargs["nsfw"] = data.get("nsfw", False)
+                kwargs["slowmode_delay"] = data.get("slowmode_delay", 0)
+                kwargs["news"] = kind is discord.ChannelType.news
+        async with limit:
+            new_channels[oid] = await create(**kwargs)
+
+    async def reapply(channel: discord.abc.GuildChannel, additions: dict):
+        async with limit:
+            await channel.edit(
+                overwrites={**channel.overwrites, **additions},
+                reason="Anti-nuke restore",
+            )
+
+    async def run(jobs) -> int:
+        results = await asyncio.gather(*jobs, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                logging.warning("Restore in guild %s failed: %s", guild.id, result)
+        return sum(isinstance(r, Exception) for r in results)
+
+    failed = await run(create_role(oid, data) for oid, data in roles.items())
+    if new_roles:
+        top = guild.me.top_role.position
+        positions = {
+            role: max(1, min(roles[oid]["position"], top - 1))
+            for oid, role in new_roles.items()
+        }
+        try:
+            await guild.edit_role_positions(positions, reason="Anti-nuke restore")
+        except discord.HTTPException:
+            failed += 1
+    category = discord.ChannelType.category.value
+    failed += await run(
+        create_channel(oid, data)
+        for oid, data in channels.items()
+        if data["type"] == category
+    )
+    failed += await run(
+        create_channel(oid, data)
+        for oid, data in channels.items()
+        if data["type"] != category
+    )
+    survivors: dict[int, dict] = {}
+    for oid, role in new_roles.items():
+        for channel_id, allow, deny in roles[oid].get("overwrites", []):
+            channel = guild.get_channel(channel_id)
+            if channel is not None:
+                survivors.setdefault(channel_id, {})[role] = (
+                    discord.PermissionOverwrite.from_pair(
+                        discord.Permissions(allow), discord.Permissions(deny)
+                    )
+                )
+    failed += await run(
+        reapply(guild.get_channel(cid), additions)
+        for cid, additions in survivors.items()
+    )
+
+    # the recreated objects have new ids; the next snapshot records them
+    await db.forget_snapshot_objects(
+        guild.id,
+        [("role", oid) for oid in new_roles]
+        + [("channel", oid) for oid in new_channels],
+    )
+    await take_snapshot(guild)
+    return RestoreReport(len(new_roles), len(new_channels), failed)
@@ -1,3 +1,6 @@
+import asyncio
+import weakref
+
 import discord
 from discord import ui
 from typing import Optional
@@ -19,6 +22,22 @@ async def get_channel_webhook(channel: discord.TextChannel) -> discord.Webhook:
     return wh
 
 
+# one lock per user id, dropped as soon as nobody holds or waits on it
+_user_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = (
+    weakref.WeakValueDictionary()
+)
+
+
+def user_lock(user_id: int | str) -> asyncio.Lock:
+    """Lock that serializes one user's balance changes; other users never wait."""
+
+    key = str(user_id)
+    lock = _user_locks.get(key)
+    if lock is None:
+        lock = _user_locks[key] = asyncio.Lock()
+    return lock
+
+
 def parse_duration(duration: str) -> Optional[int]:
     try:
         if duration.endswith("s"):